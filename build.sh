@@ -27,23 +27,25 @@ python3 main.py --silent minify-json minify ./protocols/orchestration-*.json \
 echo "🔨 normalizing filenames (stripping minification suffixes)..."
 for f in "$BUILD_DIR/protocols"/*-out.json ; do mv "$f" "${f%-out.json}.json"; done
 
+# stage documents, aggregates and the compact kernel stay in the binary tree
+# format (.bjson); only kernels and the session xml are written for consumers
 echo "🔨 nesting stage protocols..."
 for dir in ./protocols/s*-*; do
     [ -d "$dir" ] || continue
     dname=$(basename "$dir")
     python3 main.py --silent nest-json nest "$dir" \
-        -o "$BUILD_DIR/protocols/${dname}.json" --length "$dname"
+        -o "$BUILD_DIR/protocols/${dname}.bjson" --length "$dname"
 done
 
 echo "🔨 aggregating stage protocols..."
 for llm in chatgpt gemini perplexity; do
-  files=( "$BUILD_DIR"/protocols/s*"$llm"*.json )
+  files=( "$BUILD_DIR"/protocols/s*"$llm"*.bjson )
   if [ ${#files[@]} -gt 0 ]; then
     python3 main.py --silent nest-json nest "${files[@]}" \
-      -o "$BUILD_DIR/protocols/protocols-$llm.json" \
+      -o "$BUILD_DIR/protocols/protocols-$llm.bjson" \
       --sum protocols-$llm
   fi
-  rm -f "$BUILD_DIR"/protocols/s*"$llm".json
+  rm -f "$BUILD_DIR"/protocols/s*"$llm".bjson
 done
 
 echo "🔨 compiling full kernels (orchestration,rules,protocols)..."
@@ -52,7 +54,7 @@ for llm in chatgpt gemini perplexity; do
     "$BUILD_DIR/protocols/orchestration-$llm.json" \
     "$BUILD_DIR/protocols/rules-$llm.json" \
     "$BUILD_DIR/protocols/protocol-schema.json" \
-    "$BUILD_DIR/protocols/protocols-$llm.json" \
+    "$BUILD_DIR/protocols/protocols-$llm.bjson" \
     -o "$BUILD_DIR/kernel-$llm.json" \
     --length rules \
     --sum protocols-$llm \
@@ -60,6 +62,9 @@ for llm in chatgpt gemini perplexity; do
     echo "  ✅ $BUILD_DIR/kernel-$llm.json created"
 done
 
+echo "🔒 locking baseline counts and hashes..."
+python3 main.py --silent lock-baseline "$BUILD_DIR"/kernel-*.json
+
 echo "🔨 validating build outputs..."
 python3 main.py --silent verify-json "$BUILD_DIR/protocols/" -a
 
@@ -71,8 +76,8 @@ echo "🚀 packaging context xml..."
 for llm in chatgpt gemini perplexity; do
   mkdir -p "$BUILD_DIR/dist/$llm"
   python3 main.py --silent minify-json minify "$BUILD_DIR/kernel-$llm.json" \
-    --null-removal --compact -o "$BUILD_DIR/dist/$llm/"
-  python3 main.py build-session "$BUILD_DIR/dist/$llm/kernel-$llm-out.json" -o "$BUILD_DIR/dist/$llm/"
+    --null-removal --binary -o "$BUILD_DIR/dist/$llm/"
+  python3 main.py build-session "$BUILD_DIR/dist/$llm/kernel-$llm-out.bjson" -o "$BUILD_DIR/dist/$llm/"
   echo "  ✅ $BUILD_DIR/dist/$llm/context.xml created"
-  #rm "$BUILD_DIR/dist/$llm/kernel-$llm-out.json"
+  #rm "$BUILD_DIR/dist/$llm/kernel-$llm-out.bjson"
 done
@@ -0,0 +1,111 @@
+# --- framework/_baseline.py | checksum: auto ---
+from _canonical import digest
+
+config = {
+  "reserved": {"manifest", "__LENGTH__"},
+  "rules_key": "rules",
+  "rules_prefix": "rules",
+  "protocols_prefix": "protocols",
+  "fields": ("baseline-rules-count", "baseline-protocols-count", "baseline-hash"),
+}
+
+class CountMismatch(Exception):
+  """Raised when the filtered count disagrees with the top-level recount (HALT)."""
+
+def find_orchestration(doc):
+  """Return the first dict carrying structure-hints, searched breadth-first."""
+  todo = [doc]
+  while todo:
+    node = todo.pop(0)
+    if isinstance(node, dict):
+      if isinstance(node.get("structure-hints"), dict):
+        return node
+      todo.extend(v for v in node.values() if isinstance(v, dict))
+  return None
+
+def live_keys(node, blacklist):
+  return [k for k in node if k not in config["reserved"] and k not in blacklist]
+
+def rule_roots(doc):
+  """(key, rules) for every rules root: nest-json names them after their file (rules-chatgpt)."""
+  roots = []
+  for k, v in doc.items():
+    if k.startswith(config["rules_prefix"]) and isinstance(v, dict):
+      # rules.json keeps its {"rules": {...}} wrapper when nested
+      if isinstance(v.get(config["rules_key"]), dict):
+        v = v[config["rules_key"]]
+      roots.append((k, v))
+  return roots
+
+def rules_dict(doc, blacklist=()):
+  """The live rules of every rules root; keys are qualified by root only when there are several."""
+  roots = rule_roots(doc)
+  return {
+    (k if len(roots) == 1 else f"{root}/{k}"): rules[k]
+    for root, rules in roots for k in live_keys(rules, blacklist)
+  }
+
+def protocol_roots(doc):
+  return [
+    (k, v) for k, v in doc.items()
+    if k.startswith(config["protocols_prefix"]) and isinstance(v, dict)
+  ]
+
+def collect_protocols(doc, blacklist, depth):
+  """Descend `depth` grouping levels under each protocols root and keep steps-bearing keys."""
+  found, strays = {}, []
+  level = [(k, v) for k, v in protocol_roots(doc)]
+  for _ in range(depth):
+    level = [
+      (f"{path}/{k}", node[k]) for path, node in level
+      for k in live_keys(node, blacklist) if isinstance(node[k], dict)
+    ]
+  for path, node in level:
+    for k in live_keys(node, blacklist):
+      if isinstance(node[k], dict) and "steps" in node[k]:
+        found[f"{path}/{k}"] = node[k]
+      else:
+        strays.append(f"{path}/{k}")
+  return found, strays
+
+def compute(doc):
+  """Apply orchestration structure-hints.counting-method to a built kernel.
+
+  Returns {"baseline-rules-count", "baseline-protocols-count", "baseline-hash"}.
+  The hash is the canonical digest of the counted rules and protocols only, so
+  writing the result into config does not change it.
+  """
+  orch = find_orchestration(doc)
+  if orch is None:
+    raise ValueError("no orchestration structure-hints in kernel")
+  hints = orch["structure-hints"]
+  blacklist = set(hints.get("blacklist-keys") or [])
+  depth = int(hints.get("traversal-depth", 1))
+  rules = rules_dict(doc, blacklist)
+  rule_keys = sorted(rules)
+  protocols, strays = collect_protocols(doc, blacklist, depth)
+  if strays:
+    raise CountMismatch(
+      f"protocols-count {len(protocols)} != re-count {len(protocols) + len(strays)}: "
+      + ", ".join(strays[:5])
+    )
+  content = {"rules": {k: rules[k] for k in rule_keys}, "protocols": protocols}
+  return dict(zip(config["fields"], (len(rule_keys), len(protocols), digest(content))))
+
+def lock(doc, update=False):
+  """Write computed baselines into the orchestration config.
+
+  Null baselines are filled in. Existing ones are compared and left alone
+  unless update is set. Returns (computed, mismatches).
+  """
+  computed = compute(doc)
+  cfg = find_orchestration(doc).setdefault("config", {})
+  mismatches = {
+    k: {"locked": cfg[k], "computed": v}
+    for k, v in computed.items()
+    if cfg.get(k) is not None and cfg[k] != v
+  }
+  for k, v in computed.items():
+    if cfg.get(k) is None or update:
+      cfg[k] = v
+  return computed, ({} if update else mismatches)
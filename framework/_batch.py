@@ -0,0 +1,182 @@
+# --- framework/_batch.py | checksum: auto ---
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from _codec import dumps, loads
+from _trace import span
+
+config = {"command": "batch", "encoding": "utf-8"}
+_PLUGINS = {}
+
+# A job file holds one plugin invocation per line:
+#   {"id": "s0", "argv": ["nest-json", "nest", "protocols/s0-boot", "-o", "build/s0.json"]}
+#   {"id": "agg", "argv": [...], "depends_on": ["s0", "s1"]}
+# "id" defaults to the line number. A job starts once everything it depends on
+# succeeded; when a dependency fails, the job is skipped. Results are written
+# to stdout as NDJSON lines in completion order, so plugin output goes to stderr.
+
+def setup_arguments(parser):
+  parser.add_argument("job_file", metavar="jobs.jsonl", help="one JSON object per line: argv, optional id and depends_on")
+  parser.add_argument("-j", "--jobs", dest="workers", type=int, default=0, help="workers (0 = all cores)")
+  parser.add_argument("--processes", action="store_true", help="run jobs in worker processes instead of threads")
+  parser.add_argument("--fail-fast", action="store_true", help="start no further jobs after the first failure")
+
+def read_jobs(path, plugins):
+  """Parse and check a job file; returns jobs in file order, raises ValueError naming the bad line."""
+  jobs, ids = [], {}
+  with open(path, encoding=config["encoding"]) as fh:
+    for lineno, line in enumerate(fh, 1):
+      if not line.strip() or line.lstrip().startswith("#"):
+        continue
+      try:
+        spec = loads(line)
+      except ValueError as e:
+        raise ValueError(f"line {lineno}: {e}") from None
+      argv = spec.get("argv") if isinstance(spec, dict) else None
+      if not (isinstance(argv, list) and argv and all(isinstance(a, str) for a in argv)):
+        raise ValueError(f"line {lineno}: argv must be a non-empty list of strings")
+      if argv[0].replace("-", "_") not in plugins:
+        raise ValueError(f"line {lineno}: unknown plugin {argv[0]!r}")
+      job_id = spec.get("id", lineno)
+      if not isinstance(job_id, (str, int)) or isinstance(job_id, bool) or job_id in ids:
+        raise ValueError(f"line {lineno}: id must be a unique string or integer")
+      deps = spec.get("depends_on") or []
+      deps = [deps] if isinstance(deps, (str, int)) else deps
+      ids[job_id] = lineno
+      jobs.append({"id": job_id, "argv": argv, "depends_on": list(deps), "line": lineno})
+  for job in jobs:
+    for dep in job["depends_on"]:
+      if dep not in ids:
+        raise ValueError(f"line {job['line']}: depends_on names unknown job {dep!r}")
+  check_cycles(jobs)
+  return jobs
+
+def check_cycles(jobs):
+  by_id = {job["id"]: job for job in jobs}
+  color = dict.fromkeys(by_id, 0)
+  for root in by_id:
+    if color[root]:
+      continue
+    color[root], todo = 1, [(root, iter(by_id[root]["depends_on"]))]
+    while todo:
+      node, deps = todo[-1]
+      dep = next(deps, None)
+      if dep is None:
+        color[node] = 2
+        todo.pop()
+      elif color[dep] == 1:
+        raise ValueError(f"line {by_id[dep]['line']}: dependency cycle through job {dep!r}")
+      elif not color[dep]:
+        color[dep] = 1
+        todo.append((dep, iter(by_id[dep]["depends_on"])))
+
+def envelope(cmd, result):
+  """main.py's envelope around a plugin's result dict; a reported error or error status marks it failed."""
+  if result.get("status") == "error" or result.get("error"):
+    result.update({"plugin": cmd, "status": "error"})
+    result["err"] = str(result.get("err") or result.get("error") or result.get("message") or "failed")
+  else:
+    result.update({"plugin": cmd, "status": "success"})
+  return result
+
+def run_job(job_id, argv):
+  """One plugin invocation in main.py's envelope, with plugin-reported errors marked as such."""
+  cmd, t0 = argv[0], time.perf_counter()
+  plugin = _PLUGINS[cmd.replace("-", "_")]
+  parser = argparse.ArgumentParser(prog=cmd)
+  plugin.setup_arguments(parser)
+  try:
+    args = parser.parse_args(argv[1:])
+  except SystemExit:
+    return {"id": job_id, "status": "error", "err": f"invalid arguments for {cmd}", "plugin": cmd}
+  try:
+    with span(cmd, "plugin", job=job_id):
+      result = plugin.run_task(args, {})
+  except Exception as e:
+    result = {"status": "error", "err": str(e)}
+  result = envelope(cmd, result if isinstance(result, dict) else {"result": result})
+  result["ms"] = round((time.perf_counter() - t0) * 1000, 1)
+  return {"id": job_id, **result}
+
+def _init_worker(loader):
+  # forked workers inherit the parent's plugins; spawned ones load their own
+  if not _PLUGINS:
+    _PLUGINS.update(loader())
+  sys.stdout = sys.stderr
+
+def emit(out, line):
+  try:
+    text = dumps(line, ensure_ascii=False)
+  except (TypeError, ValueError) as e:
+    text = dumps({"id": line["id"], "status": "error", "err": f"unserializable result: {e}", "plugin": line.get("plugin")})
+  out.write(text + "\n")
+  out.flush()
+
+def run_batch(jobs, plugins, loader, workers=0, processes=False, fail_fast=False, out=None):
+  """Run jobs as their dependencies allow, streaming one result line each; returns the tally."""
+  out = out or sys.stdout
+  _PLUGINS.update(plugins)
+  argv = {job["id"]: job["argv"] for job in jobs}
+  waiting = {job["id"]: set(job["depends_on"]) for job in jobs}
+  dependents = {job["id"]: [] for job in jobs}
+  for job in jobs:
+    for dep in job["depends_on"]:
+      dependents[dep].append(job["id"])
+  tally = {"jobs": len(jobs), "success": 0, "error": 0, "skipped": 0}
+  running, stopped = {}, False
+
+  def skip(job_id, reason):
+    tally["skipped"] += 1
+    emit(out, {"id": job_id, "status": "error", "err": reason, "plugin": argv[job_id][0], "skipped": True})
+    for child in dependents[job_id]:
+      if waiting.pop(child, None) is not None:
+        skip(child, f"dependency {job_id!r} did not run")
+
+  def launch():
+    for job_id in [j for j, deps in waiting.items() if not deps]:
+      del waiting[job_id]
+      running[pool.submit(run_job, job_id, argv[job_id])] = job_id
+
+  workers = workers or os.cpu_count() or 1
+  if processes:
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(loader,))
+  else:
+    pool = ThreadPoolExecutor(max_workers=workers)
+  stdout, sys.stdout = sys.stdout, sys.stderr
+  try:
+    with pool:
+      launch()
+      while running:
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+          job_id = running.pop(future)
+          try:
+            result = future.result()
+          except Exception as e:
+            result = {"id": job_id, "status": "error", "err": str(e), "plugin": argv[job_id][0]}
+          emit(out, result)
+          if result.get("status") == "error":
+            tally["error"] += 1
+            stopped = stopped or fail_fast
+            for child in dependents[job_id]:
+              if waiting.pop(child, None) is not None:
+                skip(child, f"dependency {job_id!r} failed")
+          else:
+            tally["success"] += 1
+            for child in dependents[job_id]:
+              waiting.get(child, set()).discard(job_id)
+        if not stopped:
+          launch()
+          continue
+        # queued jobs that no worker picked up yet are withdrawn too
+        for future in [f for f in running if f.cancel()]:
+          skip(running.pop(future), "batch stopped after a failure (--fail-fast)")
+        for job_id in list(waiting):
+          if waiting.pop(job_id, None) is not None:
+            skip(job_id, "batch stopped after a failure (--fail-fast)")
+  finally:
+    sys.stdout = stdout
+  return tally
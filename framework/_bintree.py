@@ -0,0 +1,253 @@
+# --- framework/_bintree.py | checksum: auto ---
+import struct
+from collections.abc import Mapping
+from pathlib import Path
+
+from _codec import COMPACT, dumps, is_object, loads
+
+config = {
+  "magic": b"AITREE1\n",
+  "suffix": ".bjson",
+  "encoding": "utf-8",
+}
+# one tag byte per value; OBJ and RAW carry their byte size so readers can skip them
+NULL, FALSE, TRUE, INT, FLOAT, STR, OBJ, RAW = range(8)
+_DOUBLE = struct.Struct(">d")
+
+# Layout: magic, key table (varint size, then a compact JSON array of keys),
+# root value. Maps of maps (stage documents, aggregates, kernel sections) are
+# OBJ nodes: varint count, varint body size, then (varint key id, value) pairs.
+# Everything below them - protocols, rule tables, lists - is a RAW node holding
+# compact JSON, which the C parser decodes far faster than Python could walk
+# tagged bytes, and which build-session copies out without decoding at all.
+
+def _varint(out, n):
+  while n > 0x7F:
+    out.append((n & 0x7F) | 0x80)
+    n >>= 7
+  out.append(n)
+
+def _read_varint(buf, pos):
+  n = shift = 0
+  while True:
+    b = buf[pos]
+    pos += 1
+    n |= (b & 0x7F) << shift
+    if b < 0x80:
+      return n, pos
+    shift += 7
+
+def structural(obj):
+  """Whether a mapping is kept as an OBJ node: non-empty and mostly mapping values, or holding lazy ones."""
+  maps = 0
+  for v in obj.values():
+    if type(v) is LazyObject:
+      return True
+    if is_object(v):
+      maps += 1
+  return 2 * maps > len(obj) > 0
+
+class _Encoder:
+  def __init__(self):
+    self.keys = {}
+
+  def key(self, k):
+    if not isinstance(k, str):
+      k = dumps(k)
+    kid = self.keys.get(k)
+    if kid is None:
+      kid = self.keys[k] = len(self.keys)
+    return kid
+
+  def value(self, v, out):
+    # exact type checks: isinstance against LazyObject, an ABC subclass, is slow; subclasses go RAW
+    t = type(v)
+    if t is LazyObject:
+      self.splice(v, out)
+    elif v is None:
+      out.append(NULL)
+    elif v is True or v is False:
+      out.append(TRUE if v else FALSE)
+    elif t is int:
+      out.append(INT)
+      _varint(out, v << 1 if v >= 0 else ((-v) << 1) - 1)
+    elif t is float:
+      out.append(FLOAT)
+      out += _DOUBLE.pack(v)
+    elif t is str:
+      b = v.encode(config["encoding"], "surrogatepass")
+      out.append(STR)
+      _varint(out, len(b))
+      out += b
+    elif is_object(v) and structural(v):
+      body = bytearray()
+      for k, x in v.items():
+        _varint(body, self.key(k))
+        self.value(x, body)
+      out.append(OBJ)
+      _varint(out, len(v))
+      _varint(out, len(body))
+      out += body
+    else:
+      try:
+        b = dumps(v, separators=COMPACT, ensure_ascii=False).encode(config["encoding"])
+      except UnicodeEncodeError:
+        # lone surrogates: escaped, so RAW payloads stay valid UTF-8 for any parser
+        b = dumps(v, separators=COMPACT).encode(config["encoding"])
+      out.append(RAW)
+      _varint(out, len(b))
+      out += b
+
+  def splice(self, obj, out):
+    """Re-emit a LazyObject: children never accessed are copied as bytes, only keys are re-interned."""
+    body, buf = bytearray(), obj.buf
+    for k, pos in obj.index.items():
+      _varint(body, self.key(k))
+      if k in obj.cache:
+        self.value(obj.cache[k], body)
+      elif buf[pos] == OBJ:
+        self.splice(LazyObject(buf, pos, obj.names), body)
+      else:
+        body += buf[pos : _skip(buf, pos)]
+    out.append(OBJ)
+    _varint(out, len(obj.index))
+    _varint(out, len(body))
+    out += body
+
+def encode(obj):
+  """Binary tree encoding of a JSON-compatible value."""
+  enc, body = _Encoder(), bytearray()
+  enc.value(obj, body)
+  table = dumps(list(enc.keys), separators=COMPACT).encode(config["encoding"])
+  out = bytearray(config["magic"])
+  _varint(out, len(table))
+  return bytes(out + table + body)
+
+def is_tree(data):
+  return data[: len(config["magic"])] == config["magic"]
+
+def _header(data):
+  if not is_tree(data):
+    raise ValueError("not a binary tree document (bad magic)")
+  size, pos = _read_varint(data, len(config["magic"]))
+  return loads(data[pos : pos + size]), pos + size
+
+def _decode(buf, pos, keys):
+  """(value, end) for the value at pos, decoded in full."""
+  tag = buf[pos]
+  pos += 1
+  if tag == RAW:
+    n, pos = _read_varint(buf, pos)
+    return loads(buf[pos : pos + n]), pos + n
+  if tag == OBJ:
+    n, pos = _read_varint(buf, pos)
+    _, pos = _read_varint(buf, pos)
+    names, values, raws, slots = [], [], [], []
+    for _ in range(n):
+      kid, pos = _read_varint(buf, pos)
+      names.append(keys[kid])
+      if buf[pos] == RAW:
+        size, start = _read_varint(buf, pos + 1)
+        pos = start + size
+        slots.append(len(values))
+        raws.append(buf[start:pos])
+        values.append(None)
+      else:
+        value, pos = _decode(buf, pos, keys)
+        values.append(value)
+    if raws:
+      # one parser call for all RAW children instead of one per child
+      for i, value in zip(slots, loads(b"[" + b",".join(raws) + b"]")):
+        values[i] = value
+    return dict(zip(names, values)), pos
+  if tag == STR:
+    n, pos = _read_varint(buf, pos)
+    return buf[pos : pos + n].decode(config["encoding"], "surrogatepass"), pos + n
+  if tag == INT:
+    n, pos = _read_varint(buf, pos)
+    return (n >> 1) ^ -(n & 1), pos
+  if tag == FLOAT:
+    return _DOUBLE.unpack_from(buf, pos)[0], pos + _DOUBLE.size
+  if tag in (NULL, FALSE, TRUE):
+    return (None, False, True)[tag], pos
+  raise ValueError(f"bad tag {tag} at offset {pos - 1}")
+
+def _skip(buf, pos):
+  tag = buf[pos]
+  pos += 1
+  if tag in (STR, RAW):
+    n, pos = _read_varint(buf, pos)
+    return pos + n
+  if tag == OBJ:
+    _, pos = _read_varint(buf, pos)
+    n, pos = _read_varint(buf, pos)
+    return pos + n
+  if tag == INT:
+    return _read_varint(buf, pos)[1]
+  return pos + _DOUBLE.size if tag == FLOAT else pos
+
+class LazyObject(Mapping):
+  """Read-only view of an OBJ node; children are decoded on first access and cached.
+
+  raw(key) returns a RAW child's compact JSON text without decoding it.
+  """
+
+  def __init__(self, buf, pos, keys):
+    self.buf, self.pos, self.names, self.cache = buf, pos, keys, {}
+    n, pos = _read_varint(buf, pos + 1)
+    size, pos = _read_varint(buf, pos)
+    self.index, end = {}, pos + size
+    while pos < end:
+      kid, pos = _read_varint(buf, pos)
+      self.index[keys[kid]] = pos
+      pos = _skip(buf, pos)
+
+  def __getitem__(self, key):
+    if key not in self.cache:
+      pos = self.index[key]
+      if self.buf[pos] == OBJ:
+        self.cache[key] = LazyObject(self.buf, pos, self.names)
+      else:
+        self.cache[key] = _decode(self.buf, pos, self.names)[0]
+    return self.cache[key]
+
+  def __iter__(self):
+    return iter(self.index)
+
+  def __len__(self):
+    return len(self.index)
+
+  def __contains__(self, key):
+    return key in self.index
+
+  def raw(self, key):
+    pos = self.index[key]
+    if self.buf[pos] != RAW:
+      return None
+    n, pos = _read_varint(self.buf, pos + 1)
+    return self.buf[pos : pos + n].decode(config["encoding"], "surrogatepass")
+
+  def materialize(self):
+    return _decode(self.buf, self.pos, self.names)[0]
+
+def decode(data, lazy=False):
+  """Decode a binary tree document; lazy=True returns a LazyObject for an object root."""
+  keys, pos = _header(data)
+  if lazy and data[pos] == OBJ:
+    return LazyObject(data, pos, keys)
+  value, end = _decode(data, pos, keys)
+  if end != len(data):
+    raise ValueError(f"trailing data at offset {end}")
+  return value
+
+def wants_tree(path):
+  return Path(path).suffix == config["suffix"]
+
+def read(path, lazy=False):
+  return decode(Path(path).read_bytes(), lazy)
+
+def write(path, obj):
+  """Write obj in the binary format; returns the number of bytes written."""
+  data = encode(obj)
+  Path(path).write_bytes(data)
+  return len(data)
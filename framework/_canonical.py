@@ -0,0 +1,84 @@
+# --- framework/_canonical.py | checksum: auto ---
+import hashlib
+import json
+import math
+import unicodedata
+from collections.abc import Mapping
+
+config = {"form": "NFC", "algo": "sha256", "chunk_depth": 2, "max_int": 2**53}
+ENCODER = json.JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+
+def text(s):
+  return s if s.isascii() else unicodedata.normalize(config["form"], s)
+
+def number(x):
+  """Integral floats collapse to int (1.0 -> 1, -0.0 -> 0); NaN/inf are rejected."""
+  if not math.isfinite(x):
+    raise ValueError(f"non-finite number {x!r} has no canonical JSON form")
+  return int(x) if x.is_integer() and abs(x) < config["max_int"] else x
+
+def keys(d):
+  """Sorted (normalised key, original key) pairs; NFC collisions are an error."""
+  if all(type(k) is str and k.isascii() for k in d):
+    return [(k, k) for k in sorted(d)]
+  pairs = sorted((text(str(k)), k) for k in d)
+  for i in range(1, len(pairs)):
+    if pairs[i][0] == pairs[i - 1][0]:
+      raise ValueError(f"duplicate key after normalization: {pairs[i][0]!r}")
+  return pairs
+
+def normalize(obj):
+  """Return a canonical copy: NFC strings, sorted keys, normalised numbers."""
+  t = type(obj)
+  if t is str:
+    return obj if obj.isascii() else unicodedata.normalize(config["form"], obj)
+  if t is dict:
+    return {n: normalize(obj[k]) for n, k in keys(obj)}
+  if t is list or t is tuple:
+    return [normalize(v) for v in obj]
+  if t is float:
+    return number(obj)
+  if t is int or t is bool or obj is None:
+    return obj
+  for base in (str, dict, list, float):
+    if isinstance(obj, base) and not isinstance(obj, bool):
+      return normalize(base(obj))
+  if isinstance(obj, Mapping):
+    return normalize(dict(obj))
+  return obj
+
+def dumps(obj, indent=None):
+  """Canonical serialization; compact by default, indent only changes whitespace."""
+  if indent is None:
+    return ENCODER.encode(normalize(obj))
+  return json.dumps(normalize(obj), ensure_ascii=False, allow_nan=False, indent=indent)
+
+def iter_chunks(obj, depth=config["chunk_depth"]):
+  """Yield the compact canonical form in pieces.
+
+  Containers down to `depth` are emitted piecewise; anything deeper is encoded
+  in one C-speed call, so peak memory tracks the largest subtree, not the tree.
+  """
+  if depth <= 0 or not isinstance(obj, (dict, list, tuple)):
+    yield ENCODER.encode(normalize(obj))
+    return
+  if isinstance(obj, dict):
+    yield "{"
+    for i, (n, k) in enumerate(keys(obj)):
+      yield ("," if i else "") + ENCODER.encode(n) + ":"
+      yield from iter_chunks(obj[k], depth - 1)
+    yield "}"
+    return
+  yield "["
+  for i, v in enumerate(obj):
+    if i:
+      yield ","
+    yield from iter_chunks(v, depth - 1)
+  yield "]"
+
+def digest(obj, algo=config["algo"]):
+  """Hash of dumps(obj) computed without materialising the full string."""
+  h = hashlib.new(algo)
+  for chunk in iter_chunks(obj):
+    h.update(chunk.encode("utf-8"))
+  return h.hexdigest()
@@ -0,0 +1,131 @@
+# --- framework/_chunkstore.py | checksum: auto ---
+import hashlib
+import lzma
+import os
+import struct
+import tempfile
+import zlib
+from pathlib import Path
+
+from _codec import dumps, loads
+
+config = {
+  "magic": b"AIPACK1\n",
+  "trailer": struct.Struct("<Q"),
+  "avg_bits": 12,
+  "min_chunk": 1024,
+  "max_chunk": 16384,
+  "encoding": "utf-8",
+}
+LZMA_FILTERS = [{"id": lzma.FILTER_LZMA2, "preset": 9, "dict_size": 1 << 16}]
+CODECS = {
+  "none": (lambda b: b, lambda b: b),
+  "zlib": (lambda b: zlib.compress(b, 9), zlib.decompress),
+  "lzma": (
+    lambda b: lzma.compress(b, format=lzma.FORMAT_RAW, filters=LZMA_FILTERS),
+    lambda b: lzma.decompress(b, format=lzma.FORMAT_RAW, filters=LZMA_FILTERS),
+  ),
+}
+GEAR = [
+  int.from_bytes(hashlib.blake2b(bytes([i]), digest_size=8).digest(), "little")
+  for i in range(256)
+]
+
+def chunk_bounds(data, bits=None):
+  """Yield (start, end) content-defined chunk boundaries using a gear rolling hash."""
+  bits = bits or config["avg_bits"]
+  lo, hi, n = config["min_chunk"], config["max_chunk"], len(data)
+  mask = ((1 << bits) - 1) << (64 - bits)
+  full, gear, start = (1 << 64) - 1, GEAR, 0
+  while start < n:
+    end = min(start + hi, n)
+    if end - start <= lo:
+      yield start, end
+      break
+    h, i = 0, start + lo
+    while i < end:
+      h = ((h << 1) + gear[data[i]]) & full
+      i += 1
+      if not h & mask:
+        end = i
+        break
+    yield start, end
+    start = end
+
+def chunk_id(chunk):
+  """Content address of a raw chunk."""
+  return hashlib.blake2b(chunk, digest_size=16).hexdigest()
+
+def write_pack(path, entries, algo="sha256", codec="zlib"):
+  """Write (rel, hash, txt) entries as a deduplicated, compressed chunk store."""
+  compress = CODECS[codec][0]
+  path = Path(path)
+  files, chunks, refs, raw = {}, {}, 0, 0
+  with tempfile.NamedTemporaryFile("wb", dir=path.parent, delete=False) as fh:
+    fh.write(config["magic"])
+    pos = len(config["magic"])
+    for rel, h, txt in entries:
+      data = txt.encode(config["encoding"])
+      ids = []
+      for s, e in chunk_bounds(data):
+        cid = chunk_id(data[s:e])
+        if cid not in chunks:
+          blob = compress(data[s:e])
+          fh.write(blob)
+          chunks[cid] = [pos, len(blob)]
+          pos += len(blob)
+        ids.append(cid)
+      refs += len(ids)
+      raw += len(data)
+      files[rel] = {"hash": h, "length": len(data), "chunks": ids}
+    index = {"version": 1, "codec": codec, "algo": algo, "files": files, "chunks": chunks}
+    fh.write(dumps(index, separators=(",", ":")).encode(config["encoding"]))
+    fh.write(config["trailer"].pack(pos))
+    temp_name = fh.name
+  os.replace(temp_name, path)
+  return {"chunks": len(chunks), "refs": refs, "raw_bytes": raw, "stored_bytes": pos}
+
+def is_pack(path):
+  """True when the file starts with the chunk-store magic."""
+  with open(path, "rb") as fh:
+    return fh.read(len(config["magic"])) == config["magic"]
+
+class PackReader:
+  """Loads a chunk store index once and rebuilds files from chunks on demand."""
+
+  def __init__(self, path):
+    self.path = Path(path)
+    self.fh = open(self.path, "rb")
+    size = self.fh.seek(0, 2)
+    tail = config["trailer"].size
+    self.fh.seek(size - tail)
+    (start,) = config["trailer"].unpack(self.fh.read(tail))
+    self.fh.seek(start)
+    self.index = loads(self.fh.read(size - tail - start))
+    self.decompress = CODECS[self.index["codec"]][1]
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    self.close()
+
+  def close(self):
+    self.fh.close()
+
+  @property
+  def files(self):
+    return self.index["files"]
+
+  def read_bytes(self, rel):
+    """Reassemble one file's raw bytes from its chunk list."""
+    out = []
+    for cid in self.files[rel]["chunks"]:
+      off, size = self.index["chunks"][cid]
+      self.fh.seek(off)
+      out.append(self.decompress(self.fh.read(size)))
+    return b"".join(out)
+
+  def read(self, rel):
+    """Reassemble one file as text."""
+    return self.read_bytes(rel).decode(config["encoding"])
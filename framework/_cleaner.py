@@ -0,0 +1,180 @@
+# --- framework/_cleaner.py | checksum: auto ---
+import itertools
+import re
+
+config = {
+  "preserve": ("#!", "# ---", "# [start", "# [end"),
+  "blank_before": ("def ", "class ", "import ", "from ", "@"),
+  "imports": ("import ", "from "),
+  "chunk_lines": 1024,
+}
+_SPECIAL = re.compile(r"[#'\"\\]")
+_CLOSE = {q: re.compile(r"\\(?:.|$)|" + re.escape(q)) for q in ("'", '"', "'''", '"""')}
+
+class LineCleaner:
+  """Line state machine: drops full-line comments and collapses blank lines.
+
+  Cleaned lines (without newlines) collect in out as they are decided.
+  """
+
+  def __init__(self, preserve, blank_before, import_gap, drop_trailing_commas=False):
+    self.preserve = tuple(k.lower() for k in preserve)
+    self.blank_before = tuple(blank_before)
+    self.import_gap, self.drop_trailing_commas = import_gap, drop_trailing_commas
+    self.prev_b = self.pending_blank = self.last_import = False
+    self.out, self.scanner, self.held = [], StringScanner(), None
+
+  def feed(self, line, in_string_start=False, in_string_end=False):
+    """Consume one physical line (no newline)."""
+    out, s = self.out, line.strip()
+    if self.pending_blank:
+      self.pending_blank = False
+      if s.startswith(self.blank_before) and not self.prev_b:
+        out.append("")
+        self.prev_b = True
+    if in_string_start:
+      out.append(line if in_string_end else line.rstrip())
+      self.prev_b = self.last_import = False
+      return
+    if s.startswith("#") and not s.lower().startswith(self.preserve):
+      return
+    if not s:
+      self.pending_blank = True
+      return
+    is_import = s.startswith(config["imports"])
+    if self.import_gap and not is_import and self.last_import and not self.prev_b:
+      out.append("")
+      self.prev_b = True
+    out.append(line if in_string_end else line.rstrip())
+    self.prev_b, self.last_import = False, is_import
+
+  def push(self, lines):
+    """Feed raw lines; each is held until the next one shows whether its trailing comma goes."""
+    scanner, special, feed = self.scanner, _SPECIAL.search, self.feed
+    if not self.drop_trailing_commas:
+      # nothing to look ahead for: feed each line as it is scanned
+      out, plain = self.out, not self.import_gap
+      for raw in lines:
+        line = raw.rstrip("\r\n")
+        if scanner.quote is None and not special(line):
+          # code with no string or comment, and no blank line before it: kept as is
+          if plain and not self.pending_blank and line.strip():
+            out.append(line.rstrip())
+            self.prev_b = False
+          else:
+            feed(line)
+        else:
+          start_in, end_in, _ = scanner.line(line)
+          feed(line, start_in, end_in)
+      return
+    held = self.held
+    for raw in lines:
+      line = raw.rstrip("\r\n")
+      # most lines hold no quote, hash or backslash and need no scanning
+      if scanner.quote is None and not special(line):
+        start_in = end_in = False
+        code_end = len(line)
+      else:
+        start_in, end_in, code_end = scanner.line(line)
+      if held is not None:
+        if held[3] and not start_in and line.lstrip().startswith(("}", "]")):
+          feed(held[0][:-1], held[1], held[2])
+        else:
+          feed(held[0], held[1], held[2])
+      comma = not end_in and code_end == len(line) and line.endswith(",")
+      held = (line, start_in, end_in, comma)
+    self.held = held
+
+  def close(self):
+    if self.held is not None:
+      self.feed(*self.held[:3])
+      self.held = None
+
+class StringScanner:
+  """Which lines start or end inside a string, and where code ends on each; lines go in one at a time.
+
+  It follows string and comment state the way tokenize does, but only lines
+  holding a quote, a hash or a backslash are looked at, and those with a regex
+  hop from one such character to the next.
+  """
+
+  def __init__(self):
+    self.quote = None
+
+  def line(self, text):
+    """(starts in a string, ends in a string, column where a comment starts or len(text))."""
+    start_in, quote, pos, n = self.quote is not None, self.quote, 0, len(text)
+    if quote is None and not _SPECIAL.search(text):
+      return False, False, n
+    while pos < n:
+      if quote:
+        m = _CLOSE[quote].search(text, pos)
+        if m is None:
+          pos = n
+        elif m.group() == "\\":
+          # backslash-newline: the string goes on to the next line
+          self.quote = quote
+          return start_in, True, n
+        elif m.group()[0] == "\\":
+          pos = m.end()
+        else:
+          quote, pos = None, m.end()
+        continue
+      m = _SPECIAL.search(text, pos)
+      if m is None:
+        break
+      ch, at = m.group(), m.start()
+      if ch == "#":
+        self.quote = None
+        return start_in, False, at
+      if ch == "\\":
+        pos = at + 2
+      else:
+        quote = ch * 3 if text.startswith(ch * 3, at) else ch
+        pos = at + len(quote)
+    # a one-quote string cannot run past its line; tokenize would stop here too
+    self.quote = quote if quote and len(quote) == 3 else None
+    return start_in, self.quote is not None, n
+
+def clean_lines(
+  readline,
+  preserve=config["preserve"],
+  blank_before=config["blank_before"],
+  import_gap=False,
+  drop_trailing_commas=False,
+):
+  """Yield cleaned lines from a readline stream, string-aware and linear.
+
+  Lines are read and cleaned chunk_lines at a time, so a file can be cleaned
+  while it is still being read. Comment markers and blank lines inside strings
+  are kept verbatim, and only a real comma ending a line is dropped before a
+  closing bracket.
+  """
+  cleaner = LineCleaner(preserve, blank_before, import_gap, drop_trailing_commas)
+  lines, out = iter(readline, ""), cleaner.out
+  while True:
+    chunk = list(itertools.islice(lines, config["chunk_lines"]))
+    if not chunk:
+      break
+    cleaner.push(chunk)
+    yield from [o + "\n" for o in out]
+    out.clear()
+  cleaner.close()
+  yield from [o + "\n" for o in out]
+
+def clean_text(
+  txt,
+  preserve=config["preserve"],
+  blank_before=config["blank_before"],
+  import_gap=False,
+  drop_trailing_commas=False,
+):
+  """Clean a whole string; returns content with exactly one trailing newline."""
+  cleaner = LineCleaner(preserve, blank_before, import_gap, drop_trailing_commas)
+  # lines as readline gives them: split on "\n" only, no empty line after a final newline
+  lines = txt.split("\n")
+  if lines[-1] == "":
+    lines.pop()
+  cleaner.push(lines)
+  cleaner.close()
+  return "\n".join(cleaner.out).rstrip() + "\n"
@@ -0,0 +1,168 @@
+# --- framework/_codec.py | checksum: auto ---
+import importlib
+import json
+import os
+import re
+from collections.abc import Mapping
+
+config = {
+  "order": ("orjson", "stdlib"),
+  "env": "JSON_BACKEND",
+  "encoding": "utf-8",
+}
+COMPACT = (",", ":")
+PRETTY = (",", ": ")
+# orjson and float.__repr__ pick the same digits but format exponents and
+# numbers below 1e-4 differently (1e16 vs 1e+16, 0.00001 vs 1e-05)
+# two simple scans are much faster than one alternation over megabytes of output
+_EXP_HINT = re.compile(rb"e[-\d]")
+_SMALL_HINT = re.compile(rb"0\.0000")
+_DIGITS = frozenset(b"0123456789")
+_SCALARS = frozenset((str, int, float, bool, list, tuple, type(None)))
+_FLOAT_TOKEN = re.compile(rb'"(?:[^"\\]|\\.)*"|(?<![\w.])-?\d+(?:\.\d+)?(?:e-?\d+)?')
+_NUMBER = frozenset(b"0123456789.-+e")
+_BEFORE = frozenset(b":[, \n")
+_AFTER = frozenset(b",]} \n")
+
+def _python_float(m):
+  """Re-render one float token as float.__repr__ would; strings and other numbers pass through."""
+  tok = m.group(0)
+  if tok[:1] == b'"' or not (b"e" in tok or tok.lstrip(b"-").startswith(b"0.0000")):
+    return tok
+  return repr(float(tok)).encode()
+
+# ensure_ascii escapes everything outside space..tilde; orjson already escapes controls
+_NON_ASCII = re.compile(r"[^\x00-\x7e]")
+
+def _ascii_escape(m):
+  """\\uXXXX escape as json.dumps(ensure_ascii=True) writes it, with surrogate pairs above the BMP."""
+  c = ord(m.group())
+  if c < 0x10000:
+    return "\\u%04x" % c
+  c -= 0x10000
+  return "\\u%04x\\u%04x" % (0xD800 | (c >> 10), 0xDC00 | (c & 0x3FF))
+
+def _delimited(out, pos):
+  """Whether the hint at pos sits in a token bounded like a JSON number (it may still be inside a string)."""
+  start, end = pos, pos
+  while start > 0 and out[start - 1] in _NUMBER:
+    start -= 1
+  while end < len(out) and out[end] in _NUMBER:
+    end += 1
+  return (start == 0 or out[start - 1] in _BEFORE) and (end == len(out) or out[end] in _AFTER)
+
+def python_floats(out):
+  """Make orjson output match json.dumps float formatting; cheap unless a candidate number is present."""
+  exps = (m.start() for m in _EXP_HINT.finditer(out) if m.start() and out[m.start() - 1] in _DIGITS)
+  smalls = (m.start() for m in _SMALL_HINT.finditer(out))
+  if any(_delimited(out, pos) for hits in (exps, smalls) for pos in hits):
+    return _FLOAT_TOKEN.sub(_python_float, out)
+  return out
+
+def _default(obj):
+  """Read-only Mapping views (lazy binary tree objects, compact records) serialize as objects."""
+  if isinstance(obj, Mapping):
+    # compact records build their dict in one call, as namedtuples do
+    asdict = getattr(obj, "_asdict", None)
+    return asdict() if asdict else dict(obj)
+  raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def is_object(v):
+  """Whether v serializes as a JSON object: a dict or a read-only Mapping view; exact checks first, the ABC check is slow."""
+  t = type(v)
+  return t is dict or (t not in _SCALARS and isinstance(v, Mapping))
+
+class StdlibBackend:
+  name = "stdlib"
+
+  def loads(self, text):
+    return json.loads(text)
+
+  def dumps(self, obj, indent=None, separators=None, sort_keys=False, ensure_ascii=True):
+    return json.dumps(
+      obj, indent=indent, separators=separators, sort_keys=sort_keys, ensure_ascii=ensure_ascii,
+      default=_default,
+    )
+
+class OrjsonBackend(StdlibBackend):
+  """orjson where its output matches json.dumps byte for byte, the stdlib everywhere else.
+
+  orjson covers indent=2 and compact separators; floats and ensure_ascii escapes
+  are rewritten to json.dumps form afterwards. Other layouts, non-str keys and
+  integers beyond 64 bits go to the stdlib. Non-finite floats, which are not
+  valid JSON, are written as null.
+  """
+
+  name = "orjson"
+
+  def __init__(self):
+    self.mod = importlib.import_module("orjson")
+
+  def loads(self, text):
+    try:
+      return self.mod.loads(text)
+    except self.mod.JSONDecodeError:
+      # NaN/Infinity, lone surrogates; genuine errors re-raise with stdlib positions.
+      # Integers past 64 bits do not raise: orjson reads them as floats.
+      return json.loads(text)
+
+  def dumps(self, obj, indent=None, separators=None, sort_keys=False, ensure_ascii=True):
+    opt = self.mod.OPT_SORT_KEYS if sort_keys else 0
+    if indent is None:
+      native = separators == COMPACT
+    else:
+      native = indent == 2 and separators in (None, PRETTY)
+      opt |= self.mod.OPT_INDENT_2
+    out = None
+    if native:
+      try:
+        out = self.mod.dumps(obj, default=_default, option=opt)
+      except TypeError:
+        out = None
+    if out is None:
+      return super().dumps(obj, indent, separators, sort_keys, ensure_ascii)
+    text = python_floats(out).decode(config["encoding"])
+    if ensure_ascii and (not out.isascii() or b"\x7f" in out):
+      # non-ASCII bytes only occur inside strings, so escaping them in place is safe
+      text = _NON_ASCII.sub(_ascii_escape, text)
+    return text
+
+BACKENDS = {"orjson": OrjsonBackend, "stdlib": StdlibBackend}
+_backend = None
+
+def available():
+  """Names of the backends importable here, fastest first."""
+  names = []
+  for name in config["order"]:
+    try:
+      BACKENDS[name]()
+      names.append(name)
+    except ImportError:
+      pass
+  return names
+
+def use(name=None):
+  """Select a backend by name; None picks $JSON_BACKEND or the fastest available."""
+  global _backend
+  name = name or os.environ.get(config["env"]) or available()[0]
+  if name not in BACKENDS:
+    raise ValueError(f"unknown JSON backend: {name} (choose from {', '.join(BACKENDS)})")
+  _backend = BACKENDS[name]()
+  return _backend
+
+def backend():
+  return (_backend or use()).name
+
+def loads(text):
+  """json.loads with the active backend; accepts str or bytes."""
+  return (_backend or use()).loads(text)
+
+def dumps(obj, indent=None, separators=None, sort_keys=False, ensure_ascii=True):
+  """json.dumps with the same defaults and output, using the active backend."""
+  return (_backend or use()).dumps(obj, indent, separators, sort_keys, ensure_ascii)
+
+def load(fh):
+  return loads(fh.read())
+
+def dump(obj, fh, **kw):
+  fh.write(dumps(obj, **kw))
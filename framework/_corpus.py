@@ -0,0 +1,87 @@
+# --- framework/_corpus.py | checksum: auto ---
+import json
+import random
+import shutil
+from pathlib import Path
+
+from _protograph import config as graph_config
+
+config = {
+  "llms": ("chatgpt", "gemini", "perplexity"),
+  "stages": 6,
+  "rules": 80,  # at least; raised to the highest rule orchestration.json references
+  "encoding": "utf-8",
+}
+WORDS = (
+  "audit intake design review trace verify merge route score index gate align "
+  "extract classify resolve report draft refine stage state rule signal map"
+).split()
+ROOT = Path(__file__).resolve().parent.parent
+
+def sentence(rng, lo=4, hi=10):
+  return " ".join(rng.choice(WORDS) for _ in range(rng.randint(lo, hi)))
+
+def make_protocol(rng, key, stage, earlier):
+  """One protocol conforming to protocols/protocol-schema.json."""
+  proto = {
+    "key": key,
+    "stage": stage,
+    "dependencies": rng.sample(earlier, min(len(earlier), rng.randint(0, 3))),
+    "steps": [sentence(rng) for _ in range(rng.randint(3, 8))],
+    "outputs": [sentence(rng, 1, 3) for _ in range(rng.randint(1, 3))],
+    "rules": [f"R{rng.randint(1, config['rules']):02d}" for _ in range(rng.randint(0, 4))],
+  }
+  if rng.random() < 0.3:
+    proto["config"] = {"threshold": round(rng.random(), 3), "mode": rng.choice(WORDS), "limit": None}
+  return proto
+
+def dirty(rng, text):
+  """Apply one of the defects _jsonrepair fixes: comment, trailing comma, quotes, BOM."""
+  kind = rng.choice(("comment", "trailing-comma", "quotes", "bom"))
+  if kind == "comment":
+    return "// generated\n" + text.replace('",\n', '", /* note */\n', 1)
+  if kind == "trailing-comma":
+    return text.replace('"\n  ]', '",\n  ]', 1)
+  if kind == "quotes":
+    return text.replace('"key"', "'key'", 1)
+  return "\ufeff" + text
+
+def generate(root, n, dirty_ratio=0.05, seed=0):
+  """Write n protocols as protocols/s{stage}-{llm}/{key}.json plus per-LLM kernels inputs.
+
+  Also writes protocol-schema.json, rules.json, rules-{llm}.json and
+  orchestration-{llm}.json so build.sh-style pipelines have every input.
+  Returns {"protocols", "files", "bytes", "dirty"}.
+  """
+  rng = random.Random(seed)
+  root = Path(root)
+  protocols = root / "protocols"
+  if protocols.exists():
+    shutil.rmtree(protocols)
+  protocols.mkdir(parents=True)
+  enc = config["encoding"]
+  shutil.copy(ROOT / "protocols" / "protocol-schema.json", protocols / "protocol-schema.json")
+  orchestration = (ROOT / "protocols" / "orchestration.json").read_text(encoding=enc)
+  # every rule the orchestration names must exist, or the kernels fail verify-json --graph
+  referenced = [int(r[1:]) for r in graph_config["rule_ref"].findall(orchestration)]
+  rules = {f"R{i:02d}": sentence(rng, 6, 14) for i in range(1, max([config["rules"], *referenced]) + 1)}
+  (protocols / "rules.json").write_text(json.dumps({"rules": rules}, indent=2), encoding=enc)
+  for llm in config["llms"]:
+    (protocols / f"rules-{llm}.json").write_text(json.dumps({"rules": rules}, indent=2), encoding=enc)
+    (protocols / f"orchestration-{llm}.json").write_text(orchestration, encoding=enc)
+  earlier = {llm: [] for llm in config["llms"]}
+  size = broken = 0
+  for i in range(n):
+    llm = config["llms"][i % len(config["llms"])]
+    stage = min(config["stages"] - 1, i * config["stages"] // max(n, 1))
+    key = f"p{i:06d}-{rng.choice(WORDS)}"
+    proto = make_protocol(rng, key, stage, earlier[llm][-50:])
+    earlier[llm].append(key)
+    text = json.dumps(proto, indent=2)
+    if rng.random() < dirty_ratio:
+      text, broken = dirty(rng, text), broken + 1
+    folder = protocols / f"s{stage}-{llm}"
+    folder.mkdir(exist_ok=True)
+    (folder / f"{key}.json").write_text(text, encoding=enc)
+    size += len(text.encode(enc))
+  return {"protocols": n, "files": n + 2 + 2 * len(config["llms"]), "bytes": size, "dirty": broken}
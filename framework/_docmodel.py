@@ -0,0 +1,121 @@
+# --- framework/_docmodel.py | checksum: auto ---
+import sys
+from collections import Counter
+from collections.abc import Mapping
+from pathlib import Path
+
+import _bintree
+from _codec import loads as parse
+
+config = {
+  "min_records": 32,
+  "intern_max": 16,
+}
+_LAYOUTS = {}
+
+# Kernels repeat the same handful of key layouts (stage, dependencies, steps,
+# outputs, rules) thousands of times, and the same short strings (step words,
+# rule IDs, dependency names) tens of thousands of times. Compacting a parsed
+# document interns those strings and turns dicts of a frequent layout into
+# Records: a tuple of values, the keys held once by a class per layout.
+# Records are read-only Mappings whose lists are tuples; _codec serializes
+# them as objects, byte for byte like the dicts they replace.
+
+class Record(Mapping):
+  """Read-only protocol record; a subclass per key layout holds the keys, instances only the values."""
+
+  __slots__ = ("_values",)
+  _keys = ()
+  _index = {}
+
+  def __getitem__(self, key):
+    return self._values[self._index[key]]
+
+  def __iter__(self):
+    return iter(self._keys)
+
+  def __len__(self):
+    return len(self._keys)
+
+  def __contains__(self, key):
+    return key in self._index
+
+  def values(self):
+    return self._values
+
+  def _asdict(self):
+    return dict(zip(self._keys, self._values))
+
+  def __repr__(self):
+    return f"Record({self._asdict()!r})"
+
+  def __reduce__(self):
+    # layout classes are made at run time and cannot be pickled by name
+    return dict, (list(zip(self._keys, self._values)),)
+
+def layout(keys):
+  """The Record class for a key tuple, shared by every document in the process."""
+  cls = _LAYOUTS.get(keys)
+  if cls is None:
+    keys = tuple(sys.intern(k) for k in keys)
+    index = {k: i for i, k in enumerate(keys)}
+    cls = _LAYOUTS[keys] = type("Record", (Record,), {"__slots__": (), "_keys": keys, "_index": index})
+  return cls
+
+def record(cls, values):
+  obj = cls.__new__(cls)
+  obj._values = tuple([tuple(v) if type(v) is list else v for v in values])
+  return obj
+
+class Interner:
+  """Compacts parsed documents; layouts are counted as they are met, across every document compacted.
+
+  A layout becomes a Record class once min_records dicts of it were seen, so
+  the first few of each stay dicts; per-file protocols qualify like kernels do.
+  """
+
+  def __init__(self, min_records=config["min_records"], intern_max=config["intern_max"]):
+    self.min_records, self.intern_max = min_records, intern_max
+    self.layouts = Counter()
+
+  def compact(self, node):
+    """node with short strings interned and frequent layouts as Records.
+
+    Dicts and lists are updated in place: the parsed input is consumed.
+    """
+    # strings are handled inline: a call per string would cost more than the parse
+    t, limit, intern = type(node), self.intern_max, sys.intern
+    if t is list:
+      for i, v in enumerate(node):
+        t = type(v)
+        if t is str:
+          if len(v) <= limit:
+            node[i] = intern(v)
+        elif t is dict or t is list:
+          node[i] = self.compact(v)
+      return node
+    if t is not dict:
+      return intern(node) if t is str and len(node) <= limit else node
+    for k, v in node.items():
+      # same keys, new values: the dict does not resize while it is iterated
+      t = type(v)
+      if t is str:
+        if len(v) <= limit:
+          node[k] = intern(v)
+      elif t is dict or t is list:
+        node[k] = self.compact(v)
+    if not node:
+      return node
+    keys = tuple(node)
+    seen = self.layouts[keys] = self.layouts[keys] + 1
+    return record(layout(keys), node.values()) if seen >= self.min_records else node
+
+def loads(data, interner=None):
+  """Parse JSON text or bytes into the compact model."""
+  return (interner or Interner()).compact(parse(data))
+
+def load(path, interner=None):
+  """Read a JSON or binary tree file into the compact model."""
+  data = Path(path).read_bytes()
+  doc = _bintree.decode(data) if _bintree.is_tree(data) else parse(data)
+  return (interner or Interner()).compact(doc)
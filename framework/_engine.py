@@ -0,0 +1,278 @@
+# --- framework/_engine.py | checksum: auto ---
+import asyncio
+import importlib
+import time
+import zlib
+
+from _codec import is_object
+from _trace import count
+from _validators import Gate, Stage, alias, witness
+from _validators import config as validator_config
+
+config = {
+  "end": "end",
+  "gates_key": "gates",
+  "loopback": "v-loopback-limit",
+  "loop_field": "iterations",
+  "max_loopbacks": 3,
+  "concurrency": 64,
+  "timeout": 30.0,
+  "quantiles": (50, 95, 99),
+}
+
+# The stage graph of orchestration.json, run for many sessions at once:
+#   s0-boot -> s1-ingest -> s2-reason (retry: s2-reason) -> s3-verify -> s4-output -> s5-learn -> end
+# Each stage asks the backend for a record, then checks it against the stage's
+# validators (_validators) and gates: a gate passes when the record's "gates"
+# object marks it true. A failed stage with a retry target loops back there
+# while v-loopback-limit (iterations>max) allows; otherwise the session halts
+# with the validators, rules and gates that stopped it.
+
+class Backend:
+  """What the engine asks for each stage's output; a model client overrides complete().
+
+  session is {"id", "input", "outputs"}: outputs holds the accepted record of
+  every stage run so far, which is what a prompt for the next stage builds on.
+  """
+
+  async def complete(self, session, stage, spec, attempt):
+    raise NotImplementedError
+
+  async def close(self):
+    pass
+
+class StubBackend(Backend):
+  """Deterministic local model: the same seed, session, stage and attempt always give the same record.
+
+  Clean records pass every validator and gate of their stage; with fail_rate a
+  record is spoiled to fire one validator or close one gate, chosen by the seed.
+  """
+
+  def __init__(self, gate, seed=0, fail_rate=0.0, latency=0.0, jitter=0.0):
+    self.gate, self.seed, self.fail_rate = gate, seed, fail_rate
+    self.latency, self.jitter = latency, jitter
+    self.gates_key = alias(gate.orchestration, config["gates_key"])
+    self.clean, self.faults = {}, {}
+
+  def plan(self, stage, spec):
+    """(clean record fields, possible faults) for a stage, worked out once."""
+    if stage not in self.clean:
+      fields, faults, context = {}, [], self.gate.context
+      for vname, v in self.gate.stage(stage).specs:
+        fields.update(witness(v["condition"], False, context) or {})
+        fire = witness(v["condition"], True, context)
+        if fire is not None and config["loop_field"] not in fire:
+          faults.append(fire)
+      # the engine owns the loop count; a model does not report it
+      fields.pop(config["loop_field"], None)
+      gates = spec.get(self.gates_key, [])
+      faults.extend({config["gates_key"]: {**dict.fromkeys(gates, True), g: False}} for g in gates)
+      fields[config["gates_key"]] = dict.fromkeys(gates, True)
+      self.clean[stage], self.faults[stage] = fields, faults
+    return self.clean[stage], self.faults[stage]
+
+  async def complete(self, session, stage, spec, attempt):
+    # a checksum of the call is the stub's only randomness: seeding a Random per call costs more than the engine
+    key = f"{self.seed}|{session['id']}|{stage}|{attempt}"
+    u = zlib.crc32(key.encode()) / 0x100000000
+    fields, faults = self.plan(stage, spec)
+    record = {**fields, "stage": stage, "output": key}
+    if faults and u < self.fail_rate:
+      record.update(faults[int(u / self.fail_rate * len(faults))])
+    if self.latency:
+      await asyncio.sleep(self.latency * (1 + self.jitter * (u * 7919 % 1)))
+    else:
+      await asyncio.sleep(0)
+    return record
+
+BACKENDS = {"stub": StubBackend}
+
+def load_backend(name):
+  """A backend factory by registered name or "module:attribute"; factories take the Gate first."""
+  if name in BACKENDS:
+    return BACKENDS[name]
+  module, sep, attr = name.partition(":")
+  if not sep:
+    raise ValueError(f"unknown backend {name!r}: use one of {sorted(BACKENDS)} or module:attribute")
+  return getattr(importlib.import_module(module), attr)
+
+def make_gate(orchestration, context=None, allow=()):
+  """The orchestration's validators with the engine's context defaults (max loopbacks)."""
+  return Gate(orchestration, {"max": config["max_loopbacks"], **(context or {})}, allow)
+
+def quantiles(values):
+  if not values:
+    return {}
+  ordered, n = sorted(values), len(values)
+  out = {f"p{q}": round(ordered[min(n - 1, n * q // 100)], 3) for q in config["quantiles"]}
+  out["mean"] = round(sum(ordered) / n, 3)
+  out["max"] = round(ordered[-1], 3)
+  return out
+
+class Engine:
+  """Runs sessions through the stage graph, up to concurrency of them at a time on one event loop."""
+
+  def __init__(self, gate, backend, concurrency=config["concurrency"], timeout=config["timeout"]):
+    orchestration, self.gate = gate.orchestration, gate
+    self.stages = orchestration.get(validator_config["stages_key"], {})
+    self.backend, self.concurrency, self.timeout = backend, concurrency, timeout
+    self.gates_key = alias(orchestration, config["gates_key"])
+    self.start = self.entry()
+    spec = self.gate.specs.get(config["loopback"])
+    self.loopback = Stage("loopback", [(config["loopback"], spec)], self.gate.context) if spec else None
+    # per stage: compiled validators and the gates its record has to open
+    self.checks = {name: (gate.require(name), spec.get(self.gates_key, [])) for name, spec in self.stages.items()}
+    self.backend_ms = {name: [] for name in self.stages}
+    self.validate_us = {name: [] for name in self.stages}
+    self.failed, self.retried = dict.fromkeys(self.stages, 0), dict.fromkeys(self.stages, 0)
+    self.halts = {}
+
+  def entry(self):
+    """The stage no other stage leads to; the next chain from it must reach end without a loop."""
+    targets = {s.get("next") for s in self.stages.values()}
+    targets |= {s.get("retry") for name, s in self.stages.items() if s.get("retry") != name}
+    roots = [name for name in self.stages if name not in targets]
+    if len(roots) != 1:
+      raise ValueError(f"stage graph needs exactly one entry stage, found {roots}")
+    seen, stage = set(), roots[0]
+    while stage != config["end"]:
+      if stage not in self.stages:
+        raise ValueError(f"stage graph names unknown stage {stage!r}")
+      if stage in seen:
+        raise ValueError(f"stage graph loops through {stage!r} without a retry")
+      seen.add(stage)
+      retry = self.stages[stage].get("retry")
+      if retry is not None and retry not in self.stages:
+        raise ValueError(f"stage {stage!r} retries unknown stage {retry!r}")
+      stage = self.stages[stage].get("next", config["end"])
+    return roots[0]
+
+  def exhausted(self, iterations):
+    if self.loopback is None:
+      return iterations > self.gate.context.get("max", config["max_loopbacks"])
+    return bool(self.loopback.halted({config["loop_field"]: iterations}))
+
+  async def step(self, session, stage, spec, attempt):
+    """(record, error) from the backend, timed against the stage."""
+    t0 = time.perf_counter()
+    try:
+      call = self.backend.complete(session, stage, spec, attempt)
+      if not self.timeout:
+        record = await call
+      elif hasattr(asyncio, "timeout"):
+        # 3.11+: a deadline on this task instead of a task per call, as wait_for makes
+        async with asyncio.timeout(self.timeout):
+          record = await call
+      else:
+        record = await asyncio.wait_for(call, self.timeout)
+      err = None
+    except asyncio.TimeoutError:
+      record, err = None, f"backend timed out after {self.timeout}s"
+    except Exception as e:
+      record, err = None, f"{type(e).__name__}: {e}"
+    self.backend_ms[stage].append((time.perf_counter() - t0) * 1000)
+    return record, err
+
+  def check(self, stage, record, iterations):
+    """(halting validators, closed gates) for a stage's record."""
+    t0 = time.perf_counter()
+    compiled, gates = self.checks[stage]
+    if type(record) is dict:
+      # the engine owns the loop count that v-loopback-limit reads
+      record.setdefault(config["loop_field"], iterations)
+    hits = compiled.halted(record)
+    if hits:
+      halt = validator_config["halt"]
+      hits = [h for h in hits if h["action"] == halt]
+    opened = record.get(config["gates_key"]) if is_object(record) else None
+    opened = opened if is_object(opened) else {}
+    closed = [g for g in gates if not opened.get(g)]
+    self.validate_us[stage].append((time.perf_counter() - t0) * 1e6)
+    return hits, closed
+
+  async def run_session(self, session):
+    """Result of one session: completed, or halted/error at the stage that stopped it."""
+    t0, stage, retries, steps = time.perf_counter(), self.start, 0, 0
+    session.setdefault("outputs", {})
+    while stage != config["end"]:
+      spec = self.stages[stage]
+      steps += 1
+      count("engine.stage_calls")
+      record, err = await self.step(session, stage, spec, retries)
+      hits, closed = self.check(stage, record, retries) if err is None else ([], [])
+      if not (err or hits or closed):
+        session["outputs"][stage] = record
+        stage = spec.get("next", config["end"])
+        continue
+      self.failed[stage] += 1
+      retry = spec.get("retry")
+      if retry and not self.exhausted(retries + 1):
+        retries += 1
+        self.retried[stage] += 1
+        count("engine.retries")
+        stage = retry
+        continue
+      for h in hits:
+        self.halts[h["validator"]] = self.halts.get(h["validator"], 0) + 1
+      for g in closed:
+        self.halts[g] = self.halts.get(g, 0) + 1
+      result = {"id": session["id"], "status": "error" if err else "halted", "stage": stage}
+      if hits:
+        result["validators"] = [h["validator"] for h in hits]
+        result["rules"] = sorted({r for h in hits for r in h["rules"]})
+      if closed:
+        result["gates"] = closed
+      if err:
+        result["err"] = err
+      elif any(h.get("error") for h in hits):
+        result["err"] = "; ".join(h["error"] for h in hits if h.get("error"))
+      result.update({"steps": steps, "retries": retries, "ms": round((time.perf_counter() - t0) * 1000, 3)})
+      return result
+    return {"id": session["id"], "status": "completed", "steps": steps, "retries": retries, "ms": round((time.perf_counter() - t0) * 1000, 3)}
+
+  async def run(self, sessions, on_result=None):
+    """Run every session; on_result sees each result as it finishes. Returns the summary."""
+    tally = {"total": 0, "completed": 0, "halted": 0, "error": 0}
+    session_ms, pending = [], iter(sessions)
+
+    async def worker():
+      # workers share one iterator, so sessions are read only as fast as they run
+      for session in pending:
+        result = await self.run_session(session)
+        tally["total"] += 1
+        tally[result["status"]] += 1
+        session_ms.append(result["ms"])
+        if on_result:
+          on_result(result)
+
+    t0 = time.perf_counter()
+    try:
+      await asyncio.gather(*(worker() for _ in range(max(1, self.concurrency))))
+    finally:
+      await self.backend.close()
+    return self.summary(tally, session_ms, time.perf_counter() - t0)
+
+  def summary(self, tally, session_ms, seconds):
+    calls = sum(map(len, self.backend_ms.values()))
+    stages = {}
+    for name in self.stages:
+      if self.backend_ms[name]:
+        stages[name] = {
+          "calls": len(self.backend_ms[name]),
+          "failed": self.failed[name],
+          "retried": self.retried[name],
+          "backend_ms": quantiles(self.backend_ms[name]),
+          "validate_us": quantiles(self.validate_us[name]),
+        }
+    return {
+      "sessions": tally,
+      "retries": sum(self.retried.values()),
+      "seconds": round(seconds, 4),
+      "sessions_per_s": round(tally["total"] / seconds, 1) if seconds else None,
+      "stage_calls_per_s": round(calls / seconds, 1) if seconds else None,
+      "session_ms": quantiles(session_ms),
+      "stages": stages,
+      "halts": dict(sorted(self.halts.items(), key=lambda kv: -kv[1])),
+      "unknown_validators": {n: c.unknown for n, (c, _) in self.checks.items() if c.unknown},
+      "unresolved": {n: c.unresolved() for n, (c, _) in self.checks.items() if c.misses},
+    }
@@ -0,0 +1,210 @@
+# --- framework/_fastschema.py | checksum: auto ---
+import re
+
+config = {
+  "ignored": {
+    "$schema",
+    "$id",
+    "$comment",
+    "$defs",
+    "definitions",
+    "title",
+    "description",
+    "default",
+    "examples",
+  },
+  "handled": {
+    "type",
+    "enum",
+    "required",
+    "properties",
+    "additionalProperties",
+    "items",
+    "pattern",
+    "minimum",
+    "maximum",
+    "minLength",
+    "maxLength",
+    "$ref",
+  },
+  "artifact_tag": "# fastschema validator | schema-digest: ",
+}
+TYPE_CHECKS = {
+  "object": "isinstance({v}, dict)",
+  "array": "isinstance({v}, list)",
+  "string": "isinstance({v}, str)",
+  "boolean": "isinstance({v}, bool)",
+  "null": "{v} is None",
+  "number": "(isinstance({v}, (int, float)) and not isinstance({v}, bool))",
+  "integer": (
+    "((isinstance({v}, int) and not isinstance({v}, bool))"
+    " or (isinstance({v}, float) and {v}.is_integer()))"
+  ),
+}
+NUMBER = "isinstance({v}, (int, float)) and not isinstance({v}, bool)"
+
+class Unsupported(Exception):
+  """Raised when a schema uses keywords the generator does not cover."""
+
+class SourceBuilder:
+  """Emits straight-line Python that checks one JSON Schema subset.
+
+  Local "#/..." references become one helper function each, so shared and
+  recursive definitions are compiled once.
+  """
+
+  def __init__(self, root=None):
+    self.lines, self.consts, self.n = [], [], 0
+    self.root, self.refs, self.funcs = root, {}, []
+
+  def emit(self, depth, text):
+    self.lines.append("  " * depth + text)
+
+  def var(self):
+    self.n += 1
+    return f"v{self.n}"
+
+  def const(self, expr):
+    """Hoist a constant expression to module level and return its name."""
+    self.consts.append(expr)
+    return f"C{len(self.consts) - 1}"
+
+  def ref(self, pointer):
+    """Name of the helper checking the schema at a local JSON pointer, built on first use."""
+    if pointer in self.refs:
+      return self.refs[pointer]
+    if not pointer.startswith("#"):
+      raise Unsupported(f"$ref {pointer}")
+    target = self.root
+    for token in filter(None, pointer[1:].split("/")):
+      token = token.replace("~1", "/").replace("~0", "~")
+      if not isinstance(target, dict) or token not in target:
+        raise Unsupported(f"$ref {pointer}")
+      target = target[token]
+    name = self.refs[pointer] = f"ref{len(self.refs)}"
+    outer, self.lines = self.lines, [f"def {name}(x):"]
+    self.node(target, "x", 1)
+    self.lines.append("  return None")
+    self.funcs.append(self.lines)
+    self.lines = outer
+    return name
+
+  def fail(self, depth, fmt, *args):
+    """Return an error message formatted at runtime with the given expressions."""
+    self.emit(depth, f"return {fmt!r} % ({', '.join(args)},)")
+
+  def node(self, schema, v, depth):
+    if schema is True or schema == {}:
+      return
+    if schema is False:
+      self.fail(depth, "False schema does not allow %r", v)
+      return
+    if not isinstance(schema, dict):
+      raise Unsupported(repr(schema))
+    unknown = set(schema) - config["handled"] - config["ignored"]
+    if unknown:
+      raise Unsupported(", ".join(sorted(unknown)))
+    if "$ref" in schema:
+      err = self.var()
+      self.emit(depth, f"{err} = {self.ref(schema['$ref'])}({v})")
+      self.emit(depth, f"if {err} is not None:")
+      self.emit(depth + 1, f"return {err}")
+    if "type" in schema:
+      types = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+      if any(t not in TYPE_CHECKS for t in types):
+        raise Unsupported(f"type {types}")
+      cond = " or ".join(TYPE_CHECKS[t].format(v=v) for t in types)
+      self.emit(depth, f"if not ({cond}):")
+      names = ", ".join(repr(t) for t in types).replace("%", "%%")
+      self.fail(depth + 1, f"%r is not of type {names}", v)
+    if "enum" in schema:
+      c = self.const(repr(list(schema["enum"])))
+      self.emit(depth, f"if {v} not in {c}:")
+      self.fail(depth + 1, "%r is not one of %r", v, c)
+    bounds = (
+      ("minimum", "<", "less than the minimum"),
+      ("maximum", ">", "greater than the maximum"),
+    )
+    for kw, op, word in bounds:
+      if kw in schema:
+        c = self.const(repr(schema[kw]))
+        self.emit(depth, f"if {NUMBER.format(v=v)} and {v} {op} {c}:")
+        self.fail(depth + 1, f"%r is {word} of %r", v, c)
+    for kw, op, word in (("minLength", "<", "too short"), ("maxLength", ">", "too long")):
+      if kw in schema:
+        c = self.const(repr(schema[kw]))
+        self.emit(depth, f"if isinstance({v}, str) and len({v}) {op} {c}:")
+        self.fail(depth + 1, f"%r is {word}", v)
+    if "pattern" in schema:
+      re.compile(schema["pattern"])
+      c = self.const(f"re.compile({schema['pattern']!r})")
+      self.emit(depth, f"if isinstance({v}, str) and not {c}.search({v}):")
+      self.fail(depth + 1, "%r does not match %r", v, f"{c}.pattern")
+    self.object_keywords(schema, v, depth)
+    if "items" in schema:
+      item = self.var()
+      self.emit(depth, f"if isinstance({v}, list):")
+      self.emit(depth + 1, f"for {item} in {v}:")
+      self.node(schema["items"], item, depth + 2)
+
+  def object_keywords(self, schema, v, depth):
+    props = schema.get("properties", {})
+    extra = schema.get("additionalProperties", True)
+    if not (props or "required" in schema or extra is not True):
+      return
+    self.emit(depth, f"if isinstance({v}, dict):")
+    for key in schema.get("required", []):
+      self.emit(depth + 1, f"if {key!r} not in {v}:")
+      self.fail(depth + 2, "%r is a required property", repr(key))
+    for key, sub in props.items():
+      if sub is True or sub == {}:
+        continue
+      child = self.var()
+      self.emit(depth + 1, f"if {key!r} in {v}:")
+      self.emit(depth + 2, f"{child} = {v}[{key!r}]")
+      self.node(sub, child, depth + 2)
+    if extra is True:
+      return
+    allowed = self.const(f"frozenset({sorted(props)!r})")
+    k = self.var()
+    if extra is False:
+      self.emit(depth + 1, f"{k} = [k for k in {v} if k not in {allowed}]")
+      self.emit(depth + 1, f"if {k}:")
+      self.emit(
+        depth + 2,
+        f"return 'Additional properties are not allowed (%s %s unexpected)' % "
+        f"(', '.join(repr(k) for k in {k}), 'was' if len({k}) == 1 else 'were')",
+      )
+      return
+    child = self.var()
+    self.emit(depth + 1, f"for {k}, {child} in {v}.items():")
+    self.emit(depth + 2, f"if {k} not in {allowed}:")
+    self.node(extra, child, depth + 3)
+
+def generate_source(schema, name="check"):
+  """Return module source defining `name(instance) -> Optional[str]`, or None."""
+  builder = SourceBuilder(schema)
+  try:
+    builder.node(schema, "x", 1)
+  except (Unsupported, re.error, RecursionError):
+    return None
+  consts = [f"C{i} = {expr}" for i, expr in enumerate(builder.consts)]
+  helpers = [line for func in builder.funcs for line in (*func, "", "")]
+  body = [f"def {name}(x):", *builder.lines, "  return None"]
+  return "\n".join(["import re", "", *consts, "", "", *helpers, *body, ""])
+
+def compile_source(src, name="check"):
+  """Turn generated module source back into a callable."""
+  ns = {}
+  exec(compile(src, "<fastschema>", "exec"), ns)
+  return ns[name]
+
+def build_checker(schema):
+  """Compile a fast checker for the schema, or None when it needs full jsonschema."""
+  src = generate_source(schema)
+  return compile_source(src) if src else None
+
+def artifact_source(schema, digest):
+  """Standalone validator module for the schema, tagged with its digest; None if unsupported."""
+  src = generate_source(schema)
+  return f"{config['artifact_tag']}{digest}\n{src}" if src else None
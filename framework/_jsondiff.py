@@ -0,0 +1,296 @@
+# --- framework/_jsondiff.py | checksum: auto ---
+import difflib
+
+from _canonical import digest, dumps
+from _codec import dumps as codec_dumps
+from _codec import loads
+
+config = {"match_key": "key", "lcs_cells": 4_000_000}
+SEP = (",", ":")
+
+def escape(token):
+  return str(token).replace("~", "~0").replace("/", "~1")
+
+def unescape(token):
+  return token.replace("~1", "/").replace("~0", "~")
+
+def pointer(path):
+  return "".join("/" + escape(p) for p in path)
+
+def parse_pointer(ptr):
+  if not ptr:
+    return []
+  if not ptr.startswith("/"):
+    raise ValueError(f"bad JSON pointer {ptr!r}")
+  return [unescape(t) for t in ptr[1:].split("/")]
+
+def identities(items, keyed):
+  """Comparable identity per array item: the match key for keyed arrays, else content."""
+  if keyed:
+    return [item[config["match_key"]] for item in items]
+  return [dumps(item) for item in items]
+
+def is_keyed(a, b):
+  k = config["match_key"]
+  both = a + b
+  if not both or not all(isinstance(x, dict) and isinstance(x.get(k), str) for x in both):
+    return False
+  return len({x[k] for x in a}) == len(a) and len({x[k] for x in b}) == len(b)
+
+def lcs_opcodes(x, y):
+  """difflib-style opcodes from an exact LCS; trims common ends, caps the DP table."""
+  lo, n, m = 0, len(x), len(y)
+  while lo < n and lo < m and x[lo] == y[lo]:
+    lo += 1
+  hi = 0
+  while hi < n - lo and hi < m - lo and x[n - 1 - hi] == y[m - 1 - hi]:
+    hi += 1
+  xs, ys = x[lo:n - hi], y[lo:m - hi]
+  if len(xs) * len(ys) > config["lcs_cells"]:
+    mid = difflib.SequenceMatcher(None, xs, ys, autojunk=False).get_opcodes()
+  else:
+    mid = _lcs_table_opcodes(xs, ys)
+  ops = [("equal", 0, lo, 0, lo)] if lo else []
+  ops += [(t, i1 + lo, i2 + lo, j1 + lo, j2 + lo) for t, i1, i2, j1, j2 in mid]
+  if hi:
+    ops.append(("equal", n - hi, n, m - hi, m))
+  return ops
+
+def _lcs_table_opcodes(x, y):
+  n, m = len(x), len(y)
+  if not n or not m:
+    return [("delete" if n else "insert", 0, n, 0, m)] if n or m else []
+  table = [[0] * (m + 1) for _ in range(n + 1)]
+  for i in range(n - 1, -1, -1):
+    row, below = table[i], table[i + 1]
+    for j in range(m - 1, -1, -1):
+      row[j] = below[j + 1] + 1 if x[i] == y[j] else max(below[j], row[j + 1])
+  steps, i, j = [], 0, 0
+  while i < n or j < m:
+    if i < n and j < m and x[i] == y[j]:
+      steps.append(("equal", i, j))
+      i, j = i + 1, j + 1
+    elif j < m and (i == n or table[i][j + 1] >= table[i + 1][j]):
+      steps.append(("insert", i, j))
+      j += 1
+    else:
+      steps.append(("delete", i, j))
+      i += 1
+  ops = []
+  for tag, i, j in steps:
+    di, dj = (tag != "insert"), (tag != "delete")
+    kind = "equal" if tag == "equal" else "change"
+    if ops and ops[-1][0] == kind:
+      t, i1, i2, j1, j2 = ops[-1]
+      ops[-1] = (t, i1, i2 + di, j1, j2 + dj)
+    else:
+      ops.append((kind, i, i + di, j, j + dj))
+  out = []
+  for t, i1, i2, j1, j2 in ops:
+    if t == "change":
+      t = "replace" if i2 > i1 and j2 > j1 else "delete" if i2 > i1 else "insert"
+    out.append((t, i1, i2, j1, j2))
+  return out
+
+def diff(a, b, ignore=()):
+  """Minimal structural patch turning a into b, as RFC 6902 operations.
+
+  Objects diff key by key. Arrays align by LCS, matching objects on their
+  `key` field when every item has a unique one. Indices refer to the array
+  as it stands when each operation applies, so ops must apply in order.
+  """
+  ops = []
+  _diff(a, b, [], ops, frozenset(ignore))
+  return ops
+
+def _diff(a, b, path, ops, ignore):
+  if type(a) is not type(b) or not isinstance(a, (dict, list)):
+    if a != b or type(a) is not type(b):
+      ops.append({"op": "replace", "path": pointer(path), "value": b})
+    return
+  if isinstance(a, dict):
+    for k in a:
+      if k not in b and k not in ignore:
+        ops.append({"op": "remove", "path": pointer(path + [k])})
+    for k, v in b.items():
+      if k in ignore:
+        continue
+      if k not in a:
+        ops.append({"op": "add", "path": pointer(path + [k]), "value": v})
+      else:
+        _diff(a[k], v, path + [k], ops, ignore)
+    return
+  if is_keyed(a, b):
+    _diff_keyed(a, b, path, ops, ignore)
+    return
+  pos = 0
+  for tag, i1, i2, j1, j2 in lcs_opcodes(identities(a, False), identities(b, False)):
+    if tag == "equal":
+      pos += i2 - i1
+      continue
+    paired = min(i2 - i1, j2 - j1) if tag == "replace" else 0
+    for off in range(paired):
+      x, y = a[i1 + off], b[j1 + off]
+      if isinstance(x, (dict, list)) and type(x) is type(y):
+        _diff(x, y, path + [pos], ops, ignore)
+      else:
+        ops.append({"op": "replace", "path": pointer(path + [pos]), "value": y})
+      pos += 1
+    for _ in range(i1 + paired, i2):
+      ops.append({"op": "remove", "path": pointer(path + [pos])})
+    for j in range(j1 + paired, j2):
+      ops.append({"op": "add", "path": pointer(path + [pos]), "value": b[j]})
+      pos += 1
+
+class _Slots:
+  """Live positions over slots known up front: a Fenwick tree of occupied slots."""
+
+  def __init__(self, size, filled):
+    self.tree = [0] * (size + 1)
+    for s in filled:
+      self.put(s, 1)
+
+  def put(self, slot, delta):
+    slot += 1
+    while slot < len(self.tree):
+      self.tree[slot] += delta
+      slot += slot & -slot
+
+  def before(self, slot):
+    """How many occupied slots sort before `slot`, i.e. its list index."""
+    n = 0
+    while slot > 0:
+      n += self.tree[slot]
+      slot -= slot & -slot
+    return n
+
+def _diff_keyed(a, b, path, ops, ignore):
+  """Keyed arrays: the LCS of keys stays put, other surviving items move, then recurse.
+
+  A moved or added item lands right after the previous target item, so every
+  place an item can occupy is known before any op is emitted: its original
+  index, or (index of the last kept item before it in the target, rank in
+  the run of movers after that item). Ordering those places once turns each
+  list index into a prefix count instead of a scan of the working list.
+  """
+  ka, kb = identities(a, True), identities(b, True)
+  old, wanted, stay = dict(zip(ka, a)), set(kb), set()
+  for tag, i1, i2, _, _ in lcs_opcodes(ka, kb):
+    if tag == "equal":
+      stay.update(ka[i1:i2])
+  origin = {k: (i, 0) for i, k in enumerate(ka)}
+  target, anchor, rank = {}, -1, 0
+  for k in kb:
+    if k in stay:
+      anchor, rank = origin[k][0], 0
+    else:
+      rank += 1
+      target[k] = (anchor, rank)
+  order = {place: s for s, place in enumerate(sorted([*origin.values(), *target.values()]))}
+  at = {k: order[place] for k, place in origin.items()}
+  live = _Slots(len(order), at.values())
+  for k in ka:
+    if k not in wanted:
+      ops.append({"op": "remove", "path": pointer(path + [live.before(at[k])])})
+      live.put(at.pop(k), -1)
+  for k, item in zip(kb, b):
+    if k not in stay:
+      i = live.before(at[k]) if k in old else None
+      if i is not None:
+        live.put(at[k], -1)
+      at[k] = order[target[k]]
+      t = live.before(at[k])
+      live.put(at[k], 1)
+      if i is None:
+        ops.append({"op": "add", "path": pointer(path + [t]), "value": item})
+      elif i != t:
+        ops.append({"op": "move", "from": pointer(path + [i]), "path": pointer(path + [t])})
+    if k in old:
+      _diff(old[k], item, path + [live.before(at[k])], ops, ignore)
+
+def resolve(doc, tokens):
+  """Walk to the container holding the last pointer token."""
+  node = doc
+  for t in tokens[:-1]:
+    node = node[int(t)] if isinstance(node, list) else node[t]
+  return node
+
+def apply_op(doc, op):
+  """Apply one RFC 6902 add/remove/replace/move/test op; returns the (possibly new) root."""
+  kind, tokens = op["op"], parse_pointer(op["path"])
+  if kind not in ("add", "remove", "replace", "move", "test"):
+    raise ValueError(f"unsupported op {kind!r}")
+  if kind == "move":
+    src = parse_pointer(op["from"])
+    holder = resolve(doc, src)
+    value = holder.pop(int(src[-1])) if isinstance(holder, list) else holder.pop(src[-1])
+    return apply_op(doc, {"op": "add", "path": op["path"], "value": value})
+  if not tokens:
+    if kind == "test":
+      if doc != op["value"]:
+        raise ValueError("test failed at document root")
+      return doc
+    if kind in ("add", "replace"):
+      return op["value"]
+    raise ValueError("cannot remove the document root")
+  parent, last = resolve(doc, tokens), tokens[-1]
+  if isinstance(parent, list):
+    idx = len(parent) if last == "-" else int(last)
+    if kind == "add":
+      parent.insert(idx, op["value"])
+    elif kind == "remove":
+      del parent[idx]
+    elif kind == "replace":
+      parent[idx] = op["value"]
+    elif kind == "test" and parent[idx] != op["value"]:
+      raise ValueError(f"test failed at {op['path']}")
+  else:
+    if kind in ("add", "replace"):
+      if kind == "replace" and last not in parent:
+        raise KeyError(op["path"])
+      parent[last] = op["value"]
+    elif kind == "remove":
+      del parent[last]
+    elif kind == "test" and parent.get(last) != op["value"]:
+      raise ValueError(f"test failed at {op['path']}")
+  return doc
+
+def write_patch(fh, a, b, ops, exact=True):
+  """Write an NDJSON delta: a header line with base/target digests, then one op per line.
+
+  Pass exact=False when keys were ignored; the target digest is then omitted.
+  """
+  header = {"patch": 1, "base": digest(a), "target": digest(b) if exact else None, "ops": len(ops)}
+  fh.write(codec_dumps(header, separators=SEP) + "\n")
+  for op in ops:
+    fh.write(codec_dumps(op, separators=SEP, ensure_ascii=False) + "\n")
+
+def read_patch(fh):
+  """Yield (header, ops) lazily from an NDJSON delta; plain JSON arrays are accepted too."""
+  first = fh.readline()
+  stripped = first.lstrip()
+  if stripped.startswith("["):
+    return {}, iter(loads(first + fh.read()))
+  header = loads(first) if stripped else {}
+  if "op" in header:
+    return {}, _chain([header], fh)
+  return header, _chain([], fh)
+
+def _chain(head, fh):
+  yield from head
+  for line in fh:
+    if line.strip():
+      yield loads(line)
+
+def apply_patch(doc, fh, verify=True):
+  """Stream ops from a delta file into doc; checks base/target digests when present."""
+  header, ops = read_patch(fh)
+  if verify and header.get("base") and digest(doc) != header["base"]:
+    raise ValueError("patch base digest does not match the input document")
+  count = 0
+  for op in ops:
+    doc = apply_op(doc, op)
+    count += 1
+  if verify and header.get("target") and digest(doc) != header["target"]:
+    raise ValueError("patched document does not match the target digest")
+  return doc, count
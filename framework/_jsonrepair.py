@@ -0,0 +1,141 @@
+# --- framework/_jsonrepair.py | checksum: auto ---
+import re
+
+STR_D = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+STR_S = re.compile(r"'(?:[^'\\]|\\.)*'", re.DOTALL)
+SPACE = re.compile(r"\s+")
+NUMBER = re.compile(r"-?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+WORD = re.compile(r"[^\W\d]\w*")  # what str.isalpha() starts, in any script
+RAW = re.compile(r"[^{\[/]+")
+
+class Locator:
+  """Maps increasing offsets to 1-based (line, col) without rescanning the text."""
+
+  def __init__(self, text):
+    self.text, self.pos, self.line = text, 0, 1
+
+  def __call__(self, i):
+    if i >= self.pos:
+      self.line += self.text.count("\n", self.pos, i)
+    else:
+      self.line -= self.text.count("\n", i, self.pos)
+    self.pos = i
+    return self.line, i - self.text.rfind("\n", 0, i)
+
+def convert_single_quoted(s):
+  """Turn a 'single quoted' literal into an equivalent "double quoted" one."""
+  body = s[1:-1].replace("\\'", "'")
+  return '"' + re.sub(r'(?<!\\)((?:\\\\)*)"', r'\1\\"', body) + '"'
+
+def repair_json(text):
+  """Repair dirty JSON in one linear, string-aware pass.
+
+  Fixes a leading BOM, // and /* */ comments, trailing commas, single-quoted
+  strings and missing commas between values inside containers. Returns the
+  repaired text and a list of {"fix", "line", "col"} records in source order.
+  Text outside top-level containers is copied through, apart from comments.
+  """
+  out, fixes, stack = [], [], []
+  loc = Locator(text)
+  prev, comma, vend = None, None, None
+  i, n = 0, len(text)
+
+  def fix(kind, at):
+    line, col = loc(at)
+    fixes.append({"fix": kind, "line": line, "col": col})
+
+  def value_start(at):
+    nonlocal prev
+    if stack and prev == "value":
+      fix("delimiter", vend[1])
+      out[vend[0]] += ","
+    prev = "value"
+
+  def value_end(end):
+    nonlocal vend
+    vend = (len(out) - 1, end)
+
+  if text.startswith("\ufeff"):
+    fix("bom", 0)
+    i = len(text) - len(text.lstrip("\ufeff"))
+  while i < n:
+    c = text[i]
+    if c == "/" and i + 1 < n and text[i + 1] in "/*":
+      if text[i + 1] == "/":
+        end = text.find("\n", i)
+        end = n if end < 0 else end
+      else:
+        end = text.find("*/", i + 2)
+        end = n if end < 0 else end + 2
+      fix("comment", i)
+      i = end
+      continue
+    if c in "{[":
+      value_start(i)
+      stack.append(c)
+      out.append(c)
+      prev = "open"
+      i += 1
+      continue
+    if not stack:
+      m = RAW.match(text, i)
+      end = m.end() if m else i + 1
+      out.append(text[i:end])
+      i = end
+      continue
+    if c in " \t\r\n":
+      end = SPACE.match(text, i).end()
+      out.append(text[i:end])
+      i = end
+    elif c in "}]":
+      if prev == "comma":
+        out[comma[0]] = ""
+        fix("trailing-comma", comma[1])
+      stack.pop()
+      out.append(c)
+      value_end(i + 1)
+      prev = "value"
+      i += 1
+    elif c == ",":
+      comma = (len(out), i)
+      out.append(c)
+      prev = "comma"
+      i += 1
+    elif c == ":":
+      out.append(c)
+      prev = "colon"
+      i += 1
+    elif c == '"' or c == "'":
+      m = (STR_D if c == '"' else STR_S).match(text, i)
+      end = m.end() if m else n
+      value_start(i)
+      if c == "'" and m:
+        fix("quotes", i)
+        out.append(convert_single_quoted(m.group()))
+      else:
+        out.append(text[i:end])
+      value_end(end)
+      i = end
+    elif c == "-" or c == "." or c.isdigit():
+      m = NUMBER.match(text, i)
+      end = m.end() if m else i + 1
+      value_start(i)
+      out.append(text[i:end])
+      value_end(end)
+      i = end
+    elif c.isalpha() or c == "_":
+      end = WORD.match(text, i).end()
+      value_start(i)
+      out.append(text[i:end])
+      value_end(end)
+      i = end
+    else:
+      out.append(c)
+      prev = None
+      i += 1
+  fixes.sort(key=lambda f: (f["line"], f["col"]))
+  return "".join(out), fixes
+
+def describe(fixes):
+  """Render fix records as kind@Lline:Ccol strings."""
+  return [f"{f['fix']}@L{f['line']}:C{f['col']}" for f in fixes]
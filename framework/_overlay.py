@@ -0,0 +1,259 @@
+# --- framework/_overlay.py | checksum: auto ---
+import re
+
+from _codec import COMPACT, dumps
+
+config = {
+  "placeholder": "{llm}",
+  "delete": "__DELETE__",
+  "order": "__ORDER__",
+  "indent": 2,
+}
+_MISSING = object()
+
+# orchestration.json overlay-system: overlay-first-then-core, override-on-conflict.
+# An overlay is a structural patch: dicts merge key by key, "__DELETE__" removes a
+# key, "__ORDER__" lists the resulting key order when it differs from core order,
+# and any other value replaces what core has. Keys may contain "{llm}", which is
+# filled in with the variant name when a variant is composed.
+
+def same(a, b):
+  """Equality that also tells apart what serializes differently (1 vs 1.0 vs True, 0.0 vs -0.0)."""
+  if type(a) is not type(b):
+    return False
+  if isinstance(a, dict):
+    return len(a) == len(b) and list(a) == list(b) and all(same(v, b[k]) for k, v in a.items())
+  if isinstance(a, list):
+    return len(a) == len(b) and all(same(x, y) for x, y in zip(a, b))
+  if isinstance(a, float):
+    return repr(a) == repr(b)
+  return a == b
+
+def merge(base, patch):
+  """base with patch applied; only dicts on patched paths are copied, every other subtree is base's own object.
+
+  Values for keys base lacks are taken as they are: markers only mean something against core.
+  """
+  if not (isinstance(base, dict) and isinstance(patch, dict)):
+    return patch
+  out, order = dict(base), None
+  for k, v in patch.items():
+    if k == config["order"]:
+      order = v
+    elif isinstance(v, str) and v == config["delete"]:
+      out.pop(k, None)
+    elif k in out:
+      out[k] = merge(out[k], v)
+    else:
+      out[k] = v
+  if order is not None:
+    out = {k: out[k] for k in order}
+  return out
+
+def common(docs):
+  """Shared core of several documents: keys all of them have with the same value, dicts intersected recursively."""
+  first = docs[0]
+  if not all(isinstance(d, dict) for d in docs):
+    return first if all(same(first, d) for d in docs[1:]) else _MISSING
+  out = {}
+  for k in first:
+    if all(k in d for d in docs[1:]):
+      sub = common([d[k] for d in docs])
+      if sub is not _MISSING:
+        out[k] = sub
+  return out
+
+def derive(core, doc):
+  """Overlay that turns core into doc: merge(core, derive(core, doc)) serializes exactly as doc does."""
+  out = {}
+  for k, v in doc.items():
+    c = core.get(k, _MISSING)
+    if isinstance(c, dict) and isinstance(v, dict):
+      sub = derive(c, v)
+      if sub:
+        out[k] = sub
+    elif c is _MISSING or not same(c, v):
+      out[k] = v
+  for k in core:
+    if k not in doc:
+      out[k] = config["delete"]
+  composed = [k for k in core if k in doc] + [k for k in doc if k not in core]
+  if composed != list(doc):
+    out[config["order"]] = list(doc)
+  return out
+
+def template(doc, name):
+  """Copy of doc with name replaced by the placeholder in every key."""
+  if isinstance(doc, dict):
+    ph = config["placeholder"]
+    return {k.replace(name, ph): template(v, name) for k, v in doc.items()}
+  if isinstance(doc, list):
+    return [template(v, name) for v in doc]
+  return doc
+
+def fill(doc, name):
+  """Inverse of template: the placeholder in every key replaced by name."""
+  if isinstance(doc, dict):
+    ph = config["placeholder"]
+    return {k.replace(ph, name): fill(v, name) for k, v in doc.items()}
+  if isinstance(doc, list):
+    return [fill(v, name) for v in doc]
+  return doc
+
+class Composer:
+  """Parses-once core shared by every variant; variants cost what their overlays touch.
+
+  Core is encoded once per core, never per variant. Indented output is cut out
+  of that one text: a dict an overlay reaches into is split at its own
+  indentation into "key: value" entries, which are cached, and a variant joins
+  those around the few entries it re-encodes. Text without a placeholder is
+  used as it is; keys holding one are filled per variant.
+  """
+
+  def __init__(self, core, indent=config["indent"]):
+    self.core, self.indent = core, indent
+    self.texts, self.entries, self.names = {}, {}, {}
+    self.colon = ":" if indent is None else ": "
+
+  def variant(self, name, overlay):
+    """Compose core and overlay for one target, placeholders filled with name."""
+    return fill(merge(self.core, overlay), name)
+
+  def text(self, name, overlay):
+    """Serialized variant, identical to json.dumps(self.variant(name, overlay))."""
+    return self.compose(self.core, overlay, 0, name)
+
+  def write(self, name, overlay, path):
+    """Write one composed variant; returns the number of characters written."""
+    text = self.text(name, overlay)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    return len(text)
+
+  def render(self, node, depth):
+    if self.indent is None:
+      return dumps(node, separators=COMPACT, ensure_ascii=False)
+    text = dumps(node, indent=self.indent, ensure_ascii=False)
+    return text.replace("\n", "\n" + " " * (self.indent * depth)) if depth and "\n" in text else text
+
+  def wrap(self, parts, depth, is_dict):
+    opening, closing = ("{", "}") if is_dict else ("[", "]")
+    if not parts:
+      return opening + closing
+    if self.indent is None:
+      return opening + ",".join(parts) + closing
+    pad = "\n" + " " * (self.indent * (depth + 1))
+    return "".join((opening, pad, ("," + pad).join(parts), "\n", " " * (self.indent * depth), closing))
+
+  def fresh(self, value, depth, name):
+    """Text of an overlay value; filling placeholders copies it, so only when its text holds one."""
+    text = self.render(value, depth)
+    return self.render(fill(value, name), depth) if config["placeholder"] in text else text
+
+  def quoted(self, key, name=None):
+    """JSON text of a key, its placeholder filled when a name is given."""
+    if name is not None and config["placeholder"] in key:
+      key = key.replace(config["placeholder"], name)
+    text = self.names.get(key)
+    if text is None:
+      text = self.names[key] = dumps(key, ensure_ascii=False)
+    return text
+
+  def untouched(self, node, depth):
+    """Text of a core subtree as it stands in core, encoded once per core."""
+    if not isinstance(node, (dict, list)):
+      return dumps(node, ensure_ascii=False)
+    text = self.texts.get(id(node))
+    if text is None:
+      text = self.texts[id(node)] = self.render(node, depth)
+    return text
+
+  def inner(self, text, depth):
+    """A container's text without its brackets and outer padding: its pieces joined by their separator."""
+    if self.indent is None:
+      return text[1:-1]
+    return text[2 + self.indent * (depth + 1): -(2 + self.indent * depth)]
+
+  def cut(self, text, depth):
+    """Pieces of a non-empty indented container's text.
+
+    The cuts are the commas that end a line and are followed by exactly one
+    level of indentation; strings never hold a raw newline and deeper lines
+    carry more spaces, so they fall between the container's own children.
+    """
+    pad = "\n" + " " * (self.indent * (depth + 1))
+    return re.split(re.escape("," + pad) + "(?! )", self.inner(text, depth))
+
+  def split(self, node, depth):
+    """(pieces, positions of pieces holding a placeholder, keys, key -> position) of a non-empty core container, cached.
+
+    Pieces are the "key: value" entries of a dict or the items of a list.
+    """
+    got = self.entries.get(id(node))
+    if got is not None:
+      return got
+    is_dict = isinstance(node, dict)
+    if self.indent is None:
+      texts = [self.untouched(v, depth + 1) for v in (node.values() if is_dict else node)]
+      pieces = [self.quoted(k) + ":" + t for k, t in zip(node, texts)] if is_dict else texts
+    else:
+      pieces = self.cut(self.untouched(node, depth), depth)
+    ph, keys = config["placeholder"], list(node) if is_dict else None
+    index = {k: i for i, k in enumerate(keys)} if is_dict else None
+    got = self.entries[id(node)] = (pieces, [i for i, p in enumerate(pieces) if ph in p], keys, index)
+    return got
+
+  def seed(self, value, piece, key=None):
+    """Keep a core child's text as its parent's piece holds it, so walking into it encodes nothing."""
+    if isinstance(value, (dict, list)) and id(value) not in self.texts:
+      self.texts[id(value)] = piece if key is None else piece[len(self.quoted(key)) + len(self.colon):]
+    return value
+
+  def compose(self, node, patch, depth, name):
+    """Text of merge(node, patch) with placeholders filled; _MISSING patch means node is untouched."""
+    ph = config["placeholder"]
+    if patch is _MISSING:
+      if not isinstance(node, (dict, list)) or not node:
+        return self.untouched(node, depth)
+      text = self.untouched(node, depth)
+      if ph not in text:
+        return text
+      if isinstance(node, list):
+        cached, dynamic, _, _ = self.split(node, depth)
+        parts = list(cached)
+        for i in dynamic:
+          parts[i] = self.compose(self.seed(node[i], cached[i]), _MISSING, depth + 1, name)
+        return self.wrap(parts, depth, False)
+      patch = {}
+    if not (isinstance(node, dict) and isinstance(patch, dict)):
+      return self.fresh(patch, depth, name)
+    cached, dynamic, keys, index = self.split(node, depth) if node else ([], [], [], {})
+    parts, order, added, deleted = list(cached), None, {}, False
+    for k, v in patch.items():
+      i = index.get(k)
+      if k == config["order"]:
+        order = v
+      elif isinstance(v, str) and v == config["delete"]:
+        if i is not None:
+          parts[i], deleted = None, True
+      elif i is not None:
+        parts[i] = self.quoted(k, name) + self.colon + self.compose(self.seed(node[k], cached[i], k), v, depth + 1, name)
+      else:
+        added[k] = v
+    for i in dynamic:
+      k = keys[i]
+      if k not in patch:
+        parts[i] = self.quoted(k, name) + self.colon + self.compose(self.seed(node[k], cached[i], k), _MISSING, depth + 1, name)
+    if deleted:
+      parts = [p for p in parts if p is not None] if order is None else parts
+    if not added:
+      return self.wrap(parts if order is None else [parts[index[k]] for k in order], depth, True)
+    # keys core lacks are encoded together, in one call
+    text = self.fresh(added, depth, name)
+    if order is None:
+      return self.wrap(parts + [self.inner(text, depth)], depth, True)
+    if self.indent is None:
+      new = {k: self.quoted(k, name) + ":" + self.fresh(v, depth + 1, name) for k, v in added.items()}
+    else:
+      new = dict(zip(added, self.cut(text, depth)))
+    return self.wrap([new[k] if k in new else parts[index[k]] for k in order], depth, True)
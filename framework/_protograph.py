@@ -0,0 +1,168 @@
+# --- framework/_protograph.py | checksum: auto ---
+import re
+from collections.abc import Mapping
+
+config = {
+  "rule_ref": re.compile(r"\bR\d{2,3}\b"),
+  "rule_key": re.compile(r"R\d{2,3}"),
+  "skip_keys": {"manifest", "__LENGTH__"},
+  "end_stage": "end",
+}
+
+class GraphIndex:
+  """Flat index over a built kernel: protocols, stages, validators and rule IDs."""
+
+  def __init__(self):
+    self.protocols, self.stages, self.validators = {}, {}, {}
+    self.rules, self.rule_refs, self.key_mismatch = set(), [], []
+    self.orchestration, self.orch_path = None, ""
+
+  @classmethod
+  def build(cls, doc):
+    """Index a kernel in one iterative walk."""
+    idx, todo = cls(), [("", doc)]
+    while todo:
+      path, node = todo.pop()
+      if isinstance(node, (list, tuple)):
+        todo.extend((f"{path}/{i}", v) for i, v in enumerate(node))
+        continue
+      if not isinstance(node, Mapping):
+        continue
+      if idx.orchestration is None and isinstance(node.get("stages"), Mapping):
+        idx.add_orchestration(path, node)
+      for k, v in node.items():
+        if k in config["skip_keys"]:
+          continue
+        if config["rule_key"].fullmatch(k):
+          idx.rules.add(k)
+        if isinstance(v, Mapping) and "steps" in v:
+          idx.add_protocol(f"{path}/{k}", k, v)
+        elif isinstance(v, (Mapping, list, tuple)):
+          todo.append((f"{path}/{k}", v))
+    return idx
+
+  def add_orchestration(self, path, node):
+    self.orchestration, self.orch_path = node, path
+    self.stages = {k: v for k, v in node["stages"].items() if isinstance(v, Mapping)}
+    validators = node.get("validators")
+    self.validators = validators if isinstance(validators, Mapping) else {}
+    for name, stage in self.stages.items():
+      for r in stage.get("enforce-rules") or []:
+        self.ref_rules(f"{path}/stages/{name}/enforce-rules", r)
+    for name, expr in self.validators.items():
+      self.ref_rules(f"{path}/validators/{name}", expr)
+    for name, ids in (node.get("rule-enforcement-gates") or {}).items():
+      for r in ids or []:
+        self.ref_rules(f"{path}/rule-enforcement-gates/{name}", r)
+    for r in (node.get("overlay-system") or {}).get("enforce-rules") or []:
+      self.ref_rules(f"{path}/overlay-system/enforce-rules", r)
+
+  def add_protocol(self, path, key, node):
+    real = node.get("key", key)
+    if real != key:
+      self.key_mismatch.append((path, real))
+    deps = node.get("dependencies") or []
+    self.protocols[real] = {
+      "stage": node.get("stage"),
+      "deps": [d for d in deps if isinstance(d, str)],
+      "path": path,
+    }
+    for r in node.get("rules") or []:
+      self.ref_rules(f"{path}/rules", r)
+
+  def ref_rules(self, where, text):
+    if isinstance(text, str):
+      self.rule_refs.extend((where, r) for r in config["rule_ref"].findall(text))
+
+def find_cycles(nodes, edges):
+  """Iterative three-colour DFS; returns one representative path per cycle found."""
+  color, cycles = dict.fromkeys(nodes, 0), []
+  for root in nodes:
+    if color[root]:
+      continue
+    stack, trail = [(root, iter(edges(root)))], [root]
+    color[root] = 1
+    while stack:
+      node, it = stack[-1]
+      nxt = next(it, None)
+      if nxt is None:
+        color[node] = 2
+        stack.pop()
+        trail.pop()
+      elif nxt in color and color[nxt] == 1:
+        cycles.append(trail[trail.index(nxt) :] + [nxt])
+      elif nxt in color and color[nxt] == 0:
+        color[nxt] = 1
+        stack.append((nxt, iter(edges(nxt))))
+        trail.append(nxt)
+  return cycles
+
+def check(idx):
+  """Run reference, dependency-flow and stage-graph checks; returns issue dicts."""
+  issues = []
+
+  def issue(kind, where, ref, level="error"):
+    issues.append({"check": kind, "where": where, "ref": ref, "level": level})
+
+  for path, real in idx.key_mismatch:
+    issue("key-mismatch", path, real)
+  protos = idx.protocols
+  for key, p in protos.items():
+    for d in p["deps"]:
+      if d not in protos:
+        issue("dangling-dependency", p["path"], d)
+      elif isinstance(p["stage"], int) and isinstance(protos[d]["stage"], int):
+        if protos[d]["stage"] > p["stage"]:
+          issue("stage-order", p["path"], f"{d}@{protos[d]['stage']}>{p['stage']}")
+  for cyc in find_cycles(list(protos), lambda k: protos[k]["deps"]):
+    issue("dependency-cycle", protos[cyc[0]]["path"], "->".join(cyc))
+  dependents = {d for p in protos.values() for d in p["deps"]}
+  if len(protos) > 1:
+    for key, p in protos.items():
+      if not p["deps"] and key not in dependents:
+        issue("orphan-protocol", p["path"], key, "warning")
+  stages, end = idx.stages, config["end_stage"]
+  for name, st in stages.items():
+    where = f"{idx.orch_path}/stages/{name}"
+    for field in ("next", "retry"):
+      ref = st.get(field)
+      if ref is not None and ref != end and ref not in stages:
+        issue(f"dangling-{field}", where, ref)
+    for v in st.get("v") or []:
+      if v not in idx.validators:
+        issue("dangling-validator", where, v)
+    if protos:
+      for p in st.get("p") or []:
+        if p not in protos:
+          issue("dangling-stage-protocol", where, p, "warning")
+  nexts = {k: [s["next"]] if s.get("next") in stages else [] for k, s in stages.items()}
+  for cyc in find_cycles(list(stages), lambda k: nexts[k]):
+    issue("stage-cycle", f"{idx.orch_path}/stages/{cyc[0]}", "->".join(cyc))
+  if stages:
+    hs = (idx.orchestration.get("handshake") or {}).get("stage")
+    start = hs if hs in stages else next(iter(stages))
+    seen, cur = set(), start
+    while cur in stages and cur not in seen:
+      seen.add(cur)
+      cur = stages[cur].get("next")
+    for name in stages:
+      if name not in seen:
+        issue("unreachable-stage", f"{idx.orch_path}/stages/{name}", name, "warning")
+  if idx.rules:
+    for where, r in idx.rule_refs:
+      if r not in idx.rules:
+        issue("dangling-rule", where, r)
+  return issues
+
+def summarize(idx, issues):
+  """Counts for reporting alongside the issue list."""
+  return {
+    "protocols": len(idx.protocols),
+    "stages": len(idx.stages),
+    "validators": len(idx.validators),
+    "rules": len(idx.rules),
+    "rule_refs": len(idx.rule_refs),
+    "errors": sum(1 for i in issues if i["level"] == "error"),
+    "warnings": sum(1 for i in issues if i["level"] == "warning"),
+    "rules_checked": bool(idx.rules),
+  }
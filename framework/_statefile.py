@@ -0,0 +1,61 @@
+# --- framework/_statefile.py | checksum: auto ---
+import contextlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+from _codec import dumps, loads
+
+try:
+  import fcntl
+except ImportError:  # no cross-process lock off POSIX
+  fcntl = None
+
+config = {"encoding": "utf-8"}
+_LOCK = threading.Lock()
+
+@contextlib.contextmanager
+def locked(folder):
+  """Held by one thread of this process and, where flock exists, one process per folder."""
+  with _LOCK:
+    try:
+      fd = os.open(folder, os.O_RDONLY) if fcntl else None
+    except OSError:
+      fd = None  # a folder that cannot be opened cannot be written to either
+    try:
+      if fd is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+      yield
+    finally:
+      if fd is not None:
+        os.close(fd)
+
+def update(path, change, **dump_args):
+  """Read-modify-write a JSON state file that concurrent batch jobs share (plugin caches, manifests).
+
+  change gets the current contents (None when the file is missing or unreadable)
+  and returns what to write. Jobs take turns on the folder's lock, so neither
+  thread- nor process-mode jobs lose each other's updates, and the file is
+  replaced atomically, so no reader sees half of it. Returns whether the write
+  went through; a failed one only costs a slower next run.
+  """
+  path = Path(path)
+  with locked(path.parent):
+    try:
+      data = loads(path.read_text(encoding=config["encoding"]))
+    except (OSError, ValueError):
+      data = None
+    text = dumps(change(data), **dump_args)
+    try:
+      fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    except OSError:
+      return False
+    try:
+      with os.fdopen(fd, "w", encoding=config["encoding"]) as fh:
+        fh.write(text)
+      os.replace(temp_name, path)
+    except OSError:
+      Path(temp_name).unlink(missing_ok=True)
+      return False
+  return True
@@ -0,0 +1,170 @@
+# --- framework/_trace.py | checksum: auto ---
+import contextlib
+import json
+import os
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+config = {
+  "formats": ("chrome", "ndjson"),
+  "ndjson_suffixes": (".ndjson", ".jsonl"),
+  "encoding": "utf-8",
+}
+_NOOP = contextlib.nullcontext()
+_tracer = None
+
+class Tracer:
+  """Collects nested span timings, optional tracemalloc peaks and counters."""
+
+  def __init__(self, memory=False):
+    self.memory, self.events, self.counters = memory, [], {}
+    self.origin, self.pid, self.local = time.perf_counter(), os.getpid(), threading.local()
+    self.lock = threading.Lock()
+    self.own_tracemalloc = memory and not tracemalloc.is_tracing()
+    if self.own_tracemalloc:
+      tracemalloc.start()
+
+  def frames(self):
+    if not hasattr(self.local, "stack"):
+      self.local.stack = []
+    return self.local.stack
+
+  @contextlib.contextmanager
+  def span(self, name, cat="phase", **args):
+    stack = self.frames()
+    if self.memory:
+      if stack:
+        stack[-1]["carry"] = max(stack[-1]["carry"], tracemalloc.get_traced_memory()[1])
+      tracemalloc.reset_peak()
+    frame = {"carry": 0}
+    stack.append(frame)
+    t0 = time.perf_counter()
+    try:
+      yield args
+    finally:
+      dur = time.perf_counter() - t0
+      stack.pop()
+      event = {
+        "name": name,
+        "cat": cat,
+        "ts": (t0 - self.origin) * 1e6,
+        "dur": dur * 1e6,
+        "tid": threading.get_ident(),
+        "depth": len(stack),
+        "args": args,
+      }
+      if self.memory:
+        peak = max(frame["carry"], tracemalloc.get_traced_memory()[1])
+        event["peak_kb"] = peak // 1024
+        if stack:
+          stack[-1]["carry"] = max(stack[-1]["carry"], peak)
+      with self.lock:
+        self.events.append(event)
+
+  def count(self, name, n=1):
+    with self.lock:
+      self.counters[name] = self.counters.get(name, 0) + n
+
+  def chrome(self):
+    """Chrome trace-event JSON, loadable in chrome://tracing or Perfetto."""
+    out = []
+    for e in sorted(self.events, key=lambda e: e["ts"]):
+      args = dict(e["args"], peak_kb=e["peak_kb"]) if "peak_kb" in e else e["args"]
+      out.append({
+        "name": e["name"], "cat": e["cat"], "ph": "X", "pid": self.pid, "tid": e["tid"],
+        "ts": round(e["ts"], 1), "dur": round(e["dur"], 1), "args": args,
+      })
+    end = round((time.perf_counter() - self.origin) * 1e6, 1)
+    for name, value in sorted(self.counters.items()):
+      out.append({"name": name, "ph": "C", "pid": self.pid, "tid": 0, "ts": end, "args": {name: value}})
+    return {"traceEvents": out, "displayTimeUnit": "ms", "otherData": {"counters": self.counters}}
+
+  def ndjson(self):
+    """One JSON object per line: spans in start order, then counters."""
+    for e in sorted(self.events, key=lambda e: e["ts"]):
+      row = {
+        "type": "span", "name": e["name"], "cat": e["cat"], "depth": e["depth"], "tid": e["tid"],
+        "start_ms": round(e["ts"] / 1000, 3), "dur_ms": round(e["dur"] / 1000, 3),
+      }
+      if "peak_kb" in e:
+        row["peak_kb"] = e["peak_kb"]
+      if e["args"]:
+        row["args"] = e["args"]
+      yield json.dumps(row, ensure_ascii=False, default=str)
+    for name, value in sorted(self.counters.items()):
+      yield json.dumps({"type": "counter", "name": name, "value": value})
+
+  def write(self, path, fmt=None):
+    """Write the trace; the format defaults from the file suffix. Returns a short summary."""
+    path = Path(path)
+    fmt = fmt or ("ndjson" if path.suffix in config["ndjson_suffixes"] else "chrome")
+    if fmt not in config["formats"]:
+      raise ValueError(f"unknown trace format: {fmt}")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding=config["encoding"]) as fh:
+      if fmt == "ndjson":
+        for line in self.ndjson():
+          fh.write(line + "\n")
+      else:
+        json.dump(self.chrome(), fh, ensure_ascii=False, default=str)
+    top = {}
+    for e in self.events:
+      if e["depth"] == 0:
+        top[e["name"]] = round(top.get(e["name"], 0) + e["dur"] / 1000, 3)
+    return {"file": str(path), "format": fmt, "spans": len(self.events), "top_ms": top}
+
+  def close(self):
+    if self.own_tracemalloc:
+      tracemalloc.stop()
+
+def enable(memory=False):
+  """Start a process-wide tracer; spans and counters are no-ops until this is called."""
+  global _tracer
+  _tracer = Tracer(memory)
+  return _tracer
+
+def active():
+  return _tracer
+
+def span(name, cat="phase", **args):
+  """Time a block; yields the args dict so callers can attach results to the span."""
+  return _tracer.span(name, cat, **args) if _tracer else _NOOP
+
+def count(name, n=1):
+  if _tracer:
+    _tracer.count(name, n)
+
+def finish(path, fmt=None):
+  """Write and stop the active tracer; returns its summary, or None when tracing is off."""
+  global _tracer
+  tracer, _tracer = _tracer, None
+  if tracer is None:
+    return None
+  try:
+    return tracer.write(path, fmt)
+  finally:
+    tracer.close()
+
+def add_arguments(parser):
+  parser.add_argument("--trace", type=Path, help="Write span timings (Chrome trace JSON, or NDJSON for .ndjson/.jsonl)")
+  parser.add_argument("--trace-format", choices=config["formats"], help="Override the format chosen by suffix")
+  parser.add_argument("--trace-memory", action="store_true", help="Record tracemalloc peak per span")
+
+@contextlib.contextmanager
+def tracing(args, name, **attrs):
+  """Span for a whole tool run; starts and writes a trace when --trace is given and none is active.
+
+  The yielded dict receives the trace summary under "summary" once written.
+  """
+  path, out = getattr(args, "trace", None), {}
+  owner = bool(path) and _tracer is None
+  if owner:
+    enable(getattr(args, "trace_memory", False))
+  try:
+    with span(name, "tool", **attrs):
+      yield out
+  finally:
+    if owner:
+      out["summary"] = finish(path, getattr(args, "trace_format", None))
@@ -0,0 +1,412 @@
+# --- framework/_validators.py | checksum: auto ---
+import re
+
+from _codec import is_object, loads
+
+config = {
+  "validators_key": "validators",
+  "stages_key": "stages",
+  "halt": "halt",
+  "search_depth": 3,
+}
+EXPRESSION = re.compile(r"(?P<action>[a-z][a-z-]*):(?P<cond>.+?)(?P<rules>(?:\|R\d+)*)")
+TOKEN = re.compile(
+  r"\s*(?:(?P<num>-?\d+(?:\.\d+)?(?![\w.-]))|(?P<str>'[^']*'|\"[^\"]*\")"
+  r"|(?P<name>[A-Za-z_][\w.-]*)|(?P<op>\|\||&&|>=|<=|==|!=|[<>!()]))"
+)
+COMPARE = {">", "<", ">=", "<=", "==", "!="}
+_MISSING = object()
+
+# orchestration.json validators read "<action>:<condition>|R05|R11":
+#   halt:risk>0.7||pii|R05|R11      halt:!is-json|R95|R104
+#   halt:confidence<threshold|R37   halt:iterations>max|R55
+# A condition combines ||, &&, ! and parentheses over flags (a bare name, true
+# when the record's field is truthy) and comparisons of names, numbers and
+# quoted strings. Names resolve against the record first, then the context
+# (threshold, max, ...). A comparison with an absent operand is false, so a
+# missing field never fires one; a record the condition cannot be evaluated on
+# (not an object, mismatched types) fires the validator, with the error kept.
+# Because that fails open, stages count the compared names each record left
+# unresolved, and the right name of a name-to-name comparison (its bound, the
+# threshold of confidence<threshold) must be set in the context or allowed.
+
+class DSLError(ValueError):
+  """Raised for a validator expression that does not parse."""
+
+class ContextError(ValueError):
+  """Raised for a stage whose comparisons cite bounds the context does not set."""
+
+class Parser:
+  """Recursive descent over one condition; builds a tuple tree."""
+
+  def __init__(self, text):
+    self.text, self.tokens, pos = text, [], 0
+    while pos < len(text):
+      m = TOKEN.match(text, pos)
+      if not m or m.end() == pos:
+        if text[pos:].strip():
+          raise DSLError(f"unexpected {text[pos:]!r} in {text!r}")
+        break
+      kind = m.lastgroup
+      self.tokens.append((kind, m.group(kind)))
+      pos = m.end()
+    self.i = 0
+
+  def peek(self):
+    return self.tokens[self.i] if self.i < len(self.tokens) else (None, None)
+
+  def take(self, op=None):
+    tok = self.peek()
+    if tok[0] is None or (op is not None and tok != ("op", op)):
+      raise DSLError(f"expected {op or 'operand'} in {self.text!r}")
+    self.i += 1
+    return tok
+
+  def parse(self):
+    node = self.any()
+    if self.i != len(self.tokens):
+      raise DSLError(f"unexpected {self.peek()[1]!r} in {self.text!r}")
+    return node
+
+  def any(self):
+    parts = [self.all()]
+    while self.peek() == ("op", "||"):
+      self.take("||")
+      parts.append(self.all())
+    return parts[0] if len(parts) == 1 else ("or", parts)
+
+  def all(self):
+    parts = [self.unary()]
+    while self.peek() == ("op", "&&"):
+      self.take("&&")
+      parts.append(self.unary())
+    return parts[0] if len(parts) == 1 else ("and", parts)
+
+  def unary(self):
+    if self.peek() == ("op", "!"):
+      self.take("!")
+      return ("not", self.unary())
+    if self.peek() == ("op", "("):
+      self.take("(")
+      node = self.any()
+      self.take(")")
+      return node
+    left = self.operand()
+    kind, op = self.peek()
+    if kind == "op" and op in COMPARE:
+      self.take(op)
+      return ("cmp", op, left, self.operand())
+    if left[0] != "name":
+      raise DSLError(f"{left[1]!r} is not a condition in {self.text!r}")
+    return ("flag", left[1])
+
+  def operand(self):
+    kind, value = self.take()
+    if kind == "num":
+      return ("const", float(value) if "." in value else int(value))
+    if kind == "str":
+      return ("const", value[1:-1])
+    if kind == "name":
+      return ("name", value)
+    raise DSLError(f"expected operand, got {value!r} in {self.text!r}")
+
+def parse(expr):
+  """{"action", "condition" (tuple tree), "rules"} for one validator expression."""
+  m = EXPRESSION.fullmatch(expr.strip()) if isinstance(expr, str) else None
+  if not m:
+    raise DSLError(f"not an <action>:<condition>|R.. expression: {expr!r}")
+  rules = [r for r in m.group("rules").split("|") if r]
+  return {"action": m.group("action"), "condition": Parser(m.group("cond")).parse(), "rules": rules}
+
+def names(node, out=None):
+  """Names a condition reads, in first-use order."""
+  out = [] if out is None else out
+  kind = node[0]
+  if kind in ("or", "and"):
+    for part in node[1]:
+      names(part, out)
+  elif kind == "not":
+    names(node[1], out)
+  elif kind == "cmp":
+    for side in node[2:]:
+      if side[0] == "name" and side[1] not in out:
+        out.append(side[1])
+  elif node[1] not in out:
+    out.append(node[1])
+  return out
+
+def comparisons(node):
+  """The comparison nodes of a condition, in order."""
+  kind = node[0]
+  if kind in ("or", "and"):
+    for part in node[1]:
+      yield from comparisons(part)
+  elif kind == "not":
+    yield from comparisons(node[1])
+  elif kind == "cmp":
+    yield node
+
+def witness(node, fire, context=None):
+  """Record fields that make a condition fire (or not), for test records; None when no plain choice exists.
+
+  Absent flags keep quiet; a comparison is given a value on the quiet or firing
+  side of its constant, or of a bound set in context.
+  """
+  kind = node[0]
+  if kind == "flag":
+    return {node[1]: fire}
+  if kind == "not":
+    return witness(node[1], not fire, context)
+  if kind in ("or", "and"):
+    # one part decides an "or" that fires and an "and" that does not; all parts decide the rest
+    if fire == (kind == "or"):
+      return next((w for w in (witness(p, fire, context) for p in node[1]) if w is not None), None)
+    out = {}
+    for part in node[1]:
+      w = witness(part, fire, context)
+      if w is None or any(out.get(k, v) != v for k, v in w.items()):
+        return None
+      out.update(w)
+    return out
+  _, op, left, right = node
+  context = context or {}
+  left, right = (("const", context[s[1]]) if s[0] == "name" and s[1] in context else s for s in (left, right))
+  if left[0] == right[0]:
+    return None
+  flip = {">": "<", "<": ">", ">=": "<=", "<=": ">="}
+  negate = {">": "<=", "<": ">=", ">=": "<", "<=": ">", "==": "!=", "!=": "=="}
+  (_, name), (_, c) = (left, right) if left[0] == "name" else (right, left)
+  op = op if left[0] == "name" else flip.get(op, op)
+  op = op if fire else negate[op]
+  if isinstance(c, bool) or not isinstance(c, (int, float, str)):
+    return None
+  if isinstance(c, str):
+    return {name: c} if op in ("==", ">=", "<=") else {name: c + "~"} if op in ("!=", ">") else None
+  return {name: {">": c + 1, "<": c - 1, "!=": c + 1}.get(op, c)}
+
+class StageBuilder:
+  """Emits one Python function per stage that tests every validator on a record.
+
+  Each field is fetched once however many validators read it, and the record's
+  verdict is a bitmask with one bit per validator, 0 when none fired.
+  """
+
+  def __init__(self, context):
+    self.context, self.consts, self.vars = context, [], {}
+    # compared names the context cannot stand in for: bit i of a miss mask is watch[i]
+    self.watch = []
+
+  def const(self, value):
+    self.consts.append(value)
+    return f"C{len(self.consts) - 1}"
+
+  def var(self, name):
+    if name not in self.vars:
+      self.vars[name] = f"f{len(self.vars)}"
+    return self.vars[name]
+
+  def loads(self, fields, depth):
+    """Lines binding each field to a local: record value, else context value, else M."""
+    lines = []
+    for name in fields:
+      default = self.const(self.context[name]) if name in self.context else "M"
+      lines.append("  " * depth + f"{self.var(name)} = g({name!r}, {default})")
+    return lines
+
+  def expr(self, node):
+    kind = node[0]
+    if kind == "or":
+      return "(" + " or ".join(self.expr(p) for p in node[1]) + ")"
+    if kind == "and":
+      return "(" + " and ".join(self.expr(p) for p in node[1]) + ")"
+    if kind == "not":
+      return f"(not {self.expr(node[1])})"
+    if kind == "flag":
+      v = self.var(node[1])
+      return f"({v} is not M and {v})"
+    _, op, left, right = node
+    sides = [self.var(s[1]) if s[0] == "name" else repr(s[1]) for s in (left, right)]
+    guards = [f"{v} is not M" for s, v in zip((left, right), sides) if s[0] == "name"]
+    return "(" + " and ".join([*guards, f"{sides[0]} {op} {sides[1]}"]) + ")"
+
+  def source(self, conditions):
+    """Module defining batch(records), check(record) and v<i>(record) for the given trees."""
+    fields = []
+    for cond in conditions:
+      fields.extend(n for n in names(cond) if n not in fields)
+      for _, _, *sides in comparisons(cond):
+        self.watch.extend(n for kind, n in sides if kind == "name" and n not in self.context and n not in self.watch)
+    tests = [self.expr(cond) for cond in conditions]
+    # miss[mask] counts records by the watched names they left unresolved
+    miss = " | ".join(f"({self.var(n)} is M) << {bit}" for bit, n in enumerate(self.watch))
+    tally = [f"u = {miss}", "if u:", "  miss[u] = miss.get(u, 0) + 1"] if miss else []
+    lines = ["def check(r, miss):", "  g = r.get", *self.loads(fields, 1), "  m = 0"]
+    for bit, test in enumerate(tests):
+      lines += [f"  if {test}:", f"    m |= {1 << bit}"]
+    lines += [*("  " + t for t in tally), "  return m", "", ""]
+    # the batch loop inlines check(): no call per record, and a bad record costs
+    # its own try block only (-1: let the caller find out which validator failed)
+    lines += ["def batch(rs, miss):", "  out = []", "  for i, r in enumerate(rs):", "    try:", "      g = r.get"]
+    lines += self.loads(fields, 3)
+    lines.append("      m = 0")
+    for bit, test in enumerate(tests):
+      lines += [f"      if {test}:", f"        m |= {1 << bit}"]
+    lines += ["      " + t for t in tally]
+    lines += ["    except Exception:", "      m = -1", "    if m:", "      out.append((i, m))", "  return out"]
+    for i, cond in enumerate(conditions):
+      lines += ["", "", f"def v{i}(r):", "  g = r.get", *self.loads(names(cond), 1)]
+      lines.append(f"  return bool({tests[i]})")
+    return "\n".join(lines) + "\n"
+
+def compile_source(src, consts):
+  ns = {"M": _MISSING, **{f"C{i}": c for i, c in enumerate(consts)}}
+  exec(compile(src, "<validators>", "exec"), ns)
+  return ns
+
+class Stage:
+  """The compiled validators of one stage.
+
+  unknown lists validators the stage cites that are not defined, unbound maps
+  each bound missing from the context to the validators comparing against it,
+  and unresolved() counts the records that left each compared name unresolved.
+  """
+
+  def __init__(self, name, validators, context=None):
+    self.name, self.specs, self.unknown, self.unbound = name, [], [], {}
+    self.context = dict(context or {})
+    for vname, spec in validators:
+      if spec is None:
+        self.unknown.append(vname)
+      else:
+        self.specs.append((vname, spec))
+        for _, _, left, right in comparisons(spec["condition"]):
+          if left[0] == right[0] == "name" and right[1] not in self.context:
+            self.unbound.setdefault(right[1], []).append(vname)
+    builder = StageBuilder(self.context)
+    self.source = builder.source([spec["condition"] for _, spec in self.specs])
+    ns = compile_source(self.source, builder.consts)
+    self.check, self.batch = ns["check"], ns["batch"]
+    self.singles = [ns[f"v{i}"] for i in range(len(self.specs))]
+    self.reports, self.watch, self.misses = {}, builder.watch, {}
+
+  def unresolved(self):
+    """{name: records} for compared names found in neither a checked record nor the context."""
+    out = {}
+    for mask, n in self.misses.items():
+      for bit, name in enumerate(self.watch):
+        if mask >> bit & 1:
+          out[name] = out.get(name, 0) + n
+    return out
+
+  def report(self, mask):
+    """Fired validators for a mask, built once per distinct mask."""
+    out = self.reports.get(mask)
+    if out is None:
+      out = self.reports[mask] = [
+        {"validator": vname, "action": spec["action"], "rules": spec["rules"]}
+        for bit, (vname, spec) in enumerate(self.specs) if mask >> bit & 1
+      ]
+    return out
+
+  def diagnose(self, record):
+    """Per-validator verdicts for a record the fused check raised on; errors fire their validator."""
+    if not is_object(record):
+      err = f"record is a {type(record).__name__}, not an object"
+      return [{**hit, "error": err} for hit in self.report((1 << len(self.specs)) - 1)]
+    out = []
+    for (vname, spec), single in zip(self.specs, self.singles):
+      try:
+        fired, err = single(record), None
+      except Exception as e:
+        fired, err = True, f"{type(e).__name__}: {e}"
+      if fired:
+        hit = {"validator": vname, "action": spec["action"], "rules": spec["rules"]}
+        out.append({**hit, "error": err} if err else hit)
+    return out
+
+  def evaluate(self, records):
+    """[(index, fired validators)] for every record in the batch that fired at least one."""
+    report, out = self.report, []
+    for i, mask in self.batch(records, self.misses):
+      out.append((i, report(mask) if mask > 0 else self.diagnose(records[i])))
+    return out
+
+  def halted(self, record):
+    """Fired validators for one record; an empty list lets it through."""
+    try:
+      mask = self.check(record, self.misses)
+    except Exception:
+      return self.diagnose(record)
+    return self.report(mask) if mask else []
+
+def parse_context(pairs):
+  """Context values from NAME=VALUE strings; values are JSON where they parse, strings otherwise."""
+  context = {}
+  for pair in pairs:
+    name, sep, value = pair.partition("=")
+    if not sep or not name:
+      raise ValueError(f"expected NAME=VALUE, got {pair!r}")
+    try:
+      context[name] = loads(value)
+    except ValueError:
+      context[name] = value
+  return context
+
+def find_orchestration(doc, depth=config["search_depth"]):
+  """The object holding validators and stages: orchestration.json, its "orchestration" key, or a kernel's."""
+  if not is_object(doc):
+    return None
+  if config["validators_key"] in doc and config["stages_key"] in doc:
+    return doc
+  if depth:
+    for value in doc.values():
+      found = find_orchestration(value, depth - 1)
+      if found is not None:
+        return found
+  return None
+
+def alias(orchestration, key):
+  """The short key stages use for key under the orchestration's key-map ("v" for "validators")."""
+  short = [k for k, v in orchestration.get("key-map", {}).items() if v == key]
+  return short[0] if short else key
+
+class Gate:
+  """Every validator of an orchestration parsed once; stages are compiled on first use.
+
+  allow names bounds a stage may leave unset, so their comparisons stay false.
+  """
+
+  def __init__(self, orchestration, context=None, allow=()):
+    self.orchestration, self.context, self.allow = orchestration, dict(context or {}), set(allow)
+    self.specs, self.errors, self.stages = {}, {}, {}
+    for vname, expr in orchestration.get(config["validators_key"], {}).items():
+      try:
+        self.specs[vname] = parse(expr)
+      except DSLError as e:
+        self.errors[vname] = str(e)
+    self.stage_key = alias(orchestration, config["validators_key"])
+
+  def stage_names(self):
+    return list(self.orchestration.get(config["stages_key"], {}))
+
+  def stage(self, name):
+    compiled = self.stages.get(name)
+    if compiled is None:
+      stages = self.orchestration.get(config["stages_key"], {})
+      if name not in stages:
+        raise ValueError(f"unknown stage {name!r}")
+      cited = stages[name].get(self.stage_key, [])
+      bad = [v for v in cited if v in self.errors]
+      if bad:
+        raise DSLError(f"stage {name}: {self.errors[bad[0]]}")
+      compiled = self.stages[name] = Stage(name, [(v, self.specs.get(v)) for v in cited], self.context)
+    return compiled
+
+  def require(self, name):
+    """The compiled stage, refused while a bound its comparisons cite is neither set nor allowed."""
+    compiled = self.stage(name)
+    missing = {n: v for n, v in compiled.unbound.items() if n not in self.allow}
+    if missing:
+      cited = "; ".join(f"{n} (compared by {', '.join(v)})" for n, v in missing.items())
+      raise ContextError(f"stage {name}: unset bound {cited}; set it in the context or allow it unresolved")
+    return compiled
@@ -0,0 +1,663 @@
+#!/usr/bin/env python3
+# --- framework/bench.py | checksum: auto ---
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import io
+import json
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tokenize
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import _bintree
+import _codec
+import _docmodel
+import _engine
+import _validators
+from _cleaner import LineCleaner, clean_lines, clean_text
+from _cleaner import config as cleaner_config
+from _corpus import config as corpus_config
+from _corpus import generate
+from _overlay import Composer, common, derive, template
+
+CFG = {
+  "encoding": "utf-8",
+  "repeat": 3,
+  "dirty": 0.05,
+  "seed": 0,
+  "targets": (3, 12),
+  "edit_every": 100,
+  "gate_stage": "s1-ingest",
+  "gate_context": {"threshold": 0.8},
+  "engine_fail_rates": (0.0, 0.1),
+}
+ROOT = Path(__file__).resolve().parent.parent
+KERNEL_WRAP = '{"metadata":{"type":"orchestration-control-plane"}}'
+PY_BLOCK = '''import os
+from pathlib import Path
+# module comment {i}
+
+
+def func_{i}(a, b):
+  """Docstring with a # hash.
+
+  # not a comment
+  """
+  x = "value # kept"  # trailing comment
+  data = [
+    a,
+    b,
+  ]
+  return x, data
+
+
+class Item{i}:
+    # class comment
+    name = 'n{i}'
+
+'''
+
+def best_of(fn, repeat: int) -> float:
+  """Return the fastest wall time of repeat runs."""
+  best = float("inf")
+  for _ in range(repeat):
+    t0 = time.perf_counter()
+    fn()
+    best = min(best, time.perf_counter() - t0)
+  return best
+
+def legacy_clean(txt: str) -> str:
+  """bundler's surgical_clean before _cleaner: line-based, not string-aware (baseline only)."""
+  preserve = {"#!", "# ---", "# [start", "# [end"}
+  lines = txt.splitlines()
+  valid, prev_b = [], False
+  for i, line in enumerate(lines):
+    s = line.strip()
+    if s.startswith("#") and not any(s.lower().startswith(k) for k in preserve):
+      continue
+    if not s:
+      if (
+        i + 1 < len(lines)
+        and lines[i + 1].strip().startswith(("def ", "class ", "import ", "from ", "@"))
+        and not prev_b
+      ):
+        valid.append("")
+        prev_b = True
+      continue
+    valid.append(line.rstrip())
+    prev_b = False
+  return "\n".join(valid).rstrip() + "\n"
+
+def tokenize_clean(txt: str) -> str:
+  """clean_text with string lines found by stdlib tokenize instead of _cleaner's scanner (reference only)."""
+  lines = txt.split("\n")
+  if lines[-1] == "":
+    lines.pop()
+  starts, ends = set(), set()
+  for tok in tokenize.generate_tokens(io.StringIO(txt).readline):
+    (srow, _), (erow, _) = tok.start, tok.end
+    if tok.type == tokenize.STRING and erow > srow:
+      starts.update(range(srow + 1, erow + 1))
+      ends.update(range(srow, erow))
+  cleaner = LineCleaner(cleaner_config["preserve"], cleaner_config["blank_before"], False)
+  for row, line in enumerate(lines, 1):
+    cleaner.feed(line, row in starts, row in ends)
+  return "\n".join(cleaner.out).rstrip() + "\n"
+
+def bench_clean(sizes, repeat, opts=None, ws=None) -> List[Dict[str, Any]]:
+  """Throughput of the shared cleaner on synthetic files of growing size, against the legacy and tokenize cleaners."""
+  rows = []
+  for n in sizes:
+    txt = "".join(PY_BLOCK.format(i=i) for i in range(n))
+    lines, size = txt.count("\n"), len(txt.encode(CFG["encoding"]))
+    if tokenize_clean(txt) != clean_text(txt):
+      raise RuntimeError("clean_text differs from the tokenize reference")
+    t_legacy = best_of(lambda: legacy_clean(txt), repeat)
+    t_tokenize = best_of(lambda: tokenize_clean(txt), repeat)
+    t_text = best_of(lambda: clean_text(txt), repeat)
+    t_lint = best_of(
+      lambda: clean_text(txt, import_gap=True, drop_trailing_commas=True), repeat
+    )
+    t_stream = best_of(
+      lambda: sum(1 for _ in clean_lines(io.StringIO(txt).readline)), repeat
+    )
+    rows.append(
+      {
+        "blocks": n,
+        "lines": lines,
+        "bytes": size,
+        "legacy_s": round(t_legacy, 4),
+        "bundler_s": round(t_text, 4),
+        "vs_legacy": round(t_text / t_legacy, 2) if t_legacy else None,
+        "tokenize_s": round(t_tokenize, 4),
+        "vs_tokenize": round(t_tokenize / t_text, 2) if t_text else None,
+        "linter_s": round(t_lint, 4),
+        "stream_s": round(t_stream, 4),
+        "mb_per_s": round(size / t_text / 1e6, 2) if t_text else None,
+        "us_per_line": round(t_text / lines * 1e6, 3) if lines else None,
+      }
+    )
+  return rows
+
+def load_tool(rel: str):
+  """Import a framework tool or plugin by path (their file names contain dashes)."""
+  path = ROOT / rel
+  name = "bench_" + path.stem.replace("-", "_")
+  if name not in sys.modules:
+    spec = importlib.util.spec_from_file_location(name, path)
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[name] = mod
+    spec.loader.exec_module(mod)
+  return sys.modules[name]
+
+def call(rel: str, *argv) -> Dict[str, Any]:
+  """Run a tool in-process with CLI arguments; raises if it reports an error."""
+  mod = load_tool(rel)
+  parser = argparse.ArgumentParser(prog=rel)
+  (getattr(mod, "setup", None) or mod.setup_arguments)(parser)
+  args = parser.parse_args([str(a) for a in argv])
+  with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+    result = mod.run(args) if hasattr(mod, "run") else mod.run_task(args, {})
+  if isinstance(result, dict) and (result.get("status") == "error" or result.get("error")):
+    raise RuntimeError(f"{rel}: {result.get('msg') or result.get('message') or result.get('error')}")
+  return result
+
+def measure(fn: Callable, repeat: int, memory: bool = True, setup: Optional[Callable] = None) -> Dict[str, Any]:
+  """Best wall time of repeat runs, then one traced run for the peak Python heap."""
+  best = float("inf")
+  for _ in range(repeat):
+    if setup:
+      setup()
+    t0 = time.perf_counter()
+    fn()
+    best = min(best, time.perf_counter() - t0)
+  row = {"seconds": round(best, 4)}
+  if memory:
+    if setup:
+      setup()
+    tracemalloc.start()
+    try:
+      fn()
+      row["peak_kb"] = tracemalloc.get_traced_memory()[1] // 1024
+    finally:
+      tracemalloc.stop()
+  return row
+
+class Workspace:
+  """Generated corpora per size, under --corpus-dir or a temporary directory."""
+
+  def __init__(self, opts):
+    self.opts, self.made = opts, {}
+    self.tmp = None if opts.corpus_dir else tempfile.mkdtemp(prefix="bench-")
+    self.base = Path(opts.corpus_dir or self.tmp)
+
+  def corpus(self, n: int) -> Path:
+    root = self.base / f"n{n}"
+    if n not in self.made:
+      t0 = time.perf_counter()
+      stats = generate(root, n, self.opts.dirty, self.opts.seed)
+      stats["seconds"] = round(time.perf_counter() - t0, 4)
+      self.made[n] = stats
+    return root
+
+  def work(self, n: int, name: str) -> Path:
+    path = self.corpus(n) / "work" / name
+    shutil.rmtree(path, ignore_errors=True)
+    path.mkdir(parents=True)
+    return path
+
+  def stage_dirs(self, n: int) -> List[Path]:
+    return sorted(d for d in (self.corpus(n) / "protocols").glob("s*-*") if d.is_dir())
+
+  def close(self):
+    if self.tmp:
+      shutil.rmtree(self.tmp, ignore_errors=True)
+
+def bench_corpus(sizes, repeat, opts, ws) -> List[Dict[str, Any]]:
+  rows = []
+  for n in sizes:
+    ws.corpus(n)
+    rows.append({"size": n, "op": "generate", **ws.made[n]})
+  return rows
+
+def bench_nest(sizes, repeat, opts, ws) -> List[Dict[str, Any]]:
+  rows = []
+  for n in sizes:
+    dirs, work = ws.stage_dirs(n), ws.work(n, "nest")
+    nested, flat = work / "nested.json", work / "flat.json"
+    nest = lambda: call("framework/json-nest.py", "nest", *dirs, "-o", nested)
+    rows.append({"size": n, "op": "json-nest nest", **measure(nest, repeat, opts.memory)})
+    unnest = lambda: call("framework/json-nest.py", "unnest", nested, "-o", flat)
+    rows.append({"size": n, "op": "json-nest unnest", **measure(unnest, repeat, opts.memory)})
+  return rows
+
+def bench_minify(sizes, repeat, opts, ws) -> List[Dict[str, Any]]:
+  tool, rows = "framework/json-minify.py", []
+  for n in sizes:
+    dirs, work = ws.stage_dirs(n), ws.work(n, "minify")
+    km, out, exp = work / "keymap.json", work / "out", work / "expanded"
+    scan = lambda: call(tool, "scan", *dirs, "--key-map", km)
+    rows.append({"size": n, "op": "json-minify scan", **measure(scan, repeat, opts.memory)})
+    minify = lambda: call(tool, "minify", *dirs, "-o", out, "--key-map", km, "--null-removal")
+    rows.append({"size": n, "op": "json-minify minify", **measure(minify, repeat, opts.memory)})
+    expand = lambda: call(tool, "expand", out, "-o", exp, "--key-map", km)
+    rows.append({"size": n, "op": "json-minify expand", **measure(expand, repeat, opts.memory)})
+  return rows
+
+def bench_format(sizes, repeat, opts, ws) -> List[Dict[str, Any]]:
+  fmt, rows = load_tool("framework/json-minify.py").SmartFormatter, []
+  for n in sizes:
+    nested = ws.work(n, "format") / "nested.json"
+    call("framework/json-nest.py", "nest", *ws.stage_dirs(n), "-o", nested)
+    doc = json.loads(nested.read_text(encoding=CFG["encoding"]))
+    row = measure(lambda: fmt.smart_format(doc), repeat, opts.memory)
+    rows.append({"size": n, "op": "SmartFormatter", "bytes": nested.stat().st_size, **row})
+  return rows
+
+def bench_bundler(sizes, repeat, opts, ws) -> List[Dict[str, Any]]:
+  rows = []
+  for n in sizes:
+    src, work = ws.corpus(n) / "protocols", ws.work(n, "bundle")
+    for fmt in ("py", "pack"):
+      run = lambda: call("framework/bundler.py", src, "-o", work, "-m", "all", "-f", fmt)
+      rows.append({"size": n, "op": f"bundler {fmt}", **measure(run, repeat, opts.memory)})
+  return rows
+
+def bench_verify(sizes, repeat, opts, ws) -> List[Dict[str, Any]]:
+  rows = []
+  for n in sizes:
+    dirs = ws.stage_dirs(n)
+    schema = ws.corpus(n) / "protocols" / "protocol-schema.json"
+    for extra in ([], ["--fast"]):
+      run = lambda: call("plugins/verify-json.py", *dirs, "-s", schema, "--no-cache", *extra)
+      op = "verify-json" + (" --fast" if extra else "")
+      rows.append({"size": n, "op": op, **measure(run, repeat, opts.memory)})
+  return rows
+
+def run_pipeline(src: Path, build: Path, binary: bool = False) -> Dict[str, float]:
+  """The JSON stages of build.sh, in-process, returning seconds per step.
+
+  binary keeps stage documents, aggregates and the compact kernel in the
+  binary tree format, as build.sh does; kernels stay JSON either way.
+  """
+  shutil.rmtree(build, ignore_errors=True)
+  prot, steps = build / "protocols", {}
+  ext = ".bjson" if binary else ".json"
+  prot.mkdir(parents=True)
+  llms = corpus_config["llms"]
+
+  def step(name, fn):
+    t0 = time.perf_counter()
+    fn()
+    steps[name] = round(steps.get(name, 0) + time.perf_counter() - t0, 4)
+
+  def minify():
+    names = ["protocol-schema", "rules"] + [f"{k}-{llm}" for k in ("rules", "orchestration") for llm in llms]
+    call("framework/json-minify.py", "minify", *(src / f"{x}.json" for x in names), "--null-removal", "-o", prot)
+    for f in prot.glob("*-out.json"):
+      f.rename(f.with_name(f.name[: -len("-out.json")] + ".json"))
+
+  def nest_stages():
+    for d in sorted(x for x in src.glob("s*-*") if x.is_dir()):
+      call("plugins/nest-json.py", "nest", d, "-o", prot / f"{d.name}{ext}", "--length", d.name)
+
+  def aggregate():
+    for llm in llms:
+      files = sorted(prot.glob(f"s*{llm}*{ext}"))
+      call("plugins/nest-json.py", "nest", *files, "-o", prot / f"protocols-{llm}{ext}", "--sum", f"protocols-{llm}")
+      for f in files:
+        f.unlink()
+
+  def kernels():
+    for llm in llms:
+      call(
+        "plugins/nest-json.py", "nest",
+        prot / f"orchestration-{llm}.json", prot / f"rules-{llm}.json",
+        prot / "protocol-schema.json", prot / f"protocols-{llm}{ext}",
+        "-o", build / f"kernel-{llm}.json", "--length", "rules", "--sum", f"protocols-{llm}",
+        "--wrap", KERNEL_WRAP,
+      )
+
+  def session():
+    for llm in llms:
+      dist = build / "dist" / llm
+      compact = ["--binary"] if binary else ["--compact"]
+      call("framework/json-minify.py", "minify", build / f"kernel-{llm}.json", "--null-removal", *compact, "-o", dist)
+      call("plugins/build-session.py", dist / f"kernel-{llm}-out{ext}", "-o", dist)
+
+  step("minify", minify)
+  step("nest-stages", nest_stages)
+  step("aggregate", aggregate)
+  step("kernels", kernels)
+  step("lock-baseline", lambda: call("plugins/lock-baseline.py", *sorted(build.glob("kernel-*.json"))))
+  step("verify", lambda: call("plugins/verify-json.py", prot, "-a", "--no-cache"))
+  step("session", session)
+  return steps
+
+def bench_pipeline(sizes, repeat, opts, ws) -> List[Dict[str, Any]]:
+  rows = []
+  for n in sizes:
+    src, build = ws.corpus(n) / "protocols", ws.work(n, "pipeline") / "build"
+    for binary in (False, True):
+      best = None
+      for _ in range(repeat):
+        steps = run_pipeline(src, build, binary)
+        if best is None or sum(steps.values()) < sum(best.values()):
+          best = steps
+      op = "pipeline binary" if binary else "pipeline"
+      row = {"size": n, "op": op, "seconds": round(sum(best.values()), 4), "steps": best}
+      if opts.memory:
+        tracemalloc.start()
+        try:
+          run_pipeline(src, build, binary)
+          row["peak_kb"] = tracemalloc.get_traced_memory()[1] // 1024
+        finally:
+          tracemalloc.stop()
+      rows.append(row)
+  return rows
+
+def bench_codec(sizes, repeat, opts, ws) -> List[Dict[str, Any]]:
+  """Every available JSON backend on a kernel the pipeline builds, with speedup over the stdlib."""
+  rows, active = [], _codec.backend()
+  try:
+    for n in sizes:
+      build = ws.work(n, "codec") / "build"
+      run_pipeline(ws.corpus(n) / "protocols", build)
+      text = (build / f"kernel-{corpus_config['llms'][0]}.json").read_text(encoding=CFG["encoding"])
+      doc, base = json.loads(text), {}
+      for name in _codec.available():
+        _codec.use(name)
+        cases = {
+          "loads": lambda: _codec.loads(text),
+          "dumps indent": lambda: _codec.dumps(doc, indent=2, ensure_ascii=False),
+          "dumps compact": lambda: _codec.dumps(doc, separators=(",", ":"), ensure_ascii=False),
+          "dumps ascii": lambda: _codec.dumps(doc, indent=2),
+        }
+        for op, fn in cases.items():
+          row = {"size": n, "op": f"{name} {op}", "bytes": len(text.encode(CFG["encoding"]))}
+          row.update(measure(fn, repeat, opts.memory))
+          if name == "stdlib":
+            base[op] = row["seconds"]
+          rows.append(row)
+      for row in rows:
+        op = row["op"].split(" ", 1)[1]
+        if row["size"] == n and base.get(op) and row["seconds"]:
+          row["vs_stdlib"] = round(base[op] / row["seconds"], 2)
+  finally:
+    _codec.use(active)
+  return rows
+
+def bench_bintree(sizes, repeat, opts, ws) -> List[Dict[str, Any]]:
+  """An aggregated protocols document as pretty JSON vs the binary tree format, with speedup over JSON."""
+  rows = []
+  for n in sizes:
+    build = ws.work(n, "bintree") / "build"
+    run_pipeline(ws.corpus(n) / "protocols", build)
+    text = (build / "protocols" / f"protocols-{corpus_config['llms'][0]}.json").read_text(encoding=CFG["encoding"])
+    doc = _codec.loads(text)
+    blob = _bintree.encode(doc)
+    cases = {
+      "json read": (len(text.encode(CFG["encoding"])), lambda: _codec.loads(text), None),
+      "json write": (len(text.encode(CFG["encoding"])), lambda: _codec.dumps(doc, indent=2, ensure_ascii=False), None),
+      "binary read": (len(blob), lambda: _bintree.decode(blob), "json read"),
+      "binary open": (len(blob), lambda: _bintree.decode(blob, lazy=True), "json read"),
+      "binary write": (len(blob), lambda: _bintree.encode(doc), "json write"),
+      "binary splice": (len(blob), lambda: _bintree.encode(_bintree.decode(blob, lazy=True)), "json write"),
+    }
+    base = {}
+    for op, (size, fn, versus) in cases.items():
+      row = {"size": n, "op": op, "bytes": size, **measure(fn, repeat, opts.memory)}
+      base[op] = row["seconds"]
+      if versus and row["seconds"]:
+        row["vs_json"] = round(base[versus] / row["seconds"], 2)
+      rows.append(row)
+  return rows
+
+def kernel_variant(text: str, llm: str, name: str, offset: int) -> str:
+  """The kernel retargeted to name, with one protocol in every CFG["edit_every"] given an extra step."""
+  doc = _codec.loads(text.replace(llm, name))
+  for key, section in doc.items():
+    if key.startswith("protocols-") and isinstance(section, dict):
+      for group in section.values():
+        if isinstance(group, dict):
+          for i, proto in enumerate(group.values()):
+            if isinstance(proto, dict) and (i + offset) % CFG["edit_every"] == 0:
+              proto["steps"] = proto.get("steps", []) + [f"{name} specific step"]
+  return _codec.dumps(doc, indent=2, ensure_ascii=False)
+
+def bench_overlay(sizes, repeat, opts, ws) -> List[Dict[str, Any]]:
+  """Mostly shared per-target kernels: each parsed and serialized on its own vs composed from one core."""
+  rows, llm = [], corpus_config["llms"][0]
+  for n in sizes:
+    build = ws.work(n, "overlay") / "build"
+    run_pipeline(ws.corpus(n) / "protocols", build)
+    text = (build / f"kernel-{llm}.json").read_text(encoding=CFG["encoding"])
+    for targets in CFG["targets"]:
+      names = [f"target{i}" for i in range(targets)]
+      texts = [kernel_variant(text, llm, name, i) for i, name in enumerate(names)]
+      docs = [template(_codec.loads(t), name) for t, name in zip(texts, names)]
+      core = common(docs)
+      core_text = _codec.dumps(core, indent=2, ensure_ascii=False)
+      overlays = [(name, _codec.dumps(derive(core, d), indent=2, ensure_ascii=False)) for name, d in zip(names, docs)]
+      composer = Composer(_codec.loads(core_text))
+      if any(composer.text(name, _codec.loads(o)) != t for (name, o), t in zip(overlays, texts)):
+        raise RuntimeError("composed variant differs from its kernel")
+
+      def independent():
+        for t in texts:
+          _codec.dumps(_codec.loads(t), indent=2, ensure_ascii=False)
+
+      def composed():
+        composer = Composer(_codec.loads(core_text))
+        for name, o in overlays:
+          composer.text(name, _codec.loads(o))
+
+      base = {"size": n, "targets": targets, "kernel_kb": len(text) // 1024}
+      alone = {**base, "op": f"independent x{targets}", **measure(independent, repeat, opts.memory)}
+      shared = {**base, "op": f"compose x{targets}", **measure(composed, repeat, opts.memory)}
+      shared["overlay_kb"] = sum(len(o) for _, o in overlays) // targets // 1024
+      if shared["seconds"]:
+        shared["vs_independent"] = round(alone["seconds"] / shared["seconds"], 2)
+      rows += [alone, shared]
+  return rows
+
+def retained(fn: Callable) -> int:
+  """Python heap still held by fn's result, in KB."""
+  tracemalloc.start()
+  try:
+    result = fn()
+    kept = tracemalloc.get_traced_memory()[0] // 1024
+  finally:
+    tracemalloc.stop()
+  del result
+  return kept
+
+def bench_docmodel(sizes, repeat, opts, ws) -> List[Dict[str, Any]]:
+  """Every LLM's kernel held in memory at once: plain parse vs the interned compact model."""
+  rows, llms = [], corpus_config["llms"]
+  for n in sizes:
+    build = ws.work(n, "docmodel") / "build"
+    run_pipeline(ws.corpus(n) / "protocols", build)
+    texts = [(build / f"kernel-{llm}.json").read_bytes() for llm in llms]
+
+    def compact():
+      interner = _docmodel.Interner()
+      return [_docmodel.loads(t, interner) for t in texts]
+
+    cases = {"plain": lambda: [_codec.loads(t) for t in texts], "compact": compact}
+    base = None
+    for op, fn in cases.items():
+      row = {"size": n, "op": f"{op} x{len(texts)}", "bytes": sum(map(len, texts))}
+      row.update(measure(fn, repeat, opts.memory))
+      row["kept_kb"] = retained(fn)
+      if base is None:
+        base = row["kept_kb"]
+      elif row["kept_kb"]:
+        row["vs_plain"] = round(base / row["kept_kb"], 2)
+      rows.append(row)
+  return rows
+
+def gate_records(n: int, seed: int) -> List[Dict[str, Any]]:
+  """Synthetic s1-ingest outputs: mostly clean, a few risky, PII-bearing or not JSON."""
+  rng, out = random.Random(seed), []
+  for i in range(n):
+    out.append({
+      "is-json": rng.random() > 0.01,
+      "schema-match": True,
+      "risk": round(rng.random(), 3),
+      "pii": rng.random() < 0.02,
+      "answer": f"claim {i}",
+    })
+  return out
+
+def bench_validators(sizes, repeat, opts, ws) -> List[Dict[str, Any]]:
+  """orchestration.json validators gating stage outputs: fused batch vs one check per record."""
+  doc = json.loads((ROOT / "protocols" / "orchestration.json").read_text(encoding=CFG["encoding"]))
+  orchestration, rows = _validators.find_orchestration(doc), []
+  for n in sizes:
+    records = gate_records(n, opts.seed)
+    stage = _validators.Gate(orchestration, CFG["gate_context"]).stage(CFG["gate_stage"])
+    cases = {
+      "compile": lambda: [_validators.Gate(orchestration).stage(s) for s in orchestration["stages"]],
+      "batch": lambda: stage.evaluate(records),
+      "per record": lambda: [stage.halted(r) for r in records],
+    }
+    for op, fn in cases.items():
+      row = {"size": n, "op": op}
+      row.update(measure(fn, repeat, opts.memory))
+      if op != "compile" and row["seconds"]:
+        row["records_per_s"] = round(n / row["seconds"])
+      rows.append(row)
+  return rows
+
+def bench_engine(sizes, repeat, opts, ws) -> List[Dict[str, Any]]:
+  """Sessions through the orchestration stage graph on the stub backend: engine overhead per session."""
+  doc = json.loads((ROOT / "protocols" / "orchestration.json").read_text(encoding=CFG["encoding"]))
+  orchestration, rows = _validators.find_orchestration(doc), []
+  for n in sizes:
+    for fail_rate in CFG["engine_fail_rates"]:
+      summary = {}
+
+      def run():
+        gate = _engine.make_gate(orchestration, CFG["gate_context"])
+        engine = _engine.Engine(gate, _engine.StubBackend(gate, opts.seed, fail_rate))
+        summary.update(asyncio.run(engine.run({"id": i, "input": None} for i in range(n))))
+
+      row = {"size": n, "op": f"stub fail {fail_rate:g}"}
+      row.update(measure(run, repeat, opts.memory))
+      if row["seconds"]:
+        row["sessions_per_s"] = round(n / row["seconds"])
+      row["completed"], row["retries"] = summary["sessions"]["completed"], summary["retries"]
+      rows.append(row)
+  return rows
+
+SUITES = {
+  "bintree": bench_bintree,
+  "clean": bench_clean,
+  "codec": bench_codec,
+  "corpus": bench_corpus,
+  "nest": bench_nest,
+  "docmodel": bench_docmodel,
+  "overlay": bench_overlay,
+  "minify": bench_minify,
+  "format": bench_format,
+  "bundler": bench_bundler,
+  "verify": bench_verify,
+  "pipeline": bench_pipeline,
+  "validators": bench_validators,
+  "engine": bench_engine,
+}
+CORPUS_SUITES = ["corpus", "nest", "minify", "format", "bundler", "clean", "verify", "pipeline", "codec", "bintree", "overlay", "docmodel", "validators", "engine"]
+
+def git_commit() -> Optional[str]:
+  with contextlib.suppress(OSError, subprocess.CalledProcessError):
+    return subprocess.check_output(
+      ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL, encoding="utf-8"
+    ).strip()
+  return None
+
+def compare(rows: List[Dict[str, Any]], base: Dict[str, Any]) -> None:
+  """Annotate rows with the matching baseline time and new/old ratio."""
+  old = {(r.get("suite"), r.get("op"), r.get("size")): r for r in base.get("results", [])}
+  for r in rows:
+    prev = old.get((r.get("suite"), r.get("op"), r.get("size")))
+    if prev and prev.get("seconds") and "seconds" in r:
+      r["baseline_s"] = prev["seconds"]
+      r["ratio"] = round(r["seconds"] / prev["seconds"], 3)
+
+def setup(parser: argparse.ArgumentParser) -> None:
+  parser.add_argument("suite", choices=sorted(SUITES) + ["all"], help="Benchmark suite")
+  parser.add_argument(
+    "--sizes", type=int, nargs="+", default=[100, 1000, 10000], help="Scale points"
+  )
+  parser.add_argument("--repeat", type=int, default=CFG["repeat"])
+  parser.add_argument("-o", "--output", type=Path, help="Write results JSON here")
+  parser.add_argument("--compare", type=Path, help="Earlier results JSON to compare against")
+  parser.add_argument("--corpus-dir", type=Path, help="Keep generated corpora here")
+  parser.add_argument("--dirty", type=float, default=CFG["dirty"], help="Share of dirty JSON files")
+  parser.add_argument("--seed", type=int, default=CFG["seed"])
+  parser.add_argument(
+    "--no-memory", dest="memory", action="store_false", help="Skip tracemalloc peak runs"
+  )
+  parser.add_argument(
+    "--backend", choices=sorted(_codec.BACKENDS), help="JSON backend for the tools (default: fastest available)"
+  )
+
+def run(args: argparse.Namespace, context: Optional[Dict] = None) -> Dict[str, Any]:
+  ws = None
+  try:
+    names = CORPUS_SUITES if args.suite == "all" else [args.suite]
+    _codec.use(args.backend)
+    ws = Workspace(args)
+    rows = []
+    for name in names:
+      fn = SUITES[name]
+      found = fn(args.sizes, args.repeat, args, ws)
+      rows.extend({"suite": name, **r} for r in found)
+    if args.compare:
+      compare(rows, json.loads(args.compare.read_text(encoding=CFG["encoding"])))
+    result = {
+      "status": "success",
+      "suite": args.suite,
+      "commit": git_commit(),
+      "python": platform.python_version(),
+      "platform": platform.platform(),
+      "backend": _codec.backend(),
+      "sizes": args.sizes,
+      "repeat": args.repeat,
+      "results": rows,
+      "exit_code": 0
+    }
+    if args.output:
+      args.output.parent.mkdir(parents=True, exist_ok=True)
+      args.output.write_text(json.dumps(result, indent=2), encoding=CFG["encoding"])
+    return result
+  except Exception as e:
+    return {
+      "status": "error",
+      "msg": str(e),
+      "error_type": type(e).__name__,
+      "exit_code": 1
+    }
+  finally:
+    if ws:
+      ws.close()
+
+def main():
+  parser = argparse.ArgumentParser(prog="bench")
+  setup(parser)
+  result = run(parser.parse_args())
+  print(json.dumps(result, indent=2))
+  sys.exit(result.get("exit_code", 1))
+
+if __name__ == "__main__":
+  main()
@@ -8,8 +8,15 @@ import os
 import subprocess
 import sys
 import tempfile
+import time
 from pathlib import Path
 
+from _chunkstore import CODECS, PackReader, write_pack
+from _cleaner import clean_text
+from _codec import dumps, loads
+from _trace import add_arguments as add_trace_arguments
+from _trace import count, span, tracing
+
 config = {
   "ignore_patterns": {".git", "__pycache__", "node_modules", ".env", ".venv", "dist"},
   "default_extensions": {".py", ".json"},
@@ -26,25 +33,27 @@ def get_hash(s, algo="sha256"):
 
 def surgical_clean(txt):
   """Minify Python code specifically. Returns content with exactly one trailing newline."""
-  preserve = {"#!", "# ---", "# [start", "# [end"}
-  lines = txt.splitlines()
-  valid, prev_b = [], False
-  for i, line in enumerate(lines):
-    s = line.strip()
-    if s.startswith("#") and not any(s.lower().startswith(k) for k in preserve):
-      continue
-    if not s:
-      if (
-        i + 1 < len(lines)
-        and lines[i + 1].strip().startswith(("def ", "class ", "import ", "from ", "@"))
-        and not prev_b
-      ):
-        valid.append("")
-        prev_b = True
-      continue
-    valid.append(line.rstrip())
-    prev_b = False
-  return "\n".join(valid).rstrip() + "\n"
+  return clean_text(txt)
+
+def index_path(bundle):
+  """Sidecar offset index stored next to a bundle."""
+  return Path(bundle).with_suffix(".index.json")
+
+def build_bundle(entries, algo="sha256"):
+  """Assemble bundle text from (rel, hash, txt) entries plus a byte-offset index."""
+  enc = config["encoding"]
+  body = "\n\n".join(
+    f"# [start: {rel} | {h}]\n{txt}# [end: {rel}]" for rel, h, txt in entries
+  )
+  bundle_hash = get_hash(body, algo)
+  header = f"#!/usr/bin/env python3\n# --- bundle | {bundle_hash} ---\n\n"
+  pos, files = len(header.encode(enc)), {}
+  for rel, h, txt in entries:
+    pos += len(f"# [start: {rel} | {h}]\n".encode(enc))
+    size = len(txt.encode(enc))
+    files[rel] = {"offset": pos, "length": size, "hash": h}
+    pos += size + len(f"# [end: {rel}]\n\n".encode(enc))
+  return header + body + "\n", {"hash": bundle_hash, "algo": algo, "files": files}
 
 def setup(p):
   """Standard dispatcher setup."""
@@ -65,6 +74,20 @@ def setup(p):
   p.add_argument(
     "--clean", action="store_true", help="Apply surgical cleaning to .py files"
   )
+  p.add_argument(
+    "-f",
+    "--format",
+    choices=["py", "pack"],
+    default="py",
+    help="Plain bundle.py or deduplicated chunk store bundle.pack",
+  )
+  p.add_argument(
+    "--codec", choices=sorted(CODECS), default="zlib", help="Chunk compression (pack)"
+  )
+  p.add_argument(
+    "--compare", action="store_true", help="Measure py vs pack size and timings"
+  )
+  add_trace_arguments(p)
 
 def atomic_write(path, content, is_json=False):
   """Helper to write files safely using a temporary file to prevent corruption."""
@@ -72,59 +95,104 @@ def atomic_write(path, content, is_json=False):
     "w", dir=path.parent, delete=False, encoding=config["encoding"]
   ) as tf:
     if is_json:
-      json.dump(content, tf, indent=2)
+      tf.write(dumps(content, indent=2))
     else:
       tf.write(content)
     temp_name = tf.name
   os.replace(temp_name, path)
 
+def compare_formats(entries, algo, codec):
+  """Measure size, write time and full extraction time of both bundle formats."""
+  enc, res = config["encoding"], {}
+  with tempfile.TemporaryDirectory() as td:
+    plain, pack = Path(td) / "bundle.py", Path(td) / "bundle.pack"
+    t0 = time.perf_counter()
+    text, index = build_bundle(entries, algo)
+    atomic_write(plain, text)
+    t1 = time.perf_counter()
+    with plain.open("rb") as fh:
+      for e in index["files"].values():
+        fh.seek(e["offset"])
+        fh.read(e["length"]).decode(enc)
+    t2 = time.perf_counter()
+    stats = write_pack(pack, entries, algo, codec)
+    t3 = time.perf_counter()
+    with PackReader(pack) as r:
+      for rel in r.files:
+        r.read(rel)
+    t4 = time.perf_counter()
+    res["py"] = {
+      "bytes": plain.stat().st_size,
+      "write_s": round(t1 - t0, 4),
+      "extract_s": round(t2 - t1, 4),
+    }
+    res["pack"] = {
+      "bytes": pack.stat().st_size,
+      "write_s": round(t3 - t2, 4),
+      "extract_s": round(t4 - t3, 4),
+      "codec": codec,
+      "chunks": stats["chunks"],
+      "chunk_refs": stats["refs"],
+    }
+  res["size_ratio"] = round(res["pack"]["bytes"] / res["py"]["bytes"], 4)
+  return res
+
 def run(a):
   """Main execution logic."""
+  with tracing(a, "bundler", mode=a.mode, format=a.format) as trace:
+    result = bundle(a)
+  if trace.get("summary"):
+    result["trace"] = trace["summary"]
+  return result
+
+def bundle(a):
   out_dir = Path(a.out_dir)
   out_dir.mkdir(parents=True, exist_ok=True)
-  out_file = out_dir / "bundle.py"
+  out_file = out_dir / ("bundle.pack" if a.format == "pack" else "bundle.py")
   mf_p = out_dir / "manifest.json"
   root = Path.cwd()
   mf = {}
   if mf_p.exists():
     with contextlib.suppress(json.JSONDecodeError, OSError):
-      mf = json.loads(mf_p.read_text(encoding=config["encoding"]))
+      mf = loads(mf_p.read_text(encoding=config["encoding"]))
   fs, warnings = [], []
-  for path in a.paths:
-    if a.mode in ("git", "changed"):
-      cmd = (
-        ["git", "ls-files"]
-        if a.mode == "git"
-        else ["git", "ls-files", "-o", "--exclude-standard"]
-      )
-      try:
-        files = subprocess.check_output(
-          cmd + [path], encoding=config["encoding"]
-        ).splitlines()
-        fs.extend(
-          [
-            Path(f).resolve()
-            for f in files
-            if Path(f).suffix in config["default_extensions"]
-          ]
+  with span("discover"):
+    for path in a.paths:
+      if a.mode in ("git", "changed"):
+        cmd = (
+          ["git", "ls-files"]
+          if a.mode == "git"
+          else ["git", "ls-files", "-o", "--exclude-standard"]
         )
-      except subprocess.CalledProcessError:
-        warnings.append(f"Git command failed for {path}")
-    else:
-      target = Path(path).resolve()
-      if target.is_file():
-        fs.append(target)
+        try:
+          files = subprocess.check_output(
+            cmd + [path], encoding=config["encoding"]
+          ).splitlines()
+          fs.extend(
+            [
+              Path(f).resolve()
+              for f in files
+              if Path(f).suffix in config["default_extensions"]
+            ]
+          )
+        except subprocess.CalledProcessError:
+          warnings.append(f"Git command failed for {path}")
       else:
-        fs.extend(
-          [
-            f.resolve()
-            for f in target.rglob("*")
-            if f.is_file() and f.suffix in config["default_extensions"]
-          ]
-        )
+        target = Path(path).resolve()
+        if target.is_file():
+          fs.append(target)
+        else:
+          fs.extend(
+            [
+              f.resolve()
+              for f in target.rglob("*")
+              if f.is_file() and f.suffix in config["default_extensions"]
+            ]
+          )
+  count("files", len(fs))
   if not fs:
     return {"status": "error", "msg": "No files found", "exit_code": 1}
-  items, state = [], {}
+  entries, state = [], {}
   for f in sorted(set(fs)):
     if any(p in f.parts for p in config["ignore_patterns"]):
       continue
@@ -132,15 +200,19 @@ def run(a):
       rel = str(f.relative_to(root)).replace("\\", "/")
     except ValueError:
       rel = str(f).replace("\\", "/")
-    txt_raw = f.read_text(encoding=config["encoding"], errors=config["encoding_errors"])
-    txt = (
-      surgical_clean(txt_raw) if a.clean and f.suffix == ".py" else txt_raw.strip() + "\n"
-    )
-    h = get_hash(txt, a.algo)
+    with span("file", "file", file=rel):
+      with span("read"):
+        txt_raw = f.read_text(encoding=config["encoding"], errors=config["encoding_errors"])
+      count("bytes_read", len(txt_raw))
+      with span("transform"):
+        txt = (
+          surgical_clean(txt_raw) if a.clean and f.suffix == ".py" else txt_raw.strip() + "\n"
+        )
+        h = get_hash(txt, a.algo)
     state[rel] = h
     if not a.diff or mf.get(rel) != h:
-      items.append(f"# [start: {rel} | {h}]\n{txt}# [end: {rel}]")
-  if not items:
+      entries.append((rel, h, txt))
+  if not entries:
     if a.diff:
       if a.manifest:
         atomic_write(mf_p, state, is_json=True)
@@ -149,25 +221,37 @@ def run(a):
       return {"status": "error", "msg": "No files matching criteria", "exit_code": 1}
   if a.manifest:
     atomic_write(mf_p, state, is_json=True)
-  body = "\n\n".join(items)
-  bundle_header = (
-    f"#!/usr/bin/env python3\n# --- bundle | {get_hash(body, a.algo)} ---\n\n"
-  )
-  atomic_write(out_file, bundle_header + body + "\n")
-  return {
+  result = {
     "status": "success",
     "bundle": str(out_file),
     "total": len(fs),
-    "bundled": len(items),
+    "bundled": len(entries),
     "warnings": warnings,
     "exit_code": 0
   }
+  if a.format == "pack":
+    with span("write", file=str(out_file)):
+      result["pack"] = write_pack(out_file, entries, a.algo, a.codec)
+  else:
+    with span("serialize"):
+      text, index = build_bundle(entries, a.algo)
+      index.update({"diff": a.diff, "state": state})
+    with span("write", file=str(out_file)):
+      atomic_write(out_file, text)
+      atomic_write(index_path(out_file), index, is_json=True)
+    result["index"] = str(index_path(out_file))
+  count("bytes_written", out_file.stat().st_size)
+  if a.compare:
+    result["compare"] = compare_formats(entries, a.algo, a.codec)
+  return result
 
 def main():
   parser = argparse.ArgumentParser(prog="bundler")
   setup(parser)
   args = parser.parse_args()
   result = run(args)
+  if args.compare and "compare" in result:
+    print(dumps(result["compare"], indent=2))
   warnings = result.get("warnings", [])
   if warnings:
     print(f" ({len(warnings)} warning{'s' if len(warnings) > 1 else ''})")
@@ -2,35 +2,55 @@
 # --- framework/json-minify.py | checksum: auto ---
 import argparse
 import contextlib
-import json
 import sys
+from operator import is_
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import _bintree
+from _canonical import dumps as canonical_dumps
+from _canonical import normalize
+from _codec import dumps, is_object, loads
+from _docmodel import loads as load_compact
+from _trace import add_arguments as add_trace_arguments
+from _trace import count, span, tracing
 
 CFG = {"encoding": "utf-8", "compact_threshold": 80}
+BINARY = _bintree.config["suffix"]
 
 def find_files(paths: List[str]) -> List[Path]:
   """High-performance recursive file discovery."""
   results = []
   for p in paths:
     path = Path(p)
-    if path.is_file() and path.suffix.lower() in {".json", ".csv"}:
+    if path.is_file() and path.suffix.lower() in {".json", ".csv", BINARY}:
       results.append(path)
     elif path.is_dir():
       results.extend(path.rglob("*.json"))
       results.extend(path.rglob("*.csv"))
+      results.extend(path.rglob(f"*{BINARY}"))
   return sorted(set(results))
 
+def parse_input(raw: bytes, compact: bool = False) -> Tuple[Any, Optional[str]]:
+  """Decode file bytes: (data, source text), with no text for binary tree input.
+
+  compact holds JSON in the interned model: less memory, a slower parse.
+  """
+  if _bintree.is_tree(raw):
+    return _bintree.decode(raw), None
+  text = raw.decode(CFG["encoding"])
+  return (load_compact(text) if compact else loads(text)), text
+
 def extract_keys(data: Any, keys: Optional[Set[str]] = None) -> Set[str]:
   """Recursively extract all keys from nested structures."""
   if keys is None:
     keys = set()
-  if isinstance(data, dict):
+  if is_object(data):
     for k, v in data.items():
       if not k.startswith("_"):
         keys.add(k)
       extract_keys(v, keys)
-  elif isinstance(data, list):
+  elif isinstance(data, (list, tuple)):
     for item in data:
       extract_keys(item, keys)
   return keys
@@ -79,16 +99,16 @@ class SmartFormatter:
     elif isinstance(obj, bool):
       return "true" if obj else "false"
     elif isinstance(obj, (int, float, str)):
-      return json.dumps(obj)
-    elif isinstance(obj, list):
-      compact = json.dumps(obj, separators=(",", ":"))
+      return dumps(obj)
+    elif isinstance(obj, (list, tuple)):
+      compact = dumps(obj, separators=(",", ":"))
       if len(compact) <= threshold:
         return compact
       items = [SmartFormatter.smart_format(i, indent + 2, threshold) for i in obj]
       inner = ",\n" + " " * (indent + 2)
       return f"[\n{' ' * (indent + 2)}{inner.join(items)}\n{' ' * indent}]"
-    elif isinstance(obj, dict):
-      compact = json.dumps(obj, separators=(",", ":"))
+    elif is_object(obj):
+      compact = dumps(obj, separators=(",", ":"))
       if len(compact) <= threshold:
         return compact
       items = [
@@ -97,7 +117,7 @@ class SmartFormatter:
       ]
       inner = ",\n" + " " * (indent + 2)
       return f"{{\n{' ' * (indent + 2)}{inner.join(items)}\n{' ' * indent}}}"
-    return json.dumps(obj)
+    return dumps(obj)
 
 class MinimalKeyAbbreviator:
   """Manages bidirectional key mapping for minification/expansion."""
@@ -131,15 +151,15 @@ class MinimalKeyAbbreviator:
     """Apply key mapping in forward or reverse direction."""
     if reverse:
       mapping = self.short_to_long
-      if isinstance(obj, dict):
+      if is_object(obj):
         return {mapping.get(k, k): self.apply(v, reverse=True) for k, v in obj.items()}
-      elif isinstance(obj, list):
+      elif isinstance(obj, (list, tuple)):
         return [self.apply(i, reverse=True) for i in obj]
       return obj
     else:
-      if isinstance(obj, dict):
+      if is_object(obj):
         return {self.abbreviate(k): self.apply(v, reverse=False) for k, v in obj.items()}
-      elif isinstance(obj, list):
+      elif isinstance(obj, (list, tuple)):
         return [self.apply(i, reverse=False) for i in obj]
       return obj
 
@@ -157,7 +177,7 @@ class KeyedJSONConverter:
   @staticmethod
   def is_keyed_json(data: Any) -> bool:
     """Check if data is in keyed JSON format."""
-    return isinstance(data, dict) and "_schema" in data
+    return is_object(data) and "_schema" in data
 
   @staticmethod
   def to_keyed(records: List[Dict], key_field: str) -> Dict:
@@ -204,6 +224,16 @@ class KeyedJSONConverter:
       records.append(rec)
     return records
 
+def keep(old: Any, new: Any) -> Any:
+  """old itself when new, built from old's items in order, holds the very same values.
+
+  Untouched subtrees then stay shared with the input instead of being copied.
+  """
+  if len(new) != len(old):
+    return new
+  pairs = (new.values(), old.values()) if type(new) is dict else (new, old)
+  return old if all(map(is_, *pairs)) else new
+
 class OptimizationEngine:
   """Unified transformation engine for all optimization modes."""
 
@@ -216,12 +246,12 @@ class OptimizationEngine:
     """Remove null values from data structures."""
 
     def proc(o):
-      if isinstance(o, dict):
-        return {
+      if is_object(o):
+        return keep(o, {
           k: v for k, v in ((kk, proc(vv)) for kk, vv in o.items()) if v is not None
-        }
-      elif isinstance(o, list):
-        return [x for x in (proc(i) for i in o) if x is not None]
+        })
+      elif isinstance(o, (list, tuple)):
+        return keep(o, [x for x in (proc(i) for i in o) if x is not None])
       return o
     self.data = proc(self.data)
     self.optimizations.append("null-removal")
@@ -231,10 +261,10 @@ class OptimizationEngine:
     """Convert booleans to 1/0."""
 
     def proc(o):
-      if isinstance(o, dict):
-        return {k: proc(v) for k, v in o.items()}
-      elif isinstance(o, list):
-        return [proc(i) for i in o]
+      if is_object(o):
+        return keep(o, {k: proc(v) for k, v in o.items()})
+      elif isinstance(o, (list, tuple)):
+        return keep(o, [proc(i) for i in o])
       elif isinstance(o, bool):
         return 1 if o else 0
       return o
@@ -254,9 +284,9 @@ class OptimizationEngine:
     """Expand abbreviated keys back to original names."""
 
     def proc(o):
-      if isinstance(o, dict):
+      if is_object(o):
         return {short_to_long.get(k, k): proc(v) for k, v in o.items()}
-      elif isinstance(o, list):
+      elif isinstance(o, (list, tuple)):
         return [proc(i) for i in o]
       return o
     self.data = proc(self.data)
@@ -285,20 +315,20 @@ class OptimizationEngine:
     """Flatten nested structures into dot-notation keys."""
 
     def flat(obj, p=""):
-      if isinstance(obj, dict):
+      if is_object(obj):
         res = {}
         for k, v in obj.items():
           nk = f"{p}_{k}" if p else k
-          if isinstance(v, (dict, list)):
+          if is_object(v) or isinstance(v, (list, tuple)):
             res.update(flat(v, nk))
           else:
             res[nk] = v
         return res
-      elif isinstance(obj, list):
+      elif isinstance(obj, (list, tuple)):
         res = {}
         for i, v in enumerate(obj):
           nk = f"{p}_{i}" if p else str(i)
-          if isinstance(v, (dict, list)):
+          if is_object(v) or isinstance(v, (list, tuple)):
             res.update(flat(v, nk))
           else:
             res[nk] = v
@@ -334,6 +364,9 @@ def setup(parser: argparse.ArgumentParser) -> None:
   minify_p.add_argument("--key-map", type=Path, help="Keymap file path")
   minify_p.add_argument("--compact", action="store_true", help="Compact JSON output")
   minify_p.add_argument("--pretty", action="store_true", help="Pretty print JSON output")
+  minify_p.add_argument(
+    "--binary", action="store_true", help=f"Write the binary tree format (*-out{BINARY})"
+  )
   minify_p.add_argument("--null-removal", action="store_true", help="Remove null values")
   minify_p.add_argument(
     "--bool-compress", action="store_true", help="Compress booleans to 0/1"
@@ -344,31 +377,61 @@ def setup(parser: argparse.ArgumentParser) -> None:
   minify_p.add_argument(
     "--keyed", type=str, nargs="?", const="__first__", help="Convert to keyed JSON"
   )
+  minify_p.add_argument(
+    "--canonical", action="store_true", help="Sorted keys, NFC strings, normalised numbers"
+  )
   expand_p = subparsers.add_parser("expand", help="Expand minified JSON")
   expand_p.add_argument("input", nargs="+", help="Files or directories to expand")
   expand_p.add_argument("-o", "--output", type=Path, help="Output directory")
   expand_p.add_argument("--key-map", type=Path, required=True, help="Keymap file path")
   expand_p.add_argument("--compact", action="store_true", help="Compact JSON output")
   expand_p.add_argument("--pretty", action="store_true", help="Pretty print JSON output")
+  expand_p.add_argument(
+    "--binary", action="store_true", help=f"Write the binary tree format (*-expanded{BINARY})"
+  )
+  expand_p.add_argument(
+    "--canonical", action="store_true", help="Sorted keys, NFC strings, normalised numbers"
+  )
+  for sub in (scan_p, minify_p, expand_p):
+    sub.add_argument(
+      "--low-memory",
+      action="store_true",
+      help="Hold inputs in the interned compact model: less memory, slower parse",
+    )
+    add_trace_arguments(sub)
 
 def run(args: argparse.Namespace, context: Optional[Dict] = None) -> Dict[str, Any]:
   """Core execution logic. Supports dispatcher integration with optional context."""
+  with tracing(args, "json-minify", mode=getattr(args, "mode", None)) as trace:
+    result = dispatch(args)
+  if trace.get("summary"):
+    result["trace"] = trace["summary"]
+  return result
+
+def dispatch(args: argparse.Namespace) -> Dict[str, Any]:
   try:
     if not hasattr(args, "mode") or not args.mode:
       return {"status": "error", "message": "No mode specified", "exit_code": 1}
-    files = find_files(args.input)
+    with span("discover"):
+      files = find_files(args.input)
+    count("files", len(files))
     if not files:
       return {"status": "error", "message": "No JSON/CSV files found", "exit_code": 1}
     enc = CFG["encoding"]
     if args.mode == "scan":
       all_keys = set()
       for f in files:
-        with contextlib.suppress(Exception):
-          all_keys.update(extract_keys(json.loads(f.read_text(encoding=enc))))
+        with contextlib.suppress(Exception), span("file", "file", file=str(f)):
+          with span("read"):
+            raw = f.read_bytes()
+          with span("parse"):
+            data = parse_input(raw, args.low_memory)[0]
+          with span("transform"):
+            all_keys.update(extract_keys(data))
       km = generate_keymap_optimized(all_keys)
       if args.key_map:
         args.key_map.parent.mkdir(parents=True, exist_ok=True)
-        args.key_map.write_text(json.dumps(km, indent=2), encoding=enc)
+        args.key_map.write_text(dumps(km, indent=2), encoding=enc)
       total_original = sum(len(k) for k in km.values())
       total_compressed = sum(len(a) for a in km)
       savings = 100 * (1 - total_compressed / total_original) if total_original else 0
@@ -384,50 +447,66 @@ def run(args: argparse.Namespace, context: Optional[Dict] = None) -> Dict[str, A
     elif args.mode == "minify":
       km = {}
       if args.key_map and args.key_map.exists():
-        km = json.loads(args.key_map.read_text(encoding=enc))
+        km = loads(args.key_map.read_text(encoding=enc))
       abbrev = MinimalKeyAbbreviator(km)
       if args.output:
         args.output.mkdir(parents=True, exist_ok=True)
       results = []
       total_savings = 0
       for fp in files:
-        try:
-          original_size = fp.stat().st_size
-          original_content = fp.read_text(encoding=enc)
-          d = json.loads(original_content)
-          opt = OptimizationEngine(d, abbrev)
-          if args.null_removal:
-            opt.remove_nulls()
-          if args.bool_compress:
-            opt.compress_booleans()
-          if args.key_map:
-            opt.abbreviate_keys()
-          if args.keyed:
-            kf = args.keyed if args.keyed != "__first__" else None
-            opt.convert_array_to_keyed(kf)
-          if args.flatten:
-            opt.flatten_structure()
-          d = opt.result()
-          if args.compact:
-            oj = json.dumps(d, separators=(",", ":"))
-          elif args.pretty:
-            oj = json.dumps(d, indent=2)
-          else:
-            oj = SmartFormatter.smart_format(d) if opt.optimizations else original_content
-          if args.output:
-            of = args.output / f"{fp.stem}-out.json"
-            of.write_text(oj, encoding=enc)
-            os_new = len(oj.encode(enc))
-            sav = 100 * (1 - os_new / original_size) if original_size else 0
-            results.append(
-              {"file": fp.name, "output": of.name, "savings_pct": round(sav, 1)}
-            )
-            total_savings += sav
-        except Exception as e:
-          results.append({"file": fp.name, "error": str(e)})
+        with span("file", "file", file=str(fp)):
+          try:
+            with span("read"):
+              raw = fp.read_bytes()
+            original_size = len(raw)
+            count("bytes_read", original_size)
+            with span("parse"):
+              d, original_content = parse_input(raw, args.low_memory)
+            with span("transform"):
+              opt = OptimizationEngine(d, abbrev)
+              if args.null_removal:
+                opt.remove_nulls()
+              if args.bool_compress:
+                opt.compress_booleans()
+              if args.key_map:
+                opt.abbreviate_keys()
+              if args.keyed:
+                kf = args.keyed if args.keyed != "__first__" else None
+                opt.convert_array_to_keyed(kf)
+              if args.flatten:
+                opt.flatten_structure()
+              d = opt.result()
+              if args.canonical:
+                d = normalize(d)
+            with span("serialize"):
+              if args.binary:
+                oj = _bintree.encode(d)
+              elif args.compact:
+                oj = canonical_dumps(d) if args.canonical else dumps(d, separators=(",", ":"))
+              elif args.pretty:
+                oj = canonical_dumps(d, indent=2) if args.canonical else dumps(d, indent=2)
+              elif args.canonical or opt.optimizations or original_content is None:
+                oj = SmartFormatter.smart_format(d)
+              else:
+                oj = original_content
+              if isinstance(oj, str):
+                oj = oj.encode(enc)
+            if args.output:
+              of = args.output / f"{fp.stem}-out{BINARY if args.binary else '.json'}"
+              with span("write"):
+                of.write_bytes(oj)
+              os_new = len(oj)
+              count("bytes_written", os_new)
+              sav = 100 * (1 - os_new / original_size) if original_size else 0
+              results.append(
+                {"file": fp.name, "output": of.name, "savings_pct": round(sav, 1)}
+              )
+              total_savings += sav
+          except Exception as e:
+            results.append({"file": fp.name, "error": str(e)})
       if args.key_map:
         args.key_map.write_text(
-          json.dumps(abbrev.get_file_format(), indent=2), encoding=enc
+          dumps(abbrev.get_file_format(), indent=2), encoding=enc
         )
       return {
         "status": "success",
@@ -444,29 +523,40 @@ def run(args: argparse.Namespace, context: Optional[Dict] = None) -> Dict[str, A
           "message": "--key-map required for expand mode",
           "exit_code": 1
         }
-      km = json.loads(args.key_map.read_text(encoding=enc))
+      km = loads(args.key_map.read_text(encoding=enc))
       rev_km = {v: k for k, v in km.items()}
       if args.output:
         args.output.mkdir(parents=True, exist_ok=True)
       results = []
       for fp in files:
-        try:
-          d = json.loads(fp.read_text(encoding=enc))
-          opt = OptimizationEngine(d)
-          opt.expand_keys(rev_km)
-          d = opt.result()
-          if args.pretty:
-            oj = json.dumps(d, indent=2)
-          elif args.compact:
-            oj = json.dumps(d, separators=(",", ":"))
-          else:
-            oj = json.dumps(d)
-          if args.output:
-            of = args.output / f"{fp.stem}-expanded.json"
-            of.write_text(oj, encoding=enc)
-            results.append({"file": fp.name, "output": of.name})
-        except Exception as e:
-          results.append({"file": fp.name, "error": str(e)})
+        with span("file", "file", file=str(fp)):
+          try:
+            with span("read"):
+              raw = fp.read_bytes()
+            with span("parse"):
+              d = parse_input(raw, args.low_memory)[0]
+            with span("transform"):
+              opt = OptimizationEngine(d)
+              opt.expand_keys(rev_km)
+              d = opt.result()
+            with span("serialize"):
+              if args.binary:
+                oj = _bintree.encode(normalize(d) if args.canonical else d)
+              elif args.canonical:
+                oj = canonical_dumps(d, indent=2 if args.pretty else None)
+              elif args.pretty:
+                oj = dumps(d, indent=2)
+              elif args.compact:
+                oj = dumps(d, separators=(",", ":"))
+              else:
+                oj = dumps(d)
+            if args.output:
+              of = args.output / f"{fp.stem}-expanded{BINARY if args.binary else '.json'}"
+              with span("write"):
+                of.write_bytes(oj if args.binary else oj.encode(enc))
+              results.append({"file": fp.name, "output": of.name})
+          except Exception as e:
+            results.append({"file": fp.name, "error": str(e)})
       return {
         "status": "success",
         "mode": "expand",
@@ -2,11 +2,20 @@
 # --- framework/json-nest.py | checksum: auto ---
 import argparse
 import json
-import re
 import sys
+from collections.abc import Mapping
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
+import _bintree
+from _canonical import dumps as canonical_dumps
+from _canonical import normalize
+from _codec import dumps, loads
+from _docmodel import Interner
+from _jsonrepair import repair_json
+from _trace import add_arguments as add_trace_arguments
+from _trace import count, span, tracing
+
 # ------------------- Configuration -------------------
 config = {
   "exclude": ["protocol-schema.json"],
@@ -22,27 +31,33 @@ def recursive_sum(data: Any) -> int:
   """Recursively sum __LENGTH__ markers in nested structures."""
   if isinstance(data, list):
     return sum(recursive_sum(item) for item in data)
-  if not isinstance(data, dict):
+  if not isinstance(data, Mapping):
     return 0
   total = 0
   for k, v in data.items():
     if k in (config["length_marker"], config["manifest_key"]):
       continue
-    if isinstance(v, (dict, list)):
-      if isinstance(v, dict) and config["length_marker"] in v:
+    if isinstance(v, (Mapping, list)):
+      if isinstance(v, Mapping) and config["length_marker"] in v:
         total += v[config["length_marker"]]
       else:
         total += recursive_sum(v)
   return total
 
+def render(data: Any, canonical: bool = False) -> str:
+  """Serialize output; canonical mode sorts keys and normalises strings and numbers."""
+  if canonical:
+    return canonical_dumps(data, indent=config["indent"])
+  return dumps(data, indent=config["indent"], ensure_ascii=False)
+
 def apply_anchors(
   key: str, data: Any, l_list: List[str], s_list: List[str]
 ) -> Tuple[Any, int]:
   """Apply __LENGTH__ markers based on provided anchor lists."""
   actual_count = 0
-  if isinstance(data, (dict, list)):
+  if isinstance(data, (Mapping, list)):
     actual_count = len(data)
-    if isinstance(data, dict):
+    if isinstance(data, Mapping):
       actual_count = len(
         [k for k in data if k not in (config["length_marker"], config["manifest_key"])]
       )
@@ -51,17 +66,21 @@ def apply_anchors(
     count_val = actual_count
   elif key in s_list:
     count_val = recursive_sum(data)
-  if count_val is not None and isinstance(data, dict):
+  if count_val is not None and isinstance(data, Mapping):
+    if not isinstance(data, dict):
+      data = dict(data)
     data[config["length_marker"]] = count_val
   return data, count_val if count_val is not None else actual_count
 
 def extract_and_merge_json(raw_content: str) -> Dict[str, Any]:
   """Clean 'dirty' JSON and merge multiple objects discovered in raw text."""
-  text = raw_content.lstrip("\ufeff")
-  text = re.sub(r"//.*?\n|/\*.*?\*/", "", text, flags=re.DOTALL)
-  text = re.sub(r",(\s*[}\]])", r"\1", text)
-  text = re.sub(r"'([^'\"\\]*)'", r'"\1"', text)
-  text = re.sub(r'([}\]"\d])\s*\n(\s*["{\[\d])', r"\1,\n\2", text).strip()
+  try:
+    clean = loads(raw_content.lstrip("\ufeff"))
+    if isinstance(clean, (dict, list)):
+      return clean
+  except json.JSONDecodeError:
+    pass
+  text = repair_json(raw_content)[0].strip()
   decoder = json.JSONDecoder()
   objects, index = [], 0
   while index < len(text):
@@ -87,6 +106,29 @@ def extract_and_merge_json(raw_content: str) -> Dict[str, Any]:
       merged.update(obj)
   return merged
 
+def read_document(path: Path, lazy: bool = False) -> Any:
+  """Parse one input file: binary tree documents by magic, lazily if asked; otherwise dirty JSON."""
+  with span("read"):
+    data = path.read_bytes()
+  count("bytes_read", len(data))
+  with span("parse"):
+    if _bintree.is_tree(data):
+      return _bintree.decode(data, lazy)
+    return extract_and_merge_json(data.decode(config["encoding"]))
+
+def write_document(path: Path, data: Any, canonical: bool = False) -> int:
+  """Write JSON, or the binary tree format for the binary suffix; returns bytes written."""
+  with span("serialize"):
+    if _bintree.wants_tree(path):
+      blob = _bintree.encode(normalize(data) if canonical else data)
+    else:
+      blob = render(data, canonical).encode(config["encoding"])
+  with span("write", file=str(path)):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(blob)
+  count("bytes_written", len(blob))
+  return len(blob)
+
 def unnest(d: Any, pk: str = "") -> Dict[str, Any]:
   """Flatten nested JSON structure into underscore-delimited root keys."""
   res = {}
@@ -114,21 +156,29 @@ def unnest(d: Any, pk: str = "") -> Dict[str, Any]:
 def do_nest(args: argparse.Namespace) -> Dict[str, Any]:
   """Logic for merging multiple JSON files into a nested structure."""
   l_keys, s_keys = list(args.length or []), list(args.sum or [])
-  paths = [
-    f
-    for p in args.paths
-    for f in ([Path(p)] if Path(p).is_file() else sorted(Path(p).glob("**/*.json")))
-  ]
-  files = sorted(set([f for f in paths if f.name not in config["exclude"]]))
+  with span("discover"):
+    paths = [
+      f
+      for p in args.paths
+      for f in ([Path(p)] if Path(p).is_file() else sorted(
+        [*Path(p).glob("**/*.json"), *Path(p).glob(f"**/*{_bintree.config['suffix']}")]
+      ))
+    ]
+    files = sorted(set([f for f in paths if f.name not in config["exclude"]]))
+  count("files", len(files))
   if not files:
     return {"status": "error", "msg": "no json files found", "exit_code": 1}
   nested_data, manifest = {}, {}
   identity = (
     Path(args.paths[0]).name if Path(args.paths[0]).is_dir() else Path(args.output).stem
   )
+  # binary output splices binary inputs' untouched subtrees instead of decoding them
+  lazy = _bintree.wants_tree(args.output) and not (args.flat or args.canonical)
+  interner = Interner() if args.low_memory else None
   for target in files:
     try:
-      content = extract_and_merge_json(target.read_text(encoding=config["encoding"]))
+      with span("file", "file", file=str(target)):
+        content = read_document(target, lazy)
       if not content:
         continue
       key = (
@@ -136,27 +186,30 @@ def do_nest(args: argparse.Namespace) -> Dict[str, Any]:
         if isinstance(content, dict) and "key" in content
         else target.stem
       )
-      if isinstance(content, dict) and len(content) == 1 and key in content:
+      if isinstance(content, Mapping) and len(content) == 1 and key in content:
         content = content[key]
-      if args.flat and isinstance(content, dict):
+      if interner:
+        content = interner.compact(content)
+      if args.flat and isinstance(content, Mapping):
         nested_data.update(content)
       else:
         nested_data[key] = content
     except Exception as e:
       sys.stderr.write(f"SKIP NEST: {target.name} | {str(e)}\n")
-  if not args.flat:
-    if identity.startswith(args.auto_sum_prefix) and identity not in s_keys:
-      s_keys.append(identity)
-    for key in list(nested_data.keys()):
-      content, count = apply_anchors(key, nested_data[key], l_keys, s_keys)
-      if key in s_keys:
-        manifest[f"{key}_total"] = count
-      nested_data[key] = content
-    nested_data, root_count = apply_anchors(identity, nested_data, l_keys, s_keys)
-    if identity in s_keys:
-      manifest[f"{identity}_total"] = root_count
+  with span("transform"):
+    if not args.flat:
+      if identity.startswith(args.auto_sum_prefix) and identity not in s_keys:
+        s_keys.append(identity)
+      for key in list(nested_data.keys()):
+        content, n = apply_anchors(key, nested_data[key], l_keys, s_keys)
+        if key in s_keys:
+          manifest[f"{key}_total"] = n
+        nested_data[key] = content
+      nested_data, root_count = apply_anchors(identity, nested_data, l_keys, s_keys)
+      if identity in s_keys:
+        manifest[f"{identity}_total"] = root_count
   try:
-    wrapper = json.loads(args.wrap) if args.wrap else {}
+    wrapper = loads(args.wrap) if args.wrap else {}
   except json.JSONDecodeError:
     return {"status": "error", "msg": "Invalid JSON in --wrap", "exit_code": 1}
   final_output = (
@@ -178,11 +231,7 @@ def do_nest(args: argparse.Namespace) -> Dict[str, Any]:
         ]
       )
     )
-  args.output.parent.mkdir(parents=True, exist_ok=True)
-  args.output.write_text(
-    json.dumps(final_output, indent=config["indent"], ensure_ascii=False),
-    encoding=config["encoding"],
-  )
+  write_document(args.output, final_output, args.canonical)
   return {
     "status": "success",
     "mode": "nest",
@@ -199,15 +248,17 @@ def do_unnest(args: argparse.Namespace) -> Dict[str, Any]:
     if not path_obj.exists():
       continue
     try:
-      data = json.loads(path_obj.read_text(encoding=config["encoding"]))
-      merged_flat.update(unnest(data))
+      with span("file", "file", file=str(path_obj)):
+        with span("read"):
+          raw = path_obj.read_bytes()
+        count("bytes_read", len(raw))
+        with span("parse"):
+          data = _bintree.decode(raw) if _bintree.is_tree(raw) else loads(raw)
+        with span("transform"):
+          merged_flat.update(unnest(data))
     except Exception as e:
       sys.stderr.write(f"SKIP UNNEST: {path_obj.name} | {str(e)}\n")
-  args.output.parent.mkdir(parents=True, exist_ok=True)
-  args.output.write_text(
-    json.dumps(merged_flat, indent=config["indent"], ensure_ascii=False),
-    encoding=config["encoding"],
-  )
+  write_document(args.output, merged_flat, args.canonical)
   return {
     "status": "success",
     "mode": "unnest",
@@ -220,16 +271,32 @@ def do_unnest(args: argparse.Namespace) -> Dict[str, Any]:
 def setup(parser: argparse.ArgumentParser) -> None:
   parser.add_argument("mode", nargs="?", default="nest", choices=["nest", "unnest"])
   parser.add_argument("paths", nargs="+")
-  parser.add_argument("-o", "--output", required=True, type=Path)
+  parser.add_argument(
+    "-o", "--output", required=True, type=Path,
+    help="Output file; a .bjson suffix writes the binary tree format"
+  )
   parser.add_argument("--length", nargs="*", default=[])
   parser.add_argument("--sum", nargs="*", default=[])
   parser.add_argument("--wrap")
   parser.add_argument("--flat", action="store_true")
   parser.add_argument("--auto-sum-prefix", default=config["auto_sum_prefix"])
+  parser.add_argument(
+    "--canonical", action="store_true", help="Sorted keys, NFC strings, normalised numbers"
+  )
+  parser.add_argument(
+    "--low-memory",
+    action="store_true",
+    help="Hold inputs in the interned compact model: less memory, slower parse",
+  )
+  add_trace_arguments(parser)
 
 def run(args: argparse.Namespace, context: Optional[Dict] = None) -> Dict[str, Any]:
   try:
-    return do_nest(args) if args.mode == "nest" else do_unnest(args)
+    with tracing(args, "json-nest", mode=args.mode) as trace:
+      result = do_nest(args) if args.mode == "nest" else do_unnest(args)
+    if trace.get("summary"):
+      result["trace"] = trace["summary"]
+    return result
   except Exception as e:
     return {
       "status": "error",
@@ -242,7 +309,7 @@ def main():
   parser = argparse.ArgumentParser(prog="json-nest")
   setup(parser)
   result = run(parser.parse_args())
-  print(json.dumps(result, indent=config["indent"]))
+  print(dumps(result, indent=config["indent"]))
   sys.exit(result.get("exit_code", 1))
 
 if __name__ == "__main__":
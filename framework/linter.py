@@ -1,18 +1,28 @@
 #!/usr/bin/env python3
 # --- framework/linter.py | checksum: auto ---
 import argparse
+import contextlib
+import hashlib
+import json
 import os
-import re
 import subprocess
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+from _cleaner import clean_text
+from _codec import dumps, loads
+
 os.environ["RUFF_NO_CACHE"] = "true"
 config = {
   "skip": {".git", "node_modules", "__pycache__", "venv", ".venv", "build", "dist"},
-  "preserve": {"#!", "# ---", "# [start", "# [end"},
+  "preserve": ("#!", "# ---", "# [start", "# [end"),
+  "blank_before": ("def ", "class ", "import ", "from ", "@", "if __name__"),
   "indent": 2,
-  "encoding": "utf-8"
+  "encoding": "utf-8",
+  "cache_file": ".linter-cache.json",
+  "batch_size": 64,
+  "version": 2
 }
 
 def setup(parser):
@@ -24,6 +34,41 @@ def setup(parser):
   parser.add_argument(
     "--unsafe-fixes", action="store_true", help="Allow ruff to apply unsafe fixes"
   )
+  parser.add_argument(
+    "-j", "--jobs", type=int, default=os.cpu_count(), help="Clean pass worker count"
+  )
+  parser.add_argument(
+    "--no-cache", action="store_true", help="Ignore and do not update the clean cache"
+  )
+
+def content_hash(data):
+  """Hash file bytes for the skip-if-clean cache."""
+  return hashlib.sha256(data).hexdigest()
+
+def load_cache(path, salt):
+  """Load path->hash entries, discarding them if the tool setup changed."""
+  with contextlib.suppress(json.JSONDecodeError, OSError):
+    cache = loads(path.read_text(encoding=config["encoding"]))
+    if cache.get("salt") == salt:
+      return cache.get("files", {})
+  return {}
+
+def save_cache(path, salt, files):
+  """Persist the cache; failures only cost a slower next run."""
+  with contextlib.suppress(OSError):
+    path.write_text(
+      dumps({"salt": salt, "files": files}, indent=1), encoding=config["encoding"]
+    )
+
+def collect_files(targets, skip_norm):
+  """Expand targets into the .py files the clean pass should visit."""
+  for t in targets:
+    tp = Path(t).resolve()
+    file_list = tp.rglob("*.py") if tp.is_dir() else [tp]
+    for f in file_list:
+      if not f.is_file() or any(p.lower() in skip_norm for p in f.parts):
+        continue
+      yield f
 
 def legacy_surgical_clean(fp):
   """
@@ -32,45 +77,26 @@ def legacy_surgical_clean(fp):
   """
   try:
     raw = fp.read_text(encoding=config["encoding"])
-    raw = re.sub(r",\n(\s*[}\]])", r"\n\1", raw)
-    lines, valid, prev_b = raw.splitlines(), [], False
-    for i, line in enumerate(lines):
-      s = line.strip()
-      if s.startswith("#") and not any(
-        s.lower().startswith(k) for k in config["preserve"]
-      ):
-        continue
-      if not s:
-        if (
-          i + 1 < len(lines)
-          and lines[i + 1]
-          .strip()
-          .startswith(("def ", "class ", "import ", "from ", "@", "if __name__"))
-          and not prev_b
-        ):
-          valid.append("")
-          prev_b = True
-        continue
-      if (
-        not s.startswith(("import ", "from "))
-        and valid
-        and valid[-1].strip().startswith(("import ", "from "))
-        and not prev_b
-      ):
-        valid.append("")
-        prev_b = True
-      valid.append(line.rstrip())
-      prev_b = False
-    while valid and not valid[-1]:
-      valid.pop()
-    final = "\n".join(valid).rstrip() + "\n"
+    final = clean_text(
+      raw,
+      preserve=config["preserve"],
+      blank_before=config["blank_before"],
+      import_gap=True,
+      drop_trailing_commas=True,
+    )
     if final != raw:
       fp.write_text(final, encoding=config["encoding"])
+    return str(fp), content_hash(final.encode(config["encoding"]))
   except Exception as e:
     print(f"Surgical clean error on {fp.name}: {e}", file=sys.stderr)
+    return str(fp), None
 
 def run(args):
-  """Hybrid Flow: Ruff Check -> Ruff Format -> Legacy Surgical Clean."""
+  """Hybrid Flow: Ruff Check -> Ruff Format -> Legacy Surgical Clean.
+
+  With --fix, files whose content hash matches the cache are skipped; the rest
+  go through ruff in batches while earlier batches are cleaned in a worker pool.
+  """
   base_dir = Path(__file__).parent.parent.resolve()
   config_path = base_dir / "pyproject.toml"
   config_args = ["--config", str(config_path)] if config_path.exists() else []
@@ -82,21 +108,48 @@ def run(args):
       lint_cmd.append("--fix")
     if args.unsafe_fixes:
       lint_cmd.append("--unsafe-fixes")
-    lint_cmd.extend(config_args + targets)
-    lint_result = subprocess.run(lint_cmd, check=False)
-    if args.fix:
-      fmt_cmd = [sys.executable, "-m", "ruff", "format"] + config_args + targets
-      subprocess.run(
-        fmt_cmd, check=False, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-      )
-      for t in targets:
-        tp = Path(t).resolve()
-        file_list = tp.rglob("*.py") if tp.is_dir() else [tp]
-        for f in file_list:
-          if not f.is_file() or any(p.lower() in skip_norm for p in f.parts):
-            continue
-          legacy_surgical_clean(f)
-    return {"status": "success", "exit_code": lint_result.returncode}
+    if not args.fix:
+      lint_result = subprocess.run(lint_cmd + config_args + targets, check=False)
+      return {"status": "success", "exit_code": lint_result.returncode}
+    fmt_cmd = [sys.executable, "-m", "ruff", "format"] + config_args
+    cache_path = Path(config["cache_file"])
+    salt_src = [
+      config["version"], config["preserve"], config["blank_before"], args.unsafe_fixes
+    ]
+    salt = content_hash(
+      dumps(salt_src).encode()
+      + (config_path.read_bytes() if config_path.exists() else b"")
+    )
+    cache = {} if args.no_cache else load_cache(cache_path, salt)
+    files = list(collect_files(targets, skip_norm))
+    stale = [f for f in files if cache.get(str(f)) != content_hash(f.read_bytes())]
+    exit_code, pending = 0, []
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs or 1)) as pool:
+      for i in range(0, len(stale), config["batch_size"]):
+        batch = [str(f) for f in stale[i : i + config["batch_size"]]]
+        rc = subprocess.run(lint_cmd + config_args + batch, check=False).returncode
+        subprocess.run(
+          fmt_cmd + batch,
+          check=False,
+          stdout=subprocess.DEVNULL,
+          stderr=subprocess.DEVNULL,
+        )
+        exit_code = max(exit_code, rc)
+        pending.extend((rc, pool.submit(legacy_surgical_clean, Path(f))) for f in batch)
+      for rc, fut in pending:
+        path, h = fut.result()
+        if h is None or rc != 0:
+          cache.pop(path, None)
+        else:
+          cache[path] = h
+    if not args.no_cache:
+      save_cache(cache_path, salt, cache)
+    return {
+      "status": "success",
+      "exit_code": exit_code,
+      "cleaned": len(stale),
+      "skipped": len(files) - len(stale)
+    }
   except Exception as e:
     print(f"System Error: {e}", file=sys.stderr)
     return {"status": "error", "exit_code": 1}
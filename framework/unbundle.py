@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# --- framework/unbundle.py | checksum: auto ---
+import argparse
+import contextlib
+import json
+import sys
+from pathlib import Path
+
+from _chunkstore import PackReader, is_pack
+from _codec import dumps, loads
+from bundler import atomic_write, build_bundle, config, get_hash, index_path
+
+def read_header_hash(bundle):
+  """Return the body hash recorded in the bundle header, or None."""
+  with bundle.open("rb") as fh:
+    for _ in range(3):
+      line = fh.readline().decode(config["encoding"], config["encoding_errors"])
+      if line.startswith("# --- bundle | "):
+        return line[len("# --- bundle | ") :].split(" ", 1)[0]
+  return None
+
+def scan_index(bundle, algo):
+  """Rebuild the offset index with one pass over the start/end markers."""
+  enc, errs = config["encoding"], config["encoding_errors"]
+  files, cur, pos = {}, None, 0
+  with bundle.open("rb") as fh:
+    for raw in fh:
+      line = raw.decode(enc, errs).rstrip("\n")
+      if cur is None and line.startswith("# [start: ") and line.endswith("]"):
+        rel, _, h = line[len("# [start: ") : -1].rpartition(" | ")
+        cur = (rel, h, pos + len(raw))
+      elif cur is not None and line == f"# [end: {cur[0]}]":
+        files[cur[0]] = {"offset": cur[2], "length": pos - cur[2], "hash": cur[1]}
+        cur = None
+      pos += len(raw)
+  return {"hash": read_header_hash(bundle), "algo": algo, "files": files}
+
+def load_index(bundle, algo="sha256"):
+  """Load the sidecar index, falling back to a marker scan when stale or missing."""
+  ip = index_path(bundle)
+  if ip.exists():
+    with contextlib.suppress(json.JSONDecodeError, OSError):
+      index = loads(ip.read_text(encoding=config["encoding"]))
+      if index.get("hash") == read_header_hash(bundle):
+        return index, "index"
+  return scan_index(bundle, algo), "scan"
+
+def read_entry(fh, entry, algo):
+  """Seek to one file's offset and return its verified text."""
+  fh.seek(entry["offset"])
+  txt = fh.read(entry["length"]).decode(config["encoding"], config["encoding_errors"])
+  if get_hash(txt, algo) != entry["hash"]:
+    raise ValueError(f"hash mismatch at offset {entry['offset']}")
+  return txt
+
+def safe_target(out_dir, rel):
+  """Map a bundled path under out_dir, refusing to escape it."""
+  p = Path(rel)
+  if p.is_absolute():
+    p = p.relative_to(p.anchor)
+  if ".." in p.parts:
+    raise ValueError(f"unsafe path: {rel}")
+  return out_dir / p
+
+def do_extract(a, bundle, index):
+  """Extract the selected (or all) files from the bundle."""
+  out_dir = Path(a.out_dir)
+  wanted = a.files or list(index["files"])
+  missing = [rel for rel in wanted if rel not in index["files"]]
+  extracted, errors = [], []
+  with bundle.open("rb") as fh:
+    for rel in wanted:
+      if rel in missing:
+        continue
+      try:
+        txt = read_entry(fh, index["files"][rel], index.get("algo") or a.algo)
+        target = safe_target(out_dir, rel)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(target, txt)
+        extracted.append(rel)
+      except (ValueError, OSError) as e:
+        errors.append(f"{rel}: {e}")
+  return {
+    "status": "success" if not errors and not missing else "error",
+    "extracted": len(extracted),
+    "missing": missing,
+    "errors": errors,
+    "out_dir": str(out_dir),
+    "exit_code": 0 if not errors and not missing else 1
+  }
+
+def do_extract_pack(a, bundle):
+  """Extract files from a chunk-store bundle, rebuilding only what is asked for."""
+  out_dir = Path(a.out_dir)
+  with PackReader(bundle) as r:
+    if a.list:
+      return {
+        "status": "success",
+        "index": "pack",
+        "files": {rel: e["length"] for rel, e in r.files.items()},
+        "exit_code": 0
+      }
+    wanted = a.files or list(r.files)
+    missing = [rel for rel in wanted if rel not in r.files]
+    extracted, errors = [], []
+    for rel in wanted:
+      if rel in missing:
+        continue
+      try:
+        txt = r.read(rel)
+        if get_hash(txt, r.index["algo"]) != r.files[rel]["hash"]:
+          raise ValueError("hash mismatch")
+        target = safe_target(out_dir, rel)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(target, txt)
+        extracted.append(rel)
+      except (ValueError, OSError) as e:
+        errors.append(f"{rel}: {e}")
+  return {
+    "status": "success" if not errors and not missing else "error",
+    "index": "pack",
+    "extracted": len(extracted),
+    "missing": missing,
+    "errors": errors,
+    "out_dir": str(out_dir),
+    "exit_code": 0 if not errors and not missing else 1
+  }
+
+def do_apply(a, bundle, index):
+  """Patch a full bundle with a --diff bundle and write the merged bundle."""
+  diff = Path(a.apply)
+  if not diff.is_file():
+    return {"status": "error", "msg": f"Diff bundle not found: {diff}", "exit_code": 1}
+  d_index, _ = load_index(diff, a.algo)
+  algo = d_index.get("algo") or index.get("algo") or a.algo
+  state = d_index.get("state") or {
+    **{rel: e["hash"] for rel, e in index["files"].items()},
+    **{rel: e["hash"] for rel, e in d_index["files"].items()},
+  }
+  entries, errors = [], []
+  with bundle.open("rb") as base_fh, diff.open("rb") as diff_fh:
+    for rel in sorted(state):
+      h = state[rel]
+      src = d_index["files"].get(rel)
+      fh = diff_fh
+      if src is None:
+        src, fh = index["files"].get(rel), base_fh
+      if src is None or src["hash"] != h:
+        errors.append(f"{rel}: no content for {h} in base or diff")
+        continue
+      try:
+        entries.append((rel, h, read_entry(fh, src, algo)))
+      except ValueError as e:
+        errors.append(f"{rel}: {e}")
+  if errors:
+    return {"status": "error", "errors": errors, "exit_code": 1}
+  out_dir = Path(a.out_dir)
+  out_dir.mkdir(parents=True, exist_ok=True)
+  out_file = out_dir / bundle.name
+  text, merged = build_bundle(entries, algo)
+  merged.update({"diff": False, "state": state})
+  atomic_write(out_file, text)
+  atomic_write(index_path(out_file), merged, is_json=True)
+  return {
+    "status": "success",
+    "bundle": str(out_file),
+    "patched": len(d_index["files"]),
+    "removed": len(set(index["files"]) - set(state)),
+    "total": len(entries),
+    "exit_code": 0
+  }
+
+def setup(p):
+  """Standard dispatcher setup."""
+  p.add_argument("bundle", help="Bundle written by bundler")
+  p.add_argument("files", nargs="*", help="Bundled paths to extract (default: all)")
+  p.add_argument("-o", "--out-dir", default="build/unbundled", help="Output directory")
+  p.add_argument(
+    "-a", "--algo", choices=["md5", "sha256"], default="sha256", help="Hash algorithm"
+  )
+  p.add_argument("--list", action="store_true", help="List indexed files and exit")
+  p.add_argument("--apply", metavar="DIFF", help="Apply a --diff bundle onto BUNDLE")
+
+def run(a):
+  """Main execution logic."""
+  bundle = Path(a.bundle)
+  if not bundle.is_file():
+    return {"status": "error", "msg": f"Bundle not found: {bundle}", "exit_code": 1}
+  if is_pack(bundle):
+    if a.apply:
+      return {"status": "error", "msg": "--apply needs plain bundles", "exit_code": 1}
+    return do_extract_pack(a, bundle)
+  index, source = load_index(bundle, a.algo)
+  if a.list:
+    return {
+      "status": "success",
+      "index": source,
+      "files": {rel: e["length"] for rel, e in index["files"].items()},
+      "exit_code": 0
+    }
+  result = do_apply(a, bundle, index) if a.apply else do_extract(a, bundle, index)
+  result["index"] = source
+  return result
+
+def main():
+  parser = argparse.ArgumentParser(prog="unbundle")
+  setup(parser)
+  result = run(parser.parse_args())
+  print(dumps(result, indent=2))
+  sys.exit(result.get("exit_code", 1))
+
+if __name__ == "__main__":
+  main()
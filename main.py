@@ -2,7 +2,11 @@ import argparse
 import sys
 import os
 import importlib.util
-import json
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "framework"))
+import _batch
+from _codec import dumps
+from _trace import add_arguments as add_trace_arguments
+from _trace import enable, finish, span
 def load_plugins(d="plugins"):
     plugins = {}
     if os.path.exists(d):
@@ -12,35 +16,70 @@ def load_plugins(d="plugins"):
                 path = os.path.join(d, f)
                 spec = importlib.util.spec_from_file_location(name, path)
                 mod = importlib.util.module_from_spec(spec)
+                sys.modules[name] = mod
                 spec.loader.exec_module(mod)
                 if all(hasattr(mod, a) for a in ["setup_arguments", "run_task"]):
                     plugins[name] = mod
             except Exception as e:
                 print(f"Err:{f}|{e}", file=sys.stderr)
     return plugins
+def run_batch(args, plugins):
+    """main.py batch jobs.jsonl: NDJSON result lines on stdout, a tally on stderr; exit 1 if any job failed."""
+    batch_parser = argparse.ArgumentParser(prog=f"main.py {_batch.config['command']}")
+    _batch.setup_arguments(batch_parser)
+    opts = batch_parser.parse_args(args.subargs)
+    try:
+        jobs = _batch.read_jobs(opts.job_file, plugins)
+    except (OSError, ValueError) as e:
+        print(dumps({"status": "error", "err": str(e), "plugin": _batch.config["command"]}, ensure_ascii=False), file=sys.stderr)
+        return 1
+    out = open(os.devnull, "w") if args.silent else sys.stdout
+    with span(_batch.config["command"], "dispatcher", jobs=len(jobs)):
+        tally = _batch.run_batch(jobs, plugins, load_plugins, opts.workers, opts.processes, opts.fail_fast, out)
+    summary = finish(args.trace, args.trace_format) if args.trace else None
+    print(dumps({"batch": tally, **({"trace": summary} if summary else {})}, ensure_ascii=False), file=sys.stderr)
+    return 1 if tally["error"] or tally["skipped"] else 0
 def main():
-    plugins = load_plugins()
+    pre = argparse.ArgumentParser(add_help=False)
+    add_trace_arguments(pre)
+    opts, _ = pre.parse_known_args()
+    if opts.trace:
+        enable(opts.trace_memory)
+    with span("discover", "dispatcher"):
+        plugins = load_plugins()
     if not plugins:
         print("ERROR: No plugins loaded", file=sys.stderr)
         sys.exit(1)
     parser = argparse.ArgumentParser(add_help=True)
     parser.add_argument("--silent", action="store_true")
-    parser.add_argument("cmd", choices=[k.replace('_', '-') for k in plugins.keys()])
+    add_trace_arguments(parser)
+    parser.add_argument("cmd", choices=[k.replace('_', '-') for k in plugins.keys()] + [_batch.config["command"]])
     parser.add_argument("subargs", nargs=argparse.REMAINDER)
     args = parser.parse_args()
+    if args.cmd == _batch.config["command"]:
+        sys.exit(run_batch(args, plugins))
     plugin = plugins[args.cmd.replace('-', '_')]
     plugin_parser = argparse.ArgumentParser()
     plugin.setup_arguments(plugin_parser)
     plugin_args = plugin_parser.parse_args(args.subargs)
     try:
-        result = plugin.run_task(plugin_args, {})
+        with span(args.cmd, "plugin"):
+            result = plugin.run_task(plugin_args, {})
+        summary = finish(args.trace, args.trace_format) if args.trace else None
         if isinstance(result, dict):
-            result.update({"plugin": args.cmd, "status": "success"})
+            result = _batch.envelope(args.cmd, result)
+            if summary:
+                result["trace"] = summary
+            if result["status"] == "error":
+                print(dumps(result, ensure_ascii=False), file=sys.stderr)
+                sys.exit(1)
             if not args.silent:
-                print(json.dumps(result, indent=2, ensure_ascii=False))
+                print(dumps(result, indent=2, ensure_ascii=False))
     except Exception as e:
+        if args.trace:
+            finish(args.trace, args.trace_format)
         err_dict = {"status": "error", "err": str(e), "plugin": args.cmd}
-        print(json.dumps(err_dict, ensure_ascii=False), file=sys.stderr)
+        print(dumps(err_dict, ensure_ascii=False), file=sys.stderr)
         sys.exit(1)
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,28 +1,139 @@
-import json
+import sys
+from collections.abc import Mapping
 from pathlib import Path
+from xml.sax.saxutils import quoteattr
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "framework"))
+import _bintree
+from _canonical import normalize
+from _codec import dumps, loads
+
+BYTES_PER_TOKEN = 4
+CONTINUE = "Continuation part {n}. Merge into the loaded data_context. Acknowledge only."
 
 def setup_arguments(subparser):
-    subparser.add_argument("input")
+    subparser.add_argument("input", help="compact kernel JSON, or the same kernel in the binary tree format")
     subparser.add_argument("-o", "--output-dir", required=True)
     subparser.add_argument("--instruction", default="Load master.json. Execute s0-ingest. Acknowledge only.")
+    subparser.add_argument("--part-instruction", default=CONTINUE, help="info for parts after the first ({n} = part number)")
+    subparser.add_argument("--canonical", action="store_true", help="Sorted keys, NFC strings, normalised numbers")
+    budget = subparser.add_mutually_exclusive_group()
+    budget.add_argument("--max-bytes", type=int, help="split into session-init-N.xml parts of at most this size")
+    budget.add_argument("--max-tokens", type=int, help=f"as --max-bytes, estimating {BYTES_PER_TOKEN} bytes per token")
+
+def iter_units(doc):
+    """Yield (path, parent, key) split units: one per protocol, per stage group, or per top-level key."""
+    for k, v in doc.items():
+        if k.startswith("protocols") and isinstance(v, Mapping):
+            for stage, group in v.items():
+                if isinstance(group, Mapping) and any(isinstance(p, Mapping) and "steps" in p for p in group.values()):
+                    for pk in group:
+                        yield (k, stage, pk), group, pk
+                else:
+                    yield (k, stage), v, stage
+        else:
+            yield (k,), doc, k
+
+def unit_body(parent, key):
+    """Compact JSON of parent[key]; binary tree input hands over its stored bytes undecoded."""
+    if isinstance(parent, _bintree.LazyObject):
+        raw = parent.raw(key)
+        if raw is not None:
+            return raw
+        value = parent[key]
+        if isinstance(value, _bintree.LazyObject):
+            value = value.materialize()
+    else:
+        value = parent[key]
+    return dumps(value, separators=(',', ':'), ensure_ascii=False)
+
+class PartWriter:
+    """Writes one <data_context> part, re-opening the enclosing objects of each unit as needed."""
+
+    TAIL = "]]></data_context>"
+
+    def __init__(self, path, info, n):
+        self.path, self.fh = path, open(path, "w", encoding="utf-8")
+        self.stack, self.first, self.units = [], [True], []
+        part = f' part="{n}"' if n else ""
+        self.size = self.write(f"<data_context info={quoteattr(info)}{part}><![CDATA[{{")
+
+    def write(self, text):
+        self.fh.write(text)
+        return len(text.encode("utf-8"))
+
+    def unit_text(self, path, body):
+        """Return (text, stack, first) for appending a unit under the objects already open."""
+        shared = 0
+        while shared < min(len(self.stack), len(path) - 1) and self.stack[shared] == path[shared]:
+            shared += 1
+        out = ["}" * (len(self.stack) - shared)]
+        first = self.first[: shared + 1]
+        for i in range(shared, len(path)):
+            out.append(("" if first[-1] else ",") + dumps(path[i], ensure_ascii=False) + ":")
+            first[-1] = False
+            if i < len(path) - 1:
+                out.append("{")
+                first.append(True)
+        out.append(body)
+        return "".join(out).replace("]]>", "]]]]><![CDATA[>"), list(path[:-1]), first
+
+    def cost(self, path, body):
+        """Part size after adding this unit and closing the part."""
+        text, stack, _ = self.unit_text(path, body)
+        return self.size + len(text.encode("utf-8")) + len(stack) + 1 + len(self.TAIL)
+
+    def add(self, path, body):
+        text, self.stack, self.first = self.unit_text(path, body)
+        self.size += self.write(text)
+        self.units.append("/".join(map(str, path)))
+
+    def close(self):
+        self.size += self.write("}" * len(self.stack) + "}" + self.TAIL)
+        self.fh.close()
+        return {"file": self.path.name, "bytes": self.size, "est_tokens": -(-self.size // BYTES_PER_TOKEN), "units": self.units}
 
 def run_task(args, context=None):
     try:
         dist = Path(args.output_dir)
         dist.mkdir(parents=True, exist_ok=True)
-        
-        with open(args.input, 'r') as f:
-            data = json.load(f)
-        
-        xml_output = dist / "session-init.xml"
-        
-        with open(xml_output, 'w') as f:
-            f.write(f'<data_context info="{args.instruction}">\n')
-            f.write(json.dumps(data, separators=(',', ':')))
-            f.write("\n</data_context>")
-        
-        # return {"status": "success", "output": str(xml_output)}
-        return {}
+
+        raw = Path(args.input).read_bytes()
+        if _bintree.is_tree(raw):
+            data = _bintree.decode(raw, lazy=not args.canonical)
+        else:
+            data = loads(raw.decode('utf-8'))
+        if args.canonical:
+            data = normalize(data)
+        if not isinstance(data, Mapping):
+            raise ValueError("kernel root must be a JSON object")
+        budget = args.max_bytes or (args.max_tokens * BYTES_PER_TOKEN if args.max_tokens else None)
+
+        if not budget:
+            writer = PartWriter(dist / "session-init.xml", args.instruction, None)
+            for path, parent, key in iter_units(data):
+                writer.add(path, unit_body(parent, key))
+            writer.close()
+            return {}
+
+        parts, writer = [], None
+        for path, parent, key in iter_units(data):
+            body = unit_body(parent, key)
+            if writer is not None and writer.cost(path, body) > budget:
+                parts.append(writer.close())
+                writer = None
+            if writer is None:
+                n = len(parts) + 1
+                info = args.instruction if n == 1 else args.part_instruction.format(n=n)
+                writer = PartWriter(dist / f"session-init-{n}.xml", info, n)
+            writer.add(path, body)
+        if writer is not None:
+            parts.append(writer.close())
+        for p in parts:
+            p["over_budget"] = p["bytes"] > budget
+        manifest = {"source": Path(args.input).name, "budget_bytes": budget, "parts": parts}
+        (dist / "session-manifest.json").write_text(dumps(manifest, indent=2, ensure_ascii=False), encoding='utf-8')
+        return {"parts": len(parts), "manifest": str(dist / "session-manifest.json")}
 
     except Exception as e:
         return {"status": "error", "message": str(e)}
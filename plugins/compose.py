@@ -0,0 +1,88 @@
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "framework"))
+import _bintree
+from _codec import dumps, loads
+from _overlay import Composer, common, derive, template
+
+OVERLAY_PREFIX = "overlay-"
+
+def setup_arguments(subparser):
+    subparser.add_argument("mode", choices=["derive", "build"])
+    subparser.add_argument("paths", nargs="+", help="derive: full variants (kernel-*.json); build: core.json then overlay-*.json")
+    subparser.add_argument("-o", "--output-dir", required=True, type=Path)
+    subparser.add_argument("--names", nargs="*", help="variant names (default: file stems minus their shared prefix/suffix)")
+    subparser.add_argument("--pattern", default="kernel-{llm}.json", help="build: output file name per variant")
+    subparser.add_argument("--compact", action="store_true", help="build: compact instead of indent=2 output")
+    subparser.add_argument("--verify", action="store_true", help="derive: rebuild every variant and compare it byte for byte")
+
+def read_doc(path):
+    data = Path(path).read_bytes()
+    return _bintree.decode(data) if _bintree.is_tree(data) else loads(data)
+
+def variant_names(paths):
+    """kernel-chatgpt.json, kernel-gemini.json -> chatgpt, gemini."""
+    stems = [Path(p).stem for p in paths]
+    if len(stems) == 1:
+        return [stems[0].split("-", 1)[-1]]
+    prefix = os.path.commonprefix(stems)
+    suffix = os.path.commonprefix([s[::-1] for s in stems])[::-1]
+    return [s[len(prefix): len(s) - len(suffix)] or s for s in stems]
+
+def write_json(path, doc):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    text = dumps(doc, indent=2, ensure_ascii=False)
+    path.write_text(text, encoding="utf-8")
+    return len(text.encode("utf-8"))
+
+def run_derive(args):
+    names = args.names or variant_names(args.paths)
+    if len(names) != len(args.paths):
+        return {"error": "NAMES_MISMATCH: one name per variant"}
+    docs = [template(read_doc(p), n) for p, n in zip(args.paths, names)]
+    core = common(docs)
+    out = {"core": {"file": str(args.output_dir / "core.json"), "bytes": write_json(args.output_dir / "core.json", core)}}
+    overlays = {}
+    for name, doc in zip(names, docs):
+        overlays[name] = derive(core, doc)
+        path = args.output_dir / f"{OVERLAY_PREFIX}{name}.json"
+        out[name] = {"file": str(path), "bytes": write_json(path, overlays[name])}
+    if args.verify:
+        composer = Composer(core)
+        for name, path in zip(names, args.paths):
+            text = composer.text(name, overlays[name])
+            out[name]["verified"] = text == Path(path).read_text(encoding="utf-8")
+    return {"mode": "derive", "variants": out, "error": None}
+
+def run_build(args):
+    core_path, overlay_paths = args.paths[0], args.paths[1:]
+    if not overlay_paths:
+        return {"error": "NO_OVERLAYS: build takes core.json followed by overlay files"}
+    names = args.names or [Path(p).stem[len(OVERLAY_PREFIX):] if Path(p).stem.startswith(OVERLAY_PREFIX) else Path(p).stem for p in overlay_paths]
+    if len(names) != len(overlay_paths):
+        return {"error": "NAMES_MISMATCH: one name per overlay"}
+    t0 = time.perf_counter()
+    composer = Composer(read_doc(core_path), indent=None if args.compact else 2)
+    results = {"core_ms": round((time.perf_counter() - t0) * 1000, 1)}
+    for name, path in zip(names, overlay_paths):
+        t0 = time.perf_counter()
+        target = args.output_dir / args.pattern.replace("{llm}", name)
+        size = composer.write(name, read_doc(path), target)
+        results[name] = {"file": str(target), "chars": size, "ms": round((time.perf_counter() - t0) * 1000, 1)}
+    results["cached_texts"] = len(composer.texts)
+    return {"mode": "build", "variants": results, "error": None}
+
+def run_task(args, context=None):
+    try:
+        return run_derive(args) if args.mode == "derive" else run_build(args)
+    except Exception as e:
+        return {"error": str(e), "error_type": type(e).__name__}
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(prog="compose")
+    setup_arguments(p)
+    print(dumps(run_task(p.parse_args()), indent=2, ensure_ascii=False))
@@ -0,0 +1,47 @@
+import io
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "framework"))
+from _codec import dumps, loads
+from _jsondiff import diff, write_patch
+
+def setup_arguments(subparser):
+    subparser.add_argument("base", type=Path)
+    subparser.add_argument("target", type=Path)
+    subparser.add_argument("-o", "--output", type=Path, help="write the NDJSON delta here")
+    subparser.add_argument("--ignore", nargs="*", default=[], help="object keys left out of the diff (e.g. metadata manifest)")
+
+def run_task(args, context=None):
+    a = loads(args.base.read_text(encoding="utf-8"))
+    b = loads(args.target.read_text(encoding="utf-8"))
+    ops = diff(a, b, ignore=args.ignore)
+    buf = io.StringIO()
+    write_patch(buf, a, b, ops, exact=not args.ignore)
+    delta = buf.getvalue()
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(delta, encoding="utf-8")
+    size = args.target.stat().st_size
+    counts = {}
+    for op in ops:
+        counts[op["op"]] = counts.get(op["op"], 0) + 1
+    return {
+        "ops": len(ops),
+        "by_op": counts,
+        "delta_bytes": len(delta.encode("utf-8")),
+        "target_bytes": size,
+        "output_file": str(args.output) if args.output else None,
+        "patch": None if args.output else ops,
+    }
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(prog="diff-json")
+    setup_arguments(p)
+    try:
+        result = run_task(p.parse_args())
+    except Exception as e:
+        print(dumps({"error": str(e), "error_type": type(e).__name__}, indent=2, ensure_ascii=False))
+        sys.exit(1)
+    print(dumps(result, indent=2, ensure_ascii=False))
@@ -0,0 +1,80 @@
+import sys
+import asyncio
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "framework"))
+import _bintree
+from _codec import dumps, loads
+from _engine import Engine, StubBackend, load_backend, make_gate
+from _engine import config as engine_config
+from _validators import ContextError, find_orchestration, parse_context
+
+def setup_arguments(subparser):
+    subparser.add_argument("orchestration", help="orchestration.json, or a kernel that embeds it")
+    subparser.add_argument("--sessions", help="one JSON object per line: id and input (- for stdin)")
+    subparser.add_argument("-n", "--count", type=int, default=1000, help="synthetic sessions when --sessions is not given")
+    subparser.add_argument("--backend", default="stub", help="stub, or module:attribute of a factory taking the Gate")
+    subparser.add_argument("-c", "--concurrency", type=int, default=engine_config["concurrency"], help="sessions in flight")
+    subparser.add_argument("--timeout", type=float, default=engine_config["timeout"], help="seconds per backend call")
+    subparser.add_argument("--set", nargs="*", default=[], metavar="NAME=VALUE", help="context values such as threshold=0.8 max=3")
+    subparser.add_argument("--allow-unresolved", nargs="+", default=[], metavar="NAME", help="bounds left unset on purpose: their comparisons stay false")
+    subparser.add_argument("--seed", type=int, default=0, help="stub: seed for its records")
+    subparser.add_argument("--fail-rate", type=float, default=0.0, help="stub: share of records spoiled to fail their stage")
+    subparser.add_argument("--latency", type=float, default=0.0, help="stub: simulated seconds per call")
+    subparser.add_argument("-o", "--output", type=Path, help="write one result line per session here")
+
+def read_doc(path):
+    data = Path(path).read_bytes()
+    return _bintree.decode(data) if _bintree.is_tree(data) else loads(data)
+
+def read_sessions(path):
+    fh = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for lineno, line in enumerate(fh, 1):
+            if line.strip():
+                spec = loads(line)
+                if not isinstance(spec, dict):
+                    raise ValueError(f"line {lineno}: a session is a JSON object")
+                yield {"id": spec.get("id", lineno), "input": spec.get("input"), "outputs": {}}
+    finally:
+        if fh is not sys.stdin:
+            fh.close()
+
+def run_task(args, context=None):
+    try:
+        orchestration = find_orchestration(read_doc(args.orchestration))
+        if orchestration is None:
+            return {"error": f"NO_VALIDATORS: {args.orchestration} holds no validators and stages"}
+        gate = make_gate(orchestration, parse_context(args.set), args.allow_unresolved)
+        factory = load_backend(args.backend)
+        if factory is StubBackend:
+            backend = StubBackend(gate, seed=args.seed, fail_rate=args.fail_rate, latency=args.latency)
+        else:
+            backend = factory(gate)
+        engine = Engine(gate, backend, concurrency=args.concurrency, timeout=args.timeout)
+        if args.sessions:
+            sessions = read_sessions(args.sessions)
+        else:
+            sessions = ({"id": i, "input": None, "outputs": {}} for i in range(args.count))
+        out = None
+        if args.output:
+            args.output.parent.mkdir(parents=True, exist_ok=True)
+            out = open(args.output, "w", encoding="utf-8")
+        try:
+            on_result = (lambda r: out.write(dumps(r, ensure_ascii=False) + "\n")) if out else None
+            summary = asyncio.run(engine.run(sessions, on_result))
+        finally:
+            if out:
+                out.close()
+        return {"backend": args.backend, "concurrency": args.concurrency, **summary, "error": None}
+    except ContextError:
+        # an engine that cannot evaluate its validators must not run: main.py exits 1
+        raise
+    except (ValueError, OSError, ImportError, AttributeError) as e:
+        return {"error": str(e), "error_type": type(e).__name__}
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(prog="engine")
+    setup_arguments(p)
+    print(dumps(run_task(p.parse_args()), indent=2, ensure_ascii=False))
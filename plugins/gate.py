@@ -0,0 +1,90 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "framework"))
+import _bintree
+from _codec import dumps, loads
+from _validators import ContextError, Gate, find_orchestration, parse_context
+from _validators import config as validator_config
+
+def setup_arguments(subparser):
+    subparser.add_argument("orchestration", help="orchestration.json, or a kernel that embeds it")
+    subparser.add_argument("records", nargs="?", help="stage outputs, one JSON object per line (- for stdin)")
+    subparser.add_argument("--stage", help="stage whose validators gate the records (default: list every stage)")
+    subparser.add_argument("--set", nargs="*", default=[], metavar="NAME=VALUE", help="context values such as threshold=0.8 max=3")
+    subparser.add_argument("--allow-unresolved", nargs="+", default=[], metavar="NAME", help="bounds left unset on purpose: their comparisons stay false")
+    subparser.add_argument("--source", action="store_true", help="print the generated stage function to stderr")
+
+def read_doc(path):
+    data = Path(path).read_bytes()
+    return _bintree.decode(data) if _bintree.is_tree(data) else loads(data)
+
+def read_records(path):
+    """One record per non-blank line; a line that is not JSON stays a string and fails every validator."""
+    fh = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        records = []
+        for line in fh:
+            if line.strip():
+                try:
+                    records.append(loads(line))
+                except ValueError:
+                    records.append(line.rstrip("\n"))
+        return records
+    finally:
+        if fh is not sys.stdin:
+            fh.close()
+
+def halt_row(index, hits):
+    row = {"index": index, "validators": [h["validator"] for h in hits], "rules": sorted({r for h in hits for r in h["rules"]})}
+    errors = {h["validator"]: h["error"] for h in hits if h.get("error")}
+    if errors:
+        row["errors"] = errors
+    return row
+
+def run_task(args, context=None):
+    try:
+        orchestration = find_orchestration(read_doc(args.orchestration))
+        if orchestration is None:
+            return {"error": f"NO_VALIDATORS: {args.orchestration} holds no validators and stages"}
+        gate = Gate(orchestration, parse_context(args.set), args.allow_unresolved)
+        if not args.stage:
+            stages = {}
+            for name in gate.stage_names():
+                stage = gate.stage(name)
+                stages[name] = {"validators": [v for v, _ in stage.specs], "unknown": stage.unknown, "unbound": stage.unbound}
+            return {"stages": stages, "invalid": gate.errors, "error": None}
+        stage = gate.require(args.stage)
+        if args.source:
+            sys.stderr.write(stage.source)
+        if not args.records:
+            return {"error": "NO_RECORDS: give a records file to gate a stage"}
+        records = read_records(args.records)
+        t0 = time.perf_counter()
+        fired = stage.evaluate(records)
+        seconds = time.perf_counter() - t0
+        halt = validator_config["halt"]
+        halts = [halt_row(i, hits) for i, hits in fired if any(h["action"] == halt for h in hits)]
+        return {
+            "stage": args.stage,
+            "records": len(records),
+            "halted": len(halts),
+            "passed": len(records) - len(halts),
+            "halts": halts,
+            "unknown": stage.unknown,
+            "unresolved": stage.unresolved(),
+            "records_per_s": round(len(records) / seconds) if seconds else None,
+            "error": None,
+        }
+    except ContextError:
+        # refusing to gate is a failed run, not a result: main.py exits 1
+        raise
+    except (ValueError, OSError) as e:
+        return {"error": str(e), "error_type": type(e).__name__}
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(prog="gate")
+    setup_arguments(p)
+    print(dumps(run_task(p.parse_args()), indent=2, ensure_ascii=False))
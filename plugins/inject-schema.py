@@ -1,11 +1,133 @@
 import os
+import sys
 import json
+import hashlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "framework"))
+from _canonical import digest as canonical_digest
+from _canonical import dumps as canonical_dumps
+from _codec import dumps, loads
+from _fastschema import artifact_source
+from _statefile import update as update_state
+
+CACHE_VERSION = 2
+SCHEMA_MAPS = {"properties", "patternProperties", "$defs", "definitions", "dependentSchemas"}
+SCHEMA_ONE = {
+  "items",
+  "additionalItems",
+  "additionalProperties",
+  "contains",
+  "propertyNames",
+  "not",
+  "if",
+  "then",
+  "else",
+  "unevaluatedItems",
+  "unevaluatedProperties",
+}
+SCHEMA_LISTS = {"allOf", "anyOf", "oneOf", "prefixItems"}
+LOCAL = ('"$ref"', '"$id"', '"$anchor"', '"$dynamicRef"')
 
 
 def setup_arguments(parser):
   parser.add_argument("-s", "--src", default=".", help="Source directory")
   parser.add_argument("-t", "--target", default="master-schema.json")
   parser.add_argument("-p", "--pattern", default="-schema.json")
+  parser.add_argument("--canonical", action="store_true", help="Sorted keys, NFC strings, normalised numbers")
+  parser.add_argument("--min-bytes", type=int, default=64, help="smallest subschema worth sharing")
+  parser.add_argument("--no-dedup", action="store_true", help="inline every subschema as before")
+  parser.add_argument("--no-validator", action="store_true", help="skip the precompiled validator artifact")
+  parser.add_argument("--cache", default=".inject-schema-cache.json", help="incremental build state")
+  parser.add_argument("--no-cache", action="store_true", help="always rebuild")
+
+
+def map_subschemas(schema, fn):
+  """Copy of a schema object with fn applied to every direct subschema position."""
+  out = {}
+  for k, v in schema.items():
+    if k in SCHEMA_MAPS and isinstance(v, dict):
+      out[k] = {name: fn(sub) for name, sub in v.items()}
+    elif k in SCHEMA_ONE and isinstance(v, dict):
+      out[k] = fn(v)
+    elif k in SCHEMA_LISTS and isinstance(v, list):
+      out[k] = [fn(sub) for sub in v]
+    else:
+      out[k] = v
+  return out
+
+
+def text_digest(text):
+  return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class Deduper:
+  """Hoists structurally identical subschemas into shared $defs entries.
+
+  Subschemas are counted by the digest of their canonical text, so the counts
+  of an unchanged input can come from the cache instead of a re-parse.
+  """
+
+  def __init__(self, min_bytes):
+    self.min_bytes, self.counts = min_bytes, {}
+
+  def shareable(self, text):
+    return len(text) >= self.min_bytes and not any(tag in text for tag in LOCAL)
+
+  def scan(self, schema):
+    """{digest: occurrences} of the shareable subschemas of one schema."""
+    found = {}
+
+    def visit(node):
+      if isinstance(node, dict):
+        text = canonical_dumps(node)
+        if self.shareable(text):
+          d = text_digest(text)
+          found[d] = found.get(d, 0) + 1
+        map_subschemas(node, visit)
+      return node
+
+    visit(schema)
+    return found
+
+  def add(self, found):
+    for d, n in found.items():
+      self.counts[d] = self.counts.get(d, 0) + n
+
+  def rewrite(self, schema, shared, root=False):
+    """schema with repeated subschemas replaced by refs; their bodies go into shared."""
+    if not isinstance(schema, dict):
+      return schema
+    text = canonical_dumps(schema)
+    d = text_digest(text) if not root else None
+    if d is not None and self.counts.get(d, 0) > 1:
+      name = "_shared-" + d[:12]
+      if name not in shared:
+        shared[name] = None
+        shared[name] = map_subschemas(schema, lambda sub: self.rewrite(sub, shared))
+      return {"$ref": f"#/$defs/{name}"}
+    return map_subschemas(schema, lambda sub: self.rewrite(sub, shared))
+
+
+def load_state(path, target):
+  try:
+    data = loads(Path(path).read_text(encoding="utf-8"))
+    return data["targets"].get(target, {}) if data.get("version") == CACHE_VERSION else {}
+  except (OSError, ValueError, KeyError, AttributeError):
+    return {}
+
+
+def save_state(path, target, state):
+  def merge(data):
+    if not (isinstance(data, dict) and data.get("version") == CACHE_VERSION and isinstance(data.get("targets"), dict)):
+      data = {"version": CACHE_VERSION, "targets": {}}
+    data["targets"][target] = state
+    return data
+  update_state(path, merge, indent=1)
+
+
+def file_hash(path):
+  return hashlib.sha256(Path(path).read_bytes()).hexdigest() if Path(path).exists() else None
 
 
 def run_task(args, config):
@@ -16,16 +138,101 @@ def run_task(args, config):
     "$defs": {},
   }
   try:
+    target = Path(args.target)
     files = sorted(
-      f for f in os.listdir(args.src) if f.endswith(args.pattern) and f != args.target
+      f for f in os.listdir(args.src)
+      if f.endswith(args.pattern) and Path(args.src, f).resolve() != target.resolve()
     )
+    artifact = target.with_suffix(".validator.py")
+    inputs = {f: file_hash(os.path.join(args.src, f)) for f in files}
+    options = [str(Path(args.src).resolve()), args.pattern, args.canonical, args.min_bytes, args.no_dedup, args.no_validator]
+    state = {} if args.no_cache else load_state(args.cache, str(target.resolve()))
+    if (
+      state.get("inputs") == inputs
+      and state.get("options") == options
+      and state.get("output") == file_hash(target)
+      and state.get("validator") == (None if args.no_validator else file_hash(artifact))
+    ):
+      return {"status": "success", "unchanged": True, "injected": list(inputs)}
+
+    # per input: its digest, the digests of its shareable subschemas and, once
+    # built, its rewritten def; an input is parsed again only if it changed or
+    # one of its subschemas became (or stopped being) shared
+    previous = state.get("entries", {}) if state.get("options") == options else {}
+    entries, parsed, dedup = {}, {}, Deduper(args.min_bytes)
+
+    def parse(f):
+      if f not in parsed:
+        with open(os.path.join(args.src, f), "r") as s:
+          parsed[f] = loads(s.read())
+      return parsed[f]
+
+    for f in files:
+      prev = previous.get(f)
+      if prev and prev.get("hash") == inputs[f]:
+        entries[f] = prev
+      else:
+        schema = parse(f)
+        subs = {} if args.no_dedup else dedup.scan(schema)
+        entries[f] = {"hash": inputs[f], "canon": text_digest(canonical_dumps(schema)), "subs": subs}
+
+    aliases, seen, own = {}, {}, []
+    for f in files:
+      key, canon = f.replace(args.pattern, ""), entries[f]["canon"]
+      if not args.no_dedup and canon in seen:
+        aliases[key] = seen[canon]
+      else:
+        seen[canon] = key
+        own.append(f)
+        dedup.add(entries[f]["subs"])
+
+    rebuilt, shared = [], {}
+    for f in own:
+      key, entry = f.replace(args.pattern, ""), entries[f]
+      now = sorted(d for d in entry["subs"] if dedup.counts.get(d, 0) > 1)
+      if "def" not in entry or entry.get("shared") != now:
+        schema = parse(f)
+        defs = {}
+        built = schema if args.no_dedup else dedup.rewrite(schema, defs, root=True)
+        entries[f] = entry = {**entry, "shared": now, "def": built, "defs": defs}
+        rebuilt.append(f)
+      manifest["$defs"][key] = entry["def"]
+      for name, body in entry["defs"].items():
+        shared.setdefault(name, body)
+    manifest["$defs"].update(shared)
     for f in files:
       key = f.replace(args.pattern, "")
-      with open(os.path.join(args.src, f), "r") as s:
-        manifest["$defs"][key] = json.load(s)
-      manifest["properties"][key] = {"$ref": f"#/$defs/{key}"}
+      manifest["properties"][key] = {"$ref": f"#/$defs/{aliases.get(key, key)}"}
     with open(args.target, "w") as out:
-      json.dump(manifest, out, indent=2)
-    return {"status": "success", "injected": list(manifest["$defs"].keys())}
+      if args.canonical:
+        out.write(canonical_dumps(manifest, indent=2))
+      else:
+        out.write(dumps(manifest, indent=2))
+
+    validator = None
+    if not args.no_validator:
+      src = artifact_source(manifest, canonical_digest(manifest))
+      if src:
+        artifact.write_text(src, encoding="utf-8")
+        validator = str(artifact)
+      elif artifact.exists():
+        artifact.unlink()
+    if not args.no_cache:
+      save_state(args.cache, str(target.resolve()), {
+        "inputs": inputs,
+        "options": options,
+        "output": file_hash(target),
+        "validator": None if args.no_validator else file_hash(artifact),
+        "entries": {f: entries[f] for f in files},
+      })
+    return {
+      "status": "success",
+      "injected": list(inputs),
+      "rebuilt": rebuilt,
+      "reused": [f for f in own if f not in rebuilt],
+      "shared_defs": len(shared),
+      "aliases": aliases,
+      "validator": validator,
+    }
   except Exception as e:
     return {"status": "error", "trace": str(e)}
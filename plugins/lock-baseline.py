@@ -0,0 +1,61 @@
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "framework"))
+from _baseline import CountMismatch, lock
+from _canonical import dumps as canonical_dumps
+from _codec import dumps, loads
+
+class BaselineMismatch(Exception):
+    """Raised when any kernel fails its baseline check, so main.py exits 1 and a build stops."""
+
+    def __init__(self, results):
+        self.results = results
+        failed = [r for r in results if r["status"] == "FAIL"]
+        super().__init__("BASELINE_MISMATCH: " + "; ".join(f"{r['file']}: {describe(r)}" for r in failed))
+
+def describe(result):
+    if "message" in result:
+        return result["message"]
+    return ", ".join(f"{k} locked {m['locked']} != computed {m['computed']}" for k, m in result["mismatches"].items())
+
+def setup_arguments(subparser):
+    subparser.add_argument("kernels", nargs="+", type=Path)
+    subparser.add_argument("--check", action="store_true", help="compare against locked baselines without writing")
+    subparser.add_argument("--update", action="store_true", help="overwrite baselines that are already set")
+    subparser.add_argument("--canonical", action="store_true", help="write the kernel in canonical form")
+
+def run_task(args, context=None):
+    results, failed = [], 0
+    for path in args.kernels:
+        try:
+            doc = loads(path.read_text(encoding="utf-8"))
+            computed, mismatches = lock(doc, update=args.update and not args.check)
+            # a kernel that fails its baseline is left exactly as it was
+            written = not (args.check or mismatches)
+            if written:
+                text = canonical_dumps(doc, indent=2) if args.canonical else dumps(doc, indent=2, ensure_ascii=False)
+                path.write_text(text, encoding="utf-8")
+            status = "FAIL" if mismatches else "PASS"
+            results.append({"file": str(path), "status": status, "baseline": computed, "mismatches": mismatches, "written": written})
+        except CountMismatch as e:
+            status = "FAIL"
+            results.append({"file": str(path), "status": status, "message": f"HALT: {e}"})
+        except Exception as e:
+            status = "FAIL"
+            results.append({"file": str(path), "status": status, "message": f"SYSTEM: {e}"})
+        failed += status == "FAIL"
+    if failed:
+        raise BaselineMismatch(results)
+    return {"results": results, "failed": 0, "error": None}
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(prog="lock-baseline")
+    setup_arguments(p)
+    try:
+        result = run_task(p.parse_args())
+    except BaselineMismatch as e:
+        result = {"results": e.results, "failed": sum(r["status"] == "FAIL" for r in e.results), "error": str(e)}
+    print(dumps(result, indent=2, ensure_ascii=False))
+    sys.exit(1 if result["failed"] else 0)
@@ -1,16 +1,28 @@
 import json
 import sys
 import argparse
-import re
+from collections.abc import Mapping
 from pathlib import Path
 from typing import List, Dict, Any
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "framework"))
+import _bintree
+from _canonical import dumps as canonical_dumps
+from _canonical import normalize
+from _codec import dumps, loads
+from _docmodel import Interner
+from _jsonrepair import repair_json
+from _trace import count, span
+
+def render(data, canonical=False):
+    return canonical_dumps(data, indent=2) if canonical else dumps(data, indent=2, ensure_ascii=False)
+
 def recursive_sum(data):
-    if not isinstance(data, dict): return 0
+    if not isinstance(data, Mapping): return 0
     total = 0
     for k, v in data.items():
         if k == "__LENGTH__" or k == "manifest": continue
-        if isinstance(v, dict):
+        if isinstance(v, Mapping):
             if "__LENGTH__" in v:
                 total += v["__LENGTH__"]
             else:
@@ -18,7 +30,7 @@ def recursive_sum(data):
     return total
 
 def apply_anchors(key, data, l_list, s_list):
-    if not isinstance(data, dict): return data, 0
+    if not isinstance(data, Mapping): return data, 0
     actual_count = len([k for k in data.keys() if k not in ("__LENGTH__", "manifest")])
     count_val = None
     if key in l_list:
@@ -26,16 +38,17 @@ def apply_anchors(key, data, l_list, s_list):
     elif key in s_list:
         count_val = recursive_sum(data)
     if count_val is not None:
+        if not isinstance(data, dict): data = dict(data)
         data["__LENGTH__"] = count_val
         return data, count_val
     return data, actual_count
 
 def extract_and_merge_json(raw_content: str) -> Dict[str, Any]:
-    text = raw_content.lstrip("\ufeff")
-    text = re.sub(r"//.*?\n|/\*.*?\*/", "", text, flags=re.DOTALL)
-    text = re.sub(r",(\s*[}\]])", r"\1", text)
-    text = re.sub(r"'([^'\"\\]*)'", r'"\1"', text)
-    text = re.sub(r'([}\]"\d])\s*\n(\s*["{\[\d])', r"\1,\n\2", text).strip()
+    try:
+        clean = loads(raw_content.lstrip("\ufeff"))
+        if isinstance(clean, (dict, list)): return clean
+    except json.JSONDecodeError: pass
+    text = repair_json(raw_content)[0].strip()
     decoder = json.JSONDecoder()
     objects, index = [], 0
     while index < len(text):
@@ -63,9 +76,70 @@ def collect_json_files(paths: List[str]) -> List[Path]:
         if path_obj.is_file():
             if path_obj.name != "protocol-schema.json": files.append(path_obj)
         elif path_obj.is_dir():
-            files.extend([f for f in sorted(path_obj.glob("**/*.json")) if f.name != "protocol-schema.json"])
+            found = [*path_obj.glob("**/*.json"), *path_obj.glob(f"**/*{_bintree.config['suffix']}")]
+            files.extend([f for f in sorted(found) if f.name != "protocol-schema.json"])
     return sorted(set(files))
 
+def read_document(path, lazy=False):
+    """Parse one input: binary tree documents by magic (lazily if asked), anything else as dirty JSON."""
+    with span("read"):
+        data = path.read_bytes()
+    count("bytes_read", len(data))
+    with span("parse"):
+        if _bintree.is_tree(data):
+            return _bintree.decode(data, lazy)
+        return extract_and_merge_json(data.decode("utf-8"))
+
+def write_document(path, data, canonical=False):
+    """Write JSON, or the binary tree format when path has its suffix; returns bytes written."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with span("serialize"):
+        if _bintree.wants_tree(path):
+            blob = _bintree.encode(normalize(data) if canonical else data)
+        else:
+            blob = render(data, canonical).encode("utf-8")
+    with span("write", file=str(path)):
+        path.write_bytes(blob)
+    return len(blob)
+
+def keyed(content, stem):
+    """(key, content) for one parsed file: its "key" field or the file stem, single-key wrappers unwrapped."""
+    key = content.pop("key") if isinstance(content, dict) and "key" in content else stem
+    if isinstance(content, Mapping) and len(content) == 1 and key in content: content = content[key]
+    return key, content
+
+def nest_entries(entries, identity, length, sums, flat=False, wrap=None, auto_sum_prefix="protocols-"):
+    """Nest (key, content) pairs under identity, adding __LENGTH__ anchors and the manifest."""
+    nested_data, manifest, sums = {}, {}, list(sums)
+    for key, content in entries:
+        if flat and isinstance(content, Mapping):
+            nested_data.update(content)
+        else:
+            nested_data[key] = content
+
+    with span("transform"):
+        if not flat:
+            if identity.startswith(auto_sum_prefix):
+                sums.append(identity)
+            for key in list(nested_data.keys()):
+                content, n = apply_anchors(key, nested_data[key], length, sums)
+                if key in sums:
+                    manifest[f"{key}_total"] = n
+                nested_data[key] = content
+            nested_data, root_count = apply_anchors(identity, nested_data, length, sums)
+            if identity in sums:
+                manifest[f"{identity}_total"] = root_count
+
+    wrapper = loads(wrap) if wrap else {}
+    final_output = {**wrapper, "manifest": manifest, **nested_data} if not flat else {**wrapper, **nested_data}
+    if not manifest: final_output.pop("manifest", None)
+    if isinstance(final_output, dict) and not flat:
+        if sums:
+            final_output["__LENGTH__"] = sum(v.get("__LENGTH__", 0) for k, v in final_output.items() if isinstance(v, Mapping) and k != "manifest")
+        else:
+            final_output["__LENGTH__"] = len([k for k in final_output.keys() if k not in ("__LENGTH__", "manifest")])
+    return final_output
+
 def unnest(d: Any, pk: str = "") -> Dict[str, Any]:
     res = {}
     if isinstance(d, dict):
@@ -96,67 +170,50 @@ def setup_arguments(subparser):
         choices=["nest", "unnest"],
     )
     subparser.add_argument("paths", nargs="+")
-    subparser.add_argument("-o", "--output", required=True, type=Path)
+    subparser.add_argument("-o", "--output", required=True, type=Path, help="Output file; a .bjson suffix writes the binary tree format")
     subparser.add_argument("--length", nargs="*", default=[])
     subparser.add_argument("--sum", nargs="*", default=[])
     subparser.add_argument("--wrap")
     subparser.add_argument("--flat", action="store_true")
     subparser.add_argument("--auto-sum-prefix", default="protocols-", help="Prefix for auto-sum keys")
+    subparser.add_argument("--canonical", action="store_true", help="Sorted keys, NFC strings, normalised numbers")
+    subparser.add_argument("--low-memory", action="store_true", help="Hold inputs in the interned compact model: less memory, slower parse")
 
 def run_task(args, context=None):
     try:
         if args.mode == "nest":
-            files = collect_json_files(args.paths)
+            with span("discover"):
+                files = collect_json_files(args.paths)
+            count("files", len(files))
             if not files:
                 return {"error": "No JSON files found"}
-            nested_data, manifest = {}, {}
             identity = Path(args.paths[0]).name if Path(args.paths[0]).is_dir() else Path(args.output).stem
-            
+            # binary output can splice binary inputs' subtrees without decoding them
+            lazy = _bintree.wants_tree(args.output) and not (args.flat or args.canonical)
+            interner, entries = Interner() if args.low_memory else None, []
             for target in files:
                 try:
-                    content = extract_and_merge_json(target.read_text(encoding="utf-8"))
+                    with span("file", "file", file=str(target)):
+                        content = read_document(target, lazy)
                     if not content: continue
-                    key = content.pop("key") if isinstance(content, dict) and "key" in content else target.stem
-                    if isinstance(content, dict) and len(content) == 1 and key in content: content = content[key]
-                    if args.flat and isinstance(content, dict):
-                        nested_data.update(content)
-                    else:
-                        nested_data[key] = content
+                    key, content = keyed(content, target.stem)
+                    entries.append((key, interner.compact(content) if interner else content))
                 except Exception as e:
                     sys.stderr.write(f"SKIP: {target.name} | {str(e)}\n")
-            
-            if not args.flat:
-                if identity.startswith(args.auto_sum_prefix):
-                    args.sum.append(identity)
-                for key in list(nested_data.keys()):
-                    content, count = apply_anchors(key, nested_data[key], args.length, args.sum)
-                    if key in args.sum:
-                        manifest[f"{key}_total"] = count
-                    nested_data[key] = content
-                nested_data, root_count = apply_anchors(identity, nested_data, args.length, args.sum)
-                if identity in args.sum:
-                    manifest[f"{identity}_total"] = root_count
-            
-            wrapper = json.loads(args.wrap) if args.wrap else {}
-            final_output = {**wrapper, "manifest": manifest, **nested_data} if not args.flat else {**wrapper, **nested_data}
-            if not manifest: final_output.pop("manifest", None)
-            if isinstance(final_output, dict) and not args.flat:
-                if args.sum:
-                    final_output["__LENGTH__"] = sum(v.get("__LENGTH__", 0) for k, v in final_output.items() if isinstance(v, dict) and k != "manifest")
-                else:
-                    final_output["__LENGTH__"] = len([k for k in final_output.keys() if k not in ("__LENGTH__", "manifest")])
-            
-            args.output.parent.mkdir(parents=True, exist_ok=True)
-            args.output.write_text(json.dumps(final_output, indent=2, ensure_ascii=False), encoding="utf-8")
+
+            final_output = nest_entries(
+                entries, identity, args.length, args.sum, args.flat, args.wrap, args.auto_sum_prefix
+            )
+            count("bytes_written", write_document(args.output, final_output, args.canonical))
             return {"mode": "nest", "files_merged": len(files), "output_file": str(args.output)}
 
         elif args.mode == "unnest":
             if not args.paths or not Path(args.paths[0]).exists():
                 return {"error": "Input file required for unnest mode"}
-            d = json.loads(Path(args.paths[0]).read_text(encoding="utf-8"))
+            data = Path(args.paths[0]).read_bytes()
+            d = _bintree.decode(data) if _bintree.is_tree(data) else loads(data)
             flat = unnest(d)
-            args.output.parent.mkdir(parents=True, exist_ok=True)
-            args.output.write_text(json.dumps(flat, indent=2, ensure_ascii=False), encoding="utf-8")
+            write_document(args.output, flat, args.canonical)
             return {"mode": "unnest", "keys_flattened": len(flat), "output_file": str(args.output)}
 
     except Exception as e:
@@ -165,4 +222,4 @@ def run_task(args, context=None):
 if __name__ == "__main__":
     p = argparse.ArgumentParser()
     setup_arguments(p)
-    print(json.dumps(run_task(p.parse_args()), indent=2))
+    print(dumps(run_task(p.parse_args()), indent=2))
@@ -0,0 +1,34 @@
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "framework"))
+from _codec import dumps, loads
+from _canonical import dumps as canonical_dumps
+from _jsondiff import apply_patch
+
+def setup_arguments(subparser):
+    subparser.add_argument("base", type=Path)
+    subparser.add_argument("patch", type=Path, help="NDJSON delta from diff-json (a JSON array of ops also works)")
+    subparser.add_argument("-o", "--output", required=True, type=Path)
+    subparser.add_argument("--no-verify", action="store_true", help="skip base/target digest checks")
+    subparser.add_argument("--canonical", action="store_true", help="Sorted keys, NFC strings, normalised numbers")
+
+def run_task(args, context=None):
+    doc = loads(args.base.read_text(encoding="utf-8"))
+    with open(args.patch, "r", encoding="utf-8") as fh:
+        doc, applied = apply_patch(doc, fh, verify=not args.no_verify)
+    text = canonical_dumps(doc, indent=2) if args.canonical else dumps(doc, indent=2, ensure_ascii=False)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(text, encoding="utf-8")
+    return {"applied": applied, "output_file": str(args.output)}
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(prog="patch-json")
+    setup_arguments(p)
+    try:
+        result = run_task(p.parse_args())
+    except Exception as e:
+        print(dumps({"error": str(e), "error_type": type(e).__name__}, indent=2, ensure_ascii=False))
+        sys.exit(1)
+    print(dumps(result, indent=2, ensure_ascii=False))
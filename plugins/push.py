@@ -1,18 +1,159 @@
 import os
+import sys
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "framework"))
+from _codec import loads
+from _statefile import update as update_state
+
+MANIFEST_VERSION = 1
+SKIP = ["push.py", ".git", "__pycache__", "main.py"]
+# per-cwd state of other plugins; only part of the tree when pushing the working directory
+CWD_CACHES = [".verify-json-cache.json", ".inject-schema-cache.json", ".linter-cache.json"]
+SYMBOLS = {"PUSHED": "✅", "FAILED": "❌"}
+
+
+class PushFailed(Exception):
+  """Raised after the manifest is saved when any upload failed, so main.py exits 1."""
+
+  def __init__(self, results):
+    self.results = results
+    failed = [r for r in results if r["status"] == "FAILED"]
+    super().__init__(f"PUSH_FAILED: {len(failed)} of {len(results)} uploads: " + ", ".join(f"{r['file']} ({r['code']})" for r in failed))
+
+
+def setup_arguments(parser):
+  parser.add_argument("root", nargs="?", default=".", help="Tree to upload")
+  parser.add_argument("--endpoint", default=os.environ.get("PUSH_ENDPOINT"), help="upload URL (default: $PUSH_ENDPOINT)")
+  parser.add_argument("--token", default=os.environ.get("PUSH_TOKEN"), help="bearer token (default: $PUSH_TOKEN)")
+  parser.add_argument("-j", "--jobs", type=int, default=8, help="concurrent uploads")
+  parser.add_argument("--retries", type=int, default=3)
+  parser.add_argument("--backoff", type=float, default=0.5, help="retry backoff factor in seconds")
+  parser.add_argument("--timeout", type=float, default=30)
+  parser.add_argument("--manifest", default=".push-manifest.json", help="content hashes of pushed files")
+  parser.add_argument("--force", action="store_true", help="upload even unchanged files")
+  parser.add_argument("--dry-run", action="store_true", help="list what would be uploaded")
+  parser.add_argument("--progress", action="store_true", help="print each result to stderr as it completes")
+
+
+def make_session(token, jobs, retries, backoff):
+  """One pooled session shared by all workers; transient failures retry with backoff."""
+  retry = Retry(
+    total=retries,
+    backoff_factor=backoff,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset({"PUT"}),
+    raise_on_status=False,
+  )
+  adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(jobs, 1), max_retries=retry)
+  session = requests.Session()
+  session.mount("http://", adapter)
+  session.mount("https://", adapter)
+  session.headers["Authorization"] = f"Bearer {token}"
+  return session
+
+
+def walk(root, skip):
+  for base, dirs, files in os.walk(root):
+    dirs[:] = sorted(d for d in dirs if d not in skip)
+    for name in sorted(files):
+      if name not in skip:
+        path = Path(base, name)
+        yield path, path.relative_to(root).as_posix()
+
+
+def file_hash(path):
+  h = hashlib.sha256()
+  with open(path, "rb") as f:
+    for block in iter(lambda: f.read(1 << 20), b""):
+      h.update(block)
+  return h.hexdigest()
+
+
+def load_manifest(path, endpoint):
+  try:
+    data = loads(Path(path).read_text(encoding="utf-8"))
+    return data["endpoints"].get(endpoint, {}) if data.get("version") == MANIFEST_VERSION else {}
+  except (OSError, ValueError, KeyError, AttributeError):
+    return {}
+
+
+def save_manifest(path, endpoint, hashes):
+  def merge(data):
+    if not (isinstance(data, dict) and data.get("version") == MANIFEST_VERSION and isinstance(data.get("endpoints"), dict)):
+      data = {"version": MANIFEST_VERSION, "endpoints": {}}
+    data["endpoints"][endpoint] = hashes
+    return data
+  if not update_state(path, merge, indent=1, sort_keys=True):
+    raise OSError(f"could not write the push manifest {path}")
+
+
+def upload(session, url, path, timeout):
+  with open(path, "rb") as f:
+    body = f.read()
+  try:
+    res = session.put(url, data=body, timeout=timeout)
+    return 200 <= res.status_code < 300, res.status_code
+  except requests.RequestException as e:
+    return False, type(e).__name__
 
 
 def run_task(args, config):
-  URL = "https://royal-moon-234f.shakeelkhan.workers.dev"
-  TOKEN = "AISUCKS"
-  SKIP = ["push.py", ".git", "__pycache__", "main.py"]
-  headers = {"Authorization": f"Bearer {TOKEN}"}
-
-  for root, _, files in os.walk("."):
-    for name in files:
-      if name in SKIP or any(s in root for s in SKIP):
-        continue
-      path = os.path.relpath(os.path.join(root, name), ".")
-      with open(path, "rb") as f:
-        res = requests.put(f"{URL}/{path}", data=f.read(), headers=headers)
-        print(f"{'✅' if res.status_code == 200 else '❌'} {path}")
+  if not args.endpoint:
+    raise ValueError("no upload endpoint: pass --endpoint or set PUSH_ENDPOINT")
+  if not args.token and not args.dry_run:
+    raise ValueError("no upload token: pass --token or set PUSH_TOKEN")
+  endpoint = args.endpoint.rstrip("/")
+  skip = set(SKIP) | {Path(args.manifest).name}
+  if Path(args.root).resolve() == Path.cwd():
+    skip.update(CWD_CACHES)
+  known = {} if args.force else load_manifest(args.manifest, endpoint)
+  pushed = dict(load_manifest(args.manifest, endpoint))
+  todo, skipped = [], 0
+  for path, rel in walk(args.root, skip):
+    digest = file_hash(path)
+    if known.get(rel) == digest:
+      skipped += 1
+    else:
+      todo.append((path, rel, digest))
+  if args.dry_run:
+    return {"status": "success", "dry_run": True, "skipped": skipped, "would_push": [rel for _, rel, _ in todo]}
+
+  results = []
+  session = make_session(args.token, args.jobs, args.retries, args.backoff)
+  try:
+    with ThreadPoolExecutor(max_workers=max(args.jobs, 1)) as pool:
+      futures = {
+        pool.submit(upload, session, f"{endpoint}/{rel}", path, args.timeout): (rel, digest)
+        for path, rel, digest in todo
+      }
+      for fut in as_completed(futures):
+        rel, digest = futures[fut]
+        ok, code = fut.result()
+        status = "PUSHED" if ok else "FAILED"
+        if ok:
+          pushed[rel] = digest
+        results.append({"file": rel, "status": status, "code": code})
+        if args.progress:
+          sys.stderr.write(f"{SYMBOLS[status]} {rel}\n")
+  finally:
+    session.close()
+    save_manifest(args.manifest, endpoint, pushed)
+  results.sort(key=lambda r: r["file"])
+  failed = sum(r["status"] == "FAILED" for r in results)
+  if failed:
+    raise PushFailed(results)
+  return {
+    "status": "success",
+    "pushed": len(results) - failed,
+    "failed": failed,
+    "skipped": skipped,
+    "results": results,
+    "error": None,
+  }
@@ -1,59 +1,138 @@
 import os
-import json
-import time
-from playwright.sync_api import sync_playwright
+import sys
+import asyncio
+import tempfile
+from pathlib import Path
+
+from playwright.async_api import async_playwright
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "framework"))
+from _codec import dumps, loads
 
 GEMINI_URL_TEMPLATE = "https://gemini.google.com/app/{}"
 MESSAGE_SELECTOR = ".message-content"
 DEFAULT_TIMEOUT = 10000
-WAIT_BUFFER_SECONDS = 2
+DEFAULT_PORT = 9222
+POLL_MS = 200
+STABLE_POLLS = 2
+
+# Resolves once the selector matches and the message count and text length
+# have stayed the same for `need` consecutive polls.
+READY_JS = """([sel, need]) => {
+  const els = document.querySelectorAll(sel);
+  if (!els.length) return false;
+  let size = 0;
+  for (const e of els) size += e.innerText.length;
+  const sig = els.length + ":" + size;
+  const w = window.__syncReady || (window.__syncReady = {sig: "", n: 0});
+  if (w.sig === sig) w.n++; else { w.sig = sig; w.n = 0; }
+  return w.n >= need;
+}"""
+TEXTS_JS = "els => els.map(e => e.innerText)"
+SYMBOLS = {"UPDATED": "✓", "UNCHANGED": "=", "FAILED": "✗"}
 
 
 def setup_arguments(parser):
-  parser.add_argument("--thread-id", required=True)
+  parser.add_argument("--thread-id", nargs="+", default=[], help="one or more thread IDs")
+  parser.add_argument("--threads-file", help="file with one thread ID per line")
   parser.add_argument("--timeout", type=int, default=DEFAULT_TIMEOUT)
+  parser.add_argument("-j", "--jobs", type=int, default=4, help="pages open at once")
+  parser.add_argument("--url-template", default=GEMINI_URL_TEMPLATE)
+  parser.add_argument("--selector", default=MESSAGE_SELECTOR)
+  parser.add_argument("--vault", help="vault directory (default: config vault_directory)")
+  parser.add_argument("--port", type=int, help="CDP debugging port (default: config browser_config)")
+
+
+def thread_ids(args):
+  ids = list(args.thread_id)
+  if args.threads_file:
+    with open(args.threads_file) as f:
+      ids.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+  return list(dict.fromkeys(ids))
+
+
+def store(vault_path, thread_id, message_texts):
+  """Write the thread only when its messages changed; returns (status, new message count)."""
+  output_file = os.path.join(vault_path, f"{thread_id}.json")
+  try:
+    with open(output_file) as f:
+      old = loads(f.read()).get("data", [])
+  except (OSError, ValueError, AttributeError):
+    old = None
+  if old == message_texts:
+    return "UNCHANGED", 0
+  kept = 0
+  for a, b in zip(old or [], message_texts):
+    if a != b:
+      break
+    kept += 1
+  fd, tmp = tempfile.mkstemp(dir=vault_path, suffix=".tmp")
+  with os.fdopen(fd, "w") as f:
+    f.write(dumps({"id": thread_id, "data": message_texts}, indent=2))
+  os.replace(tmp, output_file)
+  return "UPDATED", len(message_texts) - kept
+
+
+async def fetch(context, args, thread_id):
+  page = await context.new_page()
+  try:
+    await page.goto(
+      args.url_template.format(thread_id),
+      wait_until="domcontentloaded",
+      timeout=args.timeout,
+    )
+    await page.wait_for_function(
+      READY_JS, arg=[args.selector, STABLE_POLLS], polling=POLL_MS, timeout=args.timeout
+    )
+    texts = await page.eval_on_selector_all(args.selector, TEXTS_JS)
+    return [t for t in texts if t]
+  finally:
+    await page.close()
+
+
+async def sync_threads(args, ids, vault_path, endpoint):
+  results = []
+  gate = asyncio.Semaphore(max(args.jobs, 1))
+  async with async_playwright() as playwright:
+    browser = await playwright.chromium.connect_over_cdp(endpoint)
+    context = browser.contexts[0] if browser.contexts else await browser.new_context()
+
+    async def one(thread_id):
+      async with gate:
+        try:
+          texts = await fetch(context, args, thread_id)
+          status, new = store(vault_path, thread_id, texts)
+          result = {"id": thread_id, "status": status, "messages": len(texts), "new": new}
+        except Exception as error:
+          result = {"id": thread_id, "status": "FAILED", "error": str(error)}
+      if "error" in result:
+        detail = f" | {result['error']}"
+      else:
+        detail = f" ({result['messages']} messages, {result['new']} new)"
+      sys.stderr.write(f"{SYMBOLS[result['status']]} {thread_id}{detail}\n")
+      results.append(result)
+
+    await asyncio.gather(*(one(t) for t in ids))
+  return results
 
 
 def run_task(args, config):
-  vault_path = config["vault_directory"]
-  debugging_port = config["browser_config"]["debugging_port"]
-  thread_id = args.thread_id
-  timeout = args.timeout
+  config = config or {}
+  vault_path = args.vault or config.get("vault_directory")
+  port = args.port or config.get("browser_config", {}).get("debugging_port", DEFAULT_PORT)
+  ids = thread_ids(args)
+  if not vault_path:
+    return {"error": "NO_VAULT", "results": []}
+  if not ids:
+    return {"error": "NO_THREADS", "results": []}
 
   os.makedirs(vault_path, exist_ok=True)
 
   try:
-    with sync_playwright() as playwright:
-      browser = playwright.chromium.connect_over_cdp(
-        f"http://localhost:{debugging_port}"
-      )
-      context = browser.contexts[0] if browser.contexts else browser.new_context()
-      page = context.new_page()
-
-      try:
-        page.goto(
-          GEMINI_URL_TEMPLATE.format(thread_id),
-          wait_until="domcontentloaded",
-          timeout=timeout,
-        )
-        page.wait_for_selector(MESSAGE_SELECTOR, timeout=timeout)
-        time.sleep(WAIT_BUFFER_SECONDS)
-
-        message_elements = page.query_selector_all(MESSAGE_SELECTOR)
-        message_texts = [
-          element.inner_text() for element in message_elements if element.inner_text()
-        ]
-
-        output_file = os.path.join(vault_path, f"{thread_id}.json")
-        with open(output_file, "w") as f:
-          json.dump({"id": thread_id, "data": message_texts}, f, indent=2)
-
-        print(f"✓ Updated: {output_file} ({len(message_texts)} messages)")
-
-      except Exception as error:
-        print(f"Error processing thread {thread_id}: {error}")
-      finally:
-        page.close()
-
+    results = asyncio.run(sync_threads(args, ids, vault_path, f"http://localhost:{port}"))
   except Exception as error:
-    print(f"Error connecting to browser on port {debugging_port}: {error}")
+    return {"error": f"Error connecting to browser on port {port}: {error}", "results": []}
+  order = {t: i for i, t in enumerate(ids)}
+  results.sort(key=lambda r: order[r["id"]])
+  stats = {s: sum(r["status"] == s for r in results) for s in ("UPDATED", "UNCHANGED", "FAILED")}
+  return {"stats": stats, "results": results, "error": None}
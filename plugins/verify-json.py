@@ -2,100 +2,258 @@
 
 import json
 import argparse
+import hashlib
+import os
+import struct
 import sys
-import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from jsonschema import validate, ValidationError, SchemaError
+from jsonschema import validators, SchemaError
+from jsonschema.exceptions import best_match
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "framework"))
+import _bintree
+from _canonical import digest as canonical_digest
+from _canonical import dumps as canonical_dumps
+from _codec import loads
+from _docmodel import load as load_compact
+from _fastschema import build_checker
+from _jsonrepair import describe, repair_json
+from _protograph import GraphIndex, check, summarize
+from _statefile import update as update_state
+from _trace import count, span
+
+_CHECKERS = {}
+_WORKER = {}
+SYMBOLS = {"PASS": "✓", "FIXED": "⚙", "FAIL": "✗"}
+CACHE_VERSION = 1
+# build outputs are JSON text or binary tree documents (nest-json -o *.bjson)
+SUFFIXES = ('.json', '.bjson')
+
+def load_cache(path):
+    try:
+        data = loads(Path(path).read_text(encoding='utf-8'))
+        return data["entries"] if data.get("version") == CACHE_VERSION else {}
+    except (OSError, ValueError, KeyError, AttributeError):
+        return {}
+
+def save_cache(path, changes):
+    """Merge this run's entries (None drops one) into the cache as other jobs may have left it."""
+    def merge(data):
+        fresh = isinstance(data, dict) and data.get("version") == CACHE_VERSION and isinstance(data.get("entries"), dict)
+        entries = data["entries"] if fresh else {}
+        for key, entry in changes.items():
+            if entry is None:
+                entries.pop(key, None)
+            else:
+                entries[key] = entry
+        return {"version": CACHE_VERSION, "entries": entries}
+    update_state(path, merge)
+
+def compile_checker(schema, fast=False):
+    """Build (once per schema) a callable returning the first error message or None.
+
+    In fast mode the validator is generated in process from the schema itself;
+    code found on disk (inject-schema's .validator.py) is never executed.
+    """
+    digest = canonical_digest(schema)
+    if (digest, fast) in _CHECKERS:
+        return _CHECKERS[(digest, fast)]
+    cls = validators.validator_for(schema)
+    cls.check_schema(schema)
+    checker = None
+    if fast:
+        checker = build_checker(schema)
+    if checker is None:
+        validator = cls(schema)
+
+        def checker(instance):
+            err = best_match(validator.iter_errors(instance))
+            return err.message if err else None
+    _CHECKERS[(digest, fast)] = checker
+    return checker
 
 def locate_json_files(target_paths):
     json_list = []
     for raw_path in target_paths:
         p = Path(raw_path)
-        if p.is_file() and p.suffix.lower() == '.json':
+        if p.is_file() and p.suffix.lower() in SUFFIXES:
             json_list.append(p)
         elif p.is_dir():
-            json_list.extend(p.rglob('*.json'))
+            for suffix in SUFFIXES:
+                json_list.extend(p.rglob('*' + suffix))
     return sorted(set(json_list))
 
 def perform_repair(content):
-    changes = []
-    if content.startswith('\ufeff'):
-        content = content.lstrip('\ufeff')
-        changes.append("bom")
-    sanitized = re.sub(r'//.*?\n|/\*.*?\*/', '', content, flags=re.DOTALL)
-    if sanitized != content:
-        content = sanitized
-        changes.append("comments")
-    content, count = re.subn(r',(\s*[}\]])', r'\1', content)
-    if count > 0: changes.append("trailing-commas")
-    content, count = re.subn(r"'([^'\"\\]*)'", r'"\1"', content)
-    if count > 0: changes.append("quotes")
-    content, count = re.subn(r'([}\]"\d])\s*\n(\s*["{[\d])', r'\1,\n\2', content)
-    if count > 0: changes.append("delimiters")
-    return content, changes
-
-def audit_file(file_path, schema, auto_fix):
+    fixed, fixes = repair_json(content)
+    return fixed, describe(fixes)
+
+def audit_file(file_path, checker, auto_fix):
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            raw = f.read()
-        try:
-            data = json.loads(raw)
-        except json.JSONDecodeError as err:
-            if auto_fix:
-                fixed, log = perform_repair(raw)
-                try:
-                    data = json.loads(fixed)
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        f.write(fixed)
-                    return "FIXED", f"REPAIRED: {', '.join(log)}"
-                except json.JSONDecodeError:
-                    return "FAIL", f"SYNTAX: L{err.lineno}"
-            return "FAIL", f"SYNTAX: L{err.lineno}"
-        if schema:
-            if isinstance(data, dict):
-                for k, v in data.items():
-                    if isinstance(v, dict):
-                        v.setdefault('key', k)
-                    validate(instance=v, schema=schema)
-            else:
-                validate(instance=data, schema=schema)
+        with open(file_path, 'rb') as f:
+            blob = f.read()
+        if _bintree.is_tree(blob):
+            # tool output, never hand-edited: a document that does not decode is not repaired
+            try:
+                data = _bintree.decode(blob)
+            except (ValueError, IndexError, struct.error) as err:
+                return "FAIL", f"BINTREE: {err}"
+        else:
+            raw = blob.decode('utf-8')
+            try:
+                data = loads(raw)
+            except json.JSONDecodeError as err:
+                if auto_fix:
+                    # repaired text is written back with the newlines text mode would have read
+                    fixed, log = perform_repair(raw.replace('\r\n', '\n').replace('\r', '\n'))
+                    try:
+                        data = loads(fixed)
+                        with open(file_path, 'w', encoding='utf-8') as f:
+                            f.write(fixed)
+                        return "FIXED", f"REPAIRED: {', '.join(log)}"
+                    except json.JSONDecodeError as left:
+                        return "FAIL", f"SYNTAX: L{err.lineno}:C{err.colno} {err.msg} | after repair L{left.lineno}:C{left.colno} {left.msg}"
+                return "FAIL", f"SYNTAX: L{err.lineno}:C{err.colno} {err.msg}"
+        if checker:
+            values = data.items() if isinstance(data, dict) else [(None, data)]
+            for k, v in values:
+                if k is not None and isinstance(v, dict):
+                    v.setdefault('key', k)
+                msg = checker(v)
+                if msg:
+                    return "FAIL", f"SCHEMA: {msg}"
         return "PASS", ""
-    except ValidationError as e:
-        return "FAIL", f"SCHEMA: {e.message}"
     except Exception as e:
         return "FAIL", f"SYSTEM: {str(e)}"
 
+def load_kernel(file_path, compact=False):
+    """A kernel as plain data, or in the interned compact model (less memory, slower parse)."""
+    if compact:
+        return load_compact(file_path)
+    with open(file_path, 'rb') as f:
+        raw = f.read()
+    return _bintree.decode(raw) if _bintree.is_tree(raw) else loads(raw.decode('utf-8'))
+
+def audit_graph(file_path, compact=False):
+    """Semantic checks over a built kernel: references, dependency flow, stage graph."""
+    try:
+        idx = GraphIndex.build(load_kernel(file_path, compact))
+    except Exception as e:
+        return "FAIL", f"SYSTEM: {e}", [], {}
+    issues = check(idx)
+    summary = summarize(idx, issues)
+    head = ", ".join(f"{i['check']}:{i['ref']}" for i in issues[:5])
+    more = f" (+{len(issues) - 5})" if len(issues) > 5 else ""
+    msg = f"GRAPH: {summary['errors']}E {summary['warnings']}W" + (f" | {head}{more}" if issues else "")
+    return ("FAIL" if summary["errors"] else "PASS"), msg, issues, summary
+
+def run_graph(files, args):
+    stats = {'PASS': 0, 'FIXED': 0, 'FAIL': 0}
+    results = []
+    for f in files:
+        res, msg, issues, summary = audit_graph(f, args.low_memory)
+        stats[res] += 1
+        results.append({"file": f.name, "status": res, "message": msg, "symbol": SYMBOLS[res], "graph": summary, "issues": issues})
+    return {"stats": stats, "results": results, "error": None}
+
+def _init_worker(schema, fast, auto_fix):
+    _WORKER["checker"] = compile_checker(schema, fast) if schema else None
+    _WORKER["auto_fix"] = auto_fix
+
+def _audit_worker(file_path):
+    return file_path, audit_file(file_path, _WORKER["checker"], _WORKER["auto_fix"])
+
+def iter_audits(files, schema, fast, auto_fix, jobs):
+    """Yield (file, (status, message)) in completion order."""
+    if jobs <= 1 or len(files) < 2:
+        _init_worker(schema, fast, auto_fix)
+        for f in files:
+            with span("file", "file", file=str(f)):
+                result = _audit_worker(f)
+            yield result
+        return
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=_init_worker, initargs=(schema, fast, auto_fix)
+    ) as pool:
+        futures = [pool.submit(_audit_worker, f) for f in files]
+        for fut in as_completed(futures):
+            yield fut.result()
+
 def setup_arguments(subparser):
     subparser.add_argument('inputs', nargs='+')
     subparser.add_argument('-s', '--schema', default=None)
     subparser.add_argument('-a', '--auto-fix', action='store_true')
+    subparser.add_argument('-j', '--jobs', type=int, default=0, help='worker processes (0 = all cores, 1 = in process)')
+    subparser.add_argument('--fast', action='store_true', help='use generated validator when the schema allows')
+    subparser.add_argument('--progress', action='store_true', help='print each result to stderr as it completes')
+    subparser.add_argument('--graph', action='store_true', help='check protocol/stage/rule references of built kernels')
+    subparser.add_argument('--low-memory', action='store_true', help='with --graph, hold kernels in the interned compact model: less memory, slower parse')
+    subparser.add_argument('--cache', default='.verify-json-cache.json', help='result cache file')
+    subparser.add_argument('--no-cache', action='store_true', help='revalidate everything and leave the cache untouched')
 
 def run_task(args, context=None):
     schema_data = None
     if args.schema:
         try:
-            with open(args.schema, 'r', encoding='utf-8') as f:
-                schema_data = json.load(f)
+            with span("compile", file=args.schema):
+                with open(args.schema, 'r', encoding='utf-8') as f:
+                    schema_data = loads(f.read())
+                compile_checker(schema_data, args.fast)
+        except SchemaError as e:
+            return {"error": f"SCHEMA_ERR: {e.message}", "stats": {}}
         except Exception as e:
             return {"error": f"SCHEMA_ERR: {e}", "stats": {}}
     
-    files = locate_json_files(args.inputs)
-    if args.schema:
-        s_abs = Path(args.schema).resolve()
-        files = [f for f in files if f.resolve() != s_abs]
+    with span("discover"):
+        files = locate_json_files(args.inputs)
+        if args.schema:
+            s_abs = Path(args.schema).resolve()
+            files = [f for f in files if f.resolve() != s_abs]
+    count("files", len(files))
     
     if not files:
         return {"error": "NO_TARGETS", "stats": {}}
+    if args.graph:
+        return run_graph(files, args)
     
     stats = {'PASS': 0, 'FIXED': 0, 'FAIL': 0}
     results = []
-    for f in files:
-        res, msg = audit_file(f, schema_data, args.auto_fix)
+    salt = canonical_dumps([schema_data, args.fast, args.auto_fix]).encode()
+    cache = {} if args.no_cache else load_cache(args.cache)
+    keys, pending, cached, changes = {}, [], [], {}
+    with span("read"):
+        for f in files:
+            h = hashlib.sha256(salt)
+            h.update(f.read_bytes())
+            keys[f] = h.hexdigest()
+            hit = cache.get(str(f.resolve()))
+            if hit and hit["key"] == keys[f]:
+                cached.append((f, (hit["status"], hit["message"])))
+            else:
+                pending.append(f)
+    count("cached", len(cached))
+
+    def report(f, res, msg):
         stats[res] += 1
-        sym = {"PASS": "✓", "FIXED": "⚙", "FAIL": "✗"}[res]
+        sym = SYMBOLS[res]
+        if args.progress:
+            sys.stderr.write(f"{sym} {f.name}" + (f" | {msg}" if msg else "") + "\n")
         results.append({"file": f.name, "status": res, "message": msg, "symbol": sym})
+
+    for f, (res, msg) in cached:
+        report(f, res, msg)
+    jobs = args.jobs or os.cpu_count() or 1
+    with span("validate", jobs=jobs, files=len(pending)):
+        for f, (res, msg) in iter_audits(pending, schema_data, args.fast, args.auto_fix, jobs):
+            report(f, res, msg)
+            # a fixed file changed on disk: its next run validates it afresh
+            changes[str(f.resolve())] = None if res == "FIXED" else {"key": keys[f], "status": res, "message": msg}
+    results.sort(key=lambda r: r["file"])
+    if not args.no_cache and pending:
+        with span("write", file=args.cache):
+            save_cache(args.cache, changes)
     
-    return {"stats": stats, "results": results, "error": None}
+    return {"stats": stats, "results": results, "cached": len(cached), "error": None}
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(prog='validate-json')
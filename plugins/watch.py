@@ -0,0 +1,324 @@
+import copy
+import ctypes
+import ctypes.util
+import importlib.util
+import os
+import select
+import struct
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "framework"))
+import _bintree
+from _baseline import lock
+from _codec import dumps, loads
+
+LLMS = ["chatgpt", "gemini", "perplexity"]
+BOOTSTRAP = ("protocol-schema", "rules", "orchestration-", "rules-")
+KERNEL_WRAP = '{"metadata":{"type":"orchestration-control-plane"}}'
+# IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+IN_MASK = 0x2 | 0x8 | 0x40 | 0x80 | 0x100 | 0x200
+EVENT = struct.Struct("iIII")
+
+def setup_arguments(subparser):
+    subparser.add_argument("--src", default="protocols", help="protocol source tree")
+    subparser.add_argument("--build", default="build", help="build directory, as in build.sh")
+    subparser.add_argument("--llm", nargs="+", default=LLMS)
+    subparser.add_argument("--debounce", type=float, default=0.15, help="quiet seconds before a rebuild")
+    subparser.add_argument("--interval", type=float, default=0.25, help="poll interval in seconds")
+    subparser.add_argument("--poll", action="store_true", help="poll even when inotify is available")
+    subparser.add_argument("--no-validate", action="store_true", help="skip schema checks of edited protocols")
+    subparser.add_argument("--once", action="store_true", help="build once and exit")
+
+def sibling(name):
+    """Load another plugin from this directory, sharing main.py's module names."""
+    mod_name = name.replace("-", "_")
+    if mod_name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(mod_name, Path(__file__).with_name(f"{name}.py"))
+        mod = importlib.util.module_from_spec(spec)
+        sys.modules[mod_name] = mod
+        spec.loader.exec_module(mod)
+    return sys.modules[mod_name]
+
+def strip_nulls(o):
+    if isinstance(o, dict):
+        return {k: v for k, v in ((kk, strip_nulls(vv)) for kk, vv in o.items()) if v is not None}
+    if isinstance(o, list):
+        return [x for x in (strip_nulls(i) for i in o) if x is not None]
+    return o
+
+def write_if_changed(path, data):
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        if path.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    return True
+
+class Inotify:
+    """Wakes up on writes, renames, creates and deletes in the watched directories (Linux only)."""
+
+    def __init__(self):
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watched = set()
+
+    def add(self, path):
+        path = str(path)
+        if path not in self.watched and self.libc.inotify_add_watch(self.fd, path.encode(), IN_MASK) >= 0:
+            self.watched.add(path)
+
+    def wait(self, timeout):
+        """True when events arrived within timeout; the events themselves are drained and dropped."""
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return False
+        while True:
+            try:
+                if not os.read(self.fd, 64 * (EVENT.size + 256)):
+                    break
+            except BlockingIOError:
+                break
+        return True
+
+    def close(self):
+        os.close(self.fd)
+
+class Poller:
+    """Fallback: every wait may have changes; the stat scan decides."""
+
+    def add(self, path):
+        pass
+
+    def wait(self, timeout):
+        time.sleep(timeout)
+        return True
+
+    def close(self):
+        pass
+
+class Watcher:
+    """Keeps parsed protocols, stage documents and aggregates in memory and rebuilds only what an edit touches."""
+
+    def __init__(self, args):
+        self.src, self.build, self.llms = Path(args.src), Path(args.build), list(args.llm)
+        self.nest = sibling("nest-json")
+        self.session = sibling("build-session")
+        self.validate = not args.no_validate
+        self.stamps, self.files, self.boot = {}, {}, {}
+        self.stages, self.aggregates = {}, {}
+        self.checker = None
+
+    def scan(self):
+        stamps = {}
+        for f in self.src.glob("*.json"):
+            if f.stem.startswith(BOOTSTRAP):
+                stamps[f] = self.stamp(f)
+        for d in self.src.glob("s*-*"):
+            if d.is_dir():
+                for f in d.glob("**/*.json"):
+                    if f.name != "protocol-schema.json":
+                        stamps[f] = self.stamp(f)
+        return {f: s for f, s in stamps.items() if s}
+
+    @staticmethod
+    def stamp(f):
+        try:
+            st = f.stat()
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def dirs(self):
+        return [self.src] + sorted(d for d in self.src.glob("s*-*/**") if d.is_dir())
+
+    def changes(self):
+        now = self.scan()
+        changed = [f for f, s in now.items() if self.stamps.get(f) != s]
+        removed = [f for f in self.stamps if f not in now]
+        self.stamps = now
+        return changed, removed
+
+    def stage_of(self, f):
+        rel = f.relative_to(self.src)
+        return rel.parts[0] if len(rel.parts) > 1 else None
+
+    def llms_of(self, name):
+        return [llm for llm in self.llms if llm in name]
+
+    def boot_llms(self, stem):
+        return self.llms_of(stem) if stem.startswith(("orchestration-", "rules-")) else self.llms
+
+    def load_boot(self, f):
+        """Bootstrap files the way build.sh minifies them (null removal), kept parsed."""
+        doc = strip_nulls(self.nest.extract_and_merge_json(f.read_text(encoding="utf-8")))
+        self.boot[f.stem] = doc
+        write_if_changed(self.build / "protocols" / f.name, dumps(doc, indent=2, ensure_ascii=False))
+        if f.stem == "protocol-schema" and self.validate:
+            self.checker = sibling("verify-json").compile_checker(doc, fast=True)
+
+    def load_protocol(self, f):
+        raw = f.read_text(encoding="utf-8")
+        content = self.nest.extract_and_merge_json(raw)
+        problem = None
+        if self.checker and isinstance(content, dict) and content:
+            problem = self.checker(dict(content))
+        self.files[f] = self.nest.keyed(content, f.stem) if content else None
+        return problem
+
+    def apply(self, changed, removed):
+        """Re-parse touched files; returns (dirty stages, dirty llms, problems)."""
+        stages, llms, problems = set(), set(), []
+        for f in removed:
+            stage = self.stage_of(f)
+            self.files.pop(f, None)
+            if stage:
+                stages.add(stage)
+                llms.update(self.llms_of(stage))
+            else:
+                self.boot.pop(f.stem, None)
+                llms.update(self.boot_llms(f.stem))
+        # bootstrap first, so a schema edit applies to protocols changed in the same burst
+        for f in sorted(changed, key=lambda p: self.stage_of(p) is not None):
+            stage = self.stage_of(f)
+            try:
+                if stage is None:
+                    self.load_boot(f)
+                    llms.update(self.boot_llms(f.stem))
+                else:
+                    problem = self.load_protocol(f)
+                    if problem:
+                        problems.append(f"{f.relative_to(self.src)}: {problem}")
+                    stages.add(stage)
+                    llms.update(self.llms_of(stage))
+            except Exception as e:
+                problems.append(f"{f.relative_to(self.src)}: {e}")
+        return stages, llms, problems
+
+    def rebuild_stage(self, stage):
+        prefix = self.src / stage
+        entries = [
+            self.files[f] for f in sorted(self.files)
+            if self.files[f] and f.parts[: len(prefix.parts)] == prefix.parts
+        ]
+        if entries:
+            self.stages[stage] = self.nest.nest_entries(entries, stage, [stage], [])
+        else:
+            self.stages.pop(stage, None)
+
+    def rebuild_llm(self, llm):
+        """Aggregate, kernel, lock-baseline, compact kernel and session XML for one LLM."""
+        ident = f"protocols-{llm}"
+        entries = [(s, self.stages[s]) for s in sorted(self.stages) if llm in s]
+        out = {}
+        if entries:
+            self.aggregates[llm] = self.nest.nest_entries(entries, ident, [], [ident])
+            write_if_changed(self.build / "protocols" / f"{ident}.bjson", _bintree.encode(self.aggregates[llm]))
+        else:
+            self.aggregates.pop(llm, None)
+        parts = {
+            f"orchestration-{llm}": copy.deepcopy(self.boot.get(f"orchestration-{llm}")),
+            ident: dict(self.aggregates[llm]) if llm in self.aggregates else None,
+            f"rules-{llm}": self.boot.get(f"rules-{llm}"),
+        }
+        # nest-json leaves protocol-schema.json out of kernels
+        kernel_entries = [self.nest.keyed(doc, stem) for stem, doc in sorted(parts.items()) if doc]
+        kernel = self.nest.nest_entries(kernel_entries, f"kernel-{llm}", ["rules"], [ident], wrap=KERNEL_WRAP)
+        try:
+            out["mismatches"] = lock(kernel)[1]
+        except Exception as e:
+            out["baseline"] = str(e)
+        kernel_path = self.build / f"kernel-{llm}.json"
+        write_if_changed(kernel_path, dumps(kernel, indent=2, ensure_ascii=False))
+        dist = self.build / "dist" / llm
+        compact = dist / f"kernel-{llm}-out.bjson"
+        if write_if_changed(compact, _bintree.encode(strip_nulls(kernel))):
+            parser = argparse.ArgumentParser()
+            self.session.setup_arguments(parser)
+            res = self.session.run_task(parser.parse_args([str(compact), "-o", str(dist)]))
+            if res.get("status") == "error":
+                out["session"] = res.get("message")
+        return out
+
+    def rebuild(self, changed, removed):
+        t0 = time.perf_counter()
+        stages, llms, problems = self.apply(changed, removed)
+        for stage in sorted(stages):
+            self.rebuild_stage(stage)
+        notes = {llm: self.rebuild_llm(llm) for llm in sorted(llms)}
+        return {
+            "files": len(changed) + len(removed),
+            "stages": sorted(stages),
+            "llms": sorted(llms),
+            "problems": problems,
+            "notes": {k: v for k, v in notes.items() if any(v.values())},
+            "ms": round((time.perf_counter() - t0) * 1000, 1),
+        }
+
+def report(result, label):
+    touched = ", ".join(result["stages"] or result["llms"]) or "nothing"
+    sys.stderr.write(f"↻ {label}: {result['files']} file(s) → {touched} in {result['ms']} ms\n")
+    for p in result["problems"]:
+        sys.stderr.write(f"  ✗ {p}\n")
+    for llm, note in result["notes"].items():
+        sys.stderr.write(f"  ⚠ {llm}: {note}\n")
+
+def run_task(args, context=None):
+    if not Path(args.src).is_dir():
+        return {"error": f"NO_SOURCE: {args.src}"}
+    watcher = Watcher(args)
+    changed, removed = watcher.changes()
+    first = watcher.rebuild(changed, removed)
+    report(first, "initial build")
+    if args.once:
+        return {"initial": first, "rebuilds": 0, "error": None}
+
+    notifier = None
+    if not args.poll and sys.platform.startswith("linux"):
+        try:
+            notifier = Inotify()
+        except (OSError, AttributeError):
+            notifier = None
+    mode = "inotify" if notifier else "polling"
+    notifier = notifier or Poller()
+    sys.stderr.write(f"👀 watching {args.src} ({mode}); Ctrl-C to stop\n")
+    rebuilds = 0
+    try:
+        while True:
+            for d in watcher.dirs():
+                notifier.add(d)
+            if not notifier.wait(args.interval):
+                continue
+            pending = {}
+            changed, removed = watcher.changes()
+            while changed or removed:
+                pending.update({f: True for f in changed})
+                pending.update({f: False for f in removed})
+                notifier.wait(args.debounce)
+                changed, removed = watcher.changes()
+            if not pending:
+                continue
+            result = watcher.rebuild(
+                [f for f, alive in pending.items() if alive], [f for f, alive in pending.items() if not alive]
+            )
+            rebuilds += 1
+            report(result, "rebuild")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        notifier.close()
+    return {"initial": first, "rebuilds": rebuilds, "error": None}
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(prog="watch")
+    setup_arguments(p)
+    print(dumps(run_task(p.parse_args()), indent=2, ensure_ascii=False))
@@ -23,7 +23,7 @@ def get_tools():
     return {}
   tools = {}
   for f in framework_path.rglob("*.py"):
-    if f.name == "__init__.py" or f.name in config["ignore_patterns"] or f.name == "run.py":
+    if f.name.startswith("_") or f.name in config["ignore_patterns"] or f.name == "run.py":
       continue
     tool_name = f.stem.replace("_", "-")
     if tool_name not in tools:
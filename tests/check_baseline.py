@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Check lock-baseline against a kernel that nest-json builds the way build.sh does.
+
+Generates a small protocol corpus, nests stages, aggregates and the kernel
+with main.py, then checks that the locked rule count covers the nested
+rules-<llm> root, that editing a rule changes the baseline hash, and that a
+failing run exits 1 and leaves the kernel byte for byte as it was.
+
+  python tests/check_baseline.py
+"""
+import sys
+import json
+import tempfile
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "framework"))
+from _corpus import generate
+
+LLM = "chatgpt"
+
+
+def main_py(*argv):
+  """(exit code, parsed stdout or None) of one main.py run from the repo root."""
+  proc = subprocess.run([sys.executable, "main.py", *map(str, argv)], cwd=ROOT, capture_output=True, text=True)
+  try:
+    return proc.returncode, json.loads(proc.stdout)
+  except ValueError:
+    return proc.returncode, None
+
+
+def build_kernel(src, build):
+  """build.sh's nest steps for one LLM: stage documents, the aggregate, then the kernel."""
+  stages = []
+  for folder in sorted(src.glob(f"s*-{LLM}")):
+    out = build / f"{folder.name}.bjson"
+    main_py("--silent", "nest-json", "nest", folder, "-o", out, "--length", folder.name)
+    stages.append(out)
+  aggregate = build / f"protocols-{LLM}.bjson"
+  main_py("--silent", "nest-json", "nest", *stages, "-o", aggregate, "--sum", f"protocols-{LLM}")
+  kernel = build / f"kernel-{LLM}.json"
+  main_py(
+    "--silent", "nest-json", "nest",
+    src / f"orchestration-{LLM}.json", src / f"rules-{LLM}.json", src / "protocol-schema.json", aggregate,
+    "-o", kernel, "--length", "rules", "--sum", f"protocols-{LLM}",
+    "--wrap", '{"metadata":{"type":"orchestration-control-plane"}}',
+  )
+  return kernel
+
+
+def main():
+  failures = []
+
+  def expect(what, got, want):
+    ok = got == want
+    print(f"{'ok  ' if ok else 'FAIL'} {what}" + ("" if ok else f": got {got!r}, want {want!r}"))
+    if not ok:
+      failures.append(what)
+
+  with tempfile.TemporaryDirectory() as tmp:
+    generate(tmp, 60, dirty_ratio=0)
+    src, build = Path(tmp, "protocols"), Path(tmp, "build")
+    build.mkdir()
+    kernel = build_kernel(src, build)
+    rules = json.loads((src / f"rules-{LLM}.json").read_text(encoding="utf-8"))["rules"]
+    doc = json.loads(kernel.read_text(encoding="utf-8"))
+    expect("kernel nests rules under rules-<llm>", sorted(doc[f"rules-{LLM}"]), ["rules"])
+
+    code, out = main_py("lock-baseline", kernel)
+    expect("lock: exit 0", code, 0)
+    baseline = (out or {"results": [{}]})["results"][0].get("baseline", {})
+    expect("lock: every nested rule counted", baseline.get("baseline-rules-count"), len(rules))
+
+    # edit one rule: the hash must move, and a failing run must not touch the file
+    doc = json.loads(kernel.read_text(encoding="utf-8"))
+    first = next(iter(doc[f"rules-{LLM}"]["rules"]))
+    doc[f"rules-{LLM}"]["rules"][first] += " (edited)"
+    kernel.write_text(json.dumps(doc, indent=4), encoding="utf-8")
+    before = kernel.read_bytes()
+    code, _ = main_py("lock-baseline", kernel)
+    expect("edited rule: lock exits 1", code, 1)
+    expect("edited rule: kernel left untouched", kernel.read_bytes() == before, True)
+    code, _ = main_py("lock-baseline", kernel, "--check")
+    expect("edited rule: --check exits 1", code, 1)
+    code, out = main_py("lock-baseline", kernel, "--update")
+    new = (out or {"results": [{}]})["results"][0].get("baseline", {})
+    expect("edited rule: --update exits 0", code, 0)
+    expect("edited rule: hash changed", new.get("baseline-hash") != baseline.get("baseline-hash"), True)
+    expect("edited rule: count unchanged", new.get("baseline-rules-count"), len(rules))
+  print(f"{len(failures)} failed" if failures else "all passed")
+  return 1 if failures else 0
+
+
+if __name__ == "__main__":
+  sys.exit(main())
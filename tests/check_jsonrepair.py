@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""Table checks for framework/_jsonrepair: each input, its repaired text and the fixes made.
+
+  python tests/check_jsonrepair.py
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "framework"))
+from _jsonrepair import describe, repair_json
+
+CASES = [
+  # (input, repaired text, fixes)
+  ('{"a": 1}', '{"a": 1}', []),
+  ('{"a": [1, 2,],}', '{"a": [1, 2]}', ["trailing-comma@L1:C12", "trailing-comma@L1:C14"]),
+  ("{'k': 'it\\'s'}", '{"k": "it\'s"}', ["quotes@L1:C2", "quotes@L1:C7"]),
+  ('{"a": 1 // note\n}', '{"a": 1 \n}', ["comment@L1:C9"]),
+  ('{"a": /* x */ 1}', '{"a":  1}', ["comment@L1:C7"]),
+  ("﻿{}", "{}", ["bom@L1:C1"]),
+  # bare words outside strings pass through unchanged, in any script
+  ("{é: 1}", "{é: 1}", []),
+  ('{"a": é}', '{"a": é}', []),
+  ("{日本: true,}", "{日本: true}", ["trailing-comma@L1:C10"]),
+  ('{"a": null, _b: Ω}', '{"a": null, _b: Ω}', []),
+]
+
+
+def main():
+  failures = 0
+  for text, want_text, want_fixes in CASES:
+    try:
+      got_text, fixes = repair_json(text)
+      got = (got_text, describe(fixes))
+    except Exception as e:
+      got = f"{type(e).__name__}: {e}"
+    ok = got == (want_text, want_fixes)
+    failures += not ok
+    print(f"{'ok  ' if ok else 'FAIL'} {text!r}" + ("" if ok else f": got {got!r}, want {(want_text, want_fixes)!r}"))
+  print(f"{failures} failed" if failures else "all passed")
+  return 1 if failures else 0
+
+
+if __name__ == "__main__":
+  sys.exit(main())
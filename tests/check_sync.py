@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""End-to-end check of plugins/sync.py against the static pages in fixtures/sync.
+
+Serves the fixture pages with http.server on localhost, starts a headless
+Chrome with a CDP port, runs the sync plugin over them twice and checks the
+extracted messages, the incremental merge with threads already in the vault,
+and the failure of a page without messages. Exits 1 on any mismatch.
+
+  python tests/check_sync.py [--chrome PATH]
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+import urllib.request
+import importlib.util
+import http.server
+from functools import partial
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+FIXTURES = Path(__file__).resolve().parent / "fixtures" / "sync"
+ALPHA = [
+  "Hello, can you summarise stage 2?",
+  "Stage 2 is Reason & Synthesis.",
+  "And stage 3?",
+  "Stage 3 is Verify & Conflict Resolution.",
+]
+BETA = ["One message, unchanged since the last sync."]
+
+
+def free_port():
+  with socket.socket() as s:
+    s.bind(("127.0.0.1", 0))
+    return s.getsockname()[1]
+
+
+def default_chrome():
+  if os.environ.get("CHROME"):
+    return os.environ["CHROME"]
+  from playwright.sync_api import sync_playwright
+
+  with sync_playwright() as p:
+    return p.chromium.executable_path
+
+
+def serve(directory):
+  class Quiet(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+      pass
+
+  server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), partial(Quiet, directory=str(directory)))
+  threading.Thread(target=server.serve_forever, daemon=True).start()
+  return server
+
+
+def start_chrome(chrome, port, profile):
+  log = Path(str(profile) + ".log")
+  with open(log, "wb") as err:
+    proc = subprocess.Popen(
+      [chrome, "--headless=new", "--no-sandbox", "--disable-gpu", f"--remote-debugging-port={port}",
+       f"--user-data-dir={profile}", "about:blank"],
+      stdout=subprocess.DEVNULL,
+      stderr=err,
+    )
+  deadline = time.time() + 20
+  while time.time() < deadline:
+    try:
+      urllib.request.urlopen(f"http://127.0.0.1:{port}/json/version", timeout=1).read()
+      return proc
+    except OSError:
+      if proc.poll() is not None:
+        break
+      time.sleep(0.2)
+  proc.kill()
+  tail = log.read_text(errors="replace").strip().splitlines()[-3:]
+  raise RuntimeError(f"{chrome} did not open CDP port {port}" + "".join(f"\n  {line}" for line in tail))
+
+
+def load_sync():
+  spec = importlib.util.spec_from_file_location("sync_plugin", ROOT / "plugins" / "sync.py")
+  mod = importlib.util.module_from_spec(spec)
+  spec.loader.exec_module(mod)
+  return mod
+
+
+def run_sync(sync, argv):
+  parser = argparse.ArgumentParser(prog="sync")
+  sync.setup_arguments(parser)
+  return sync.run_task(parser.parse_args(argv), {})
+
+
+def main():
+  parser = argparse.ArgumentParser(prog="check_sync")
+  parser.add_argument("--chrome", help="Chrome/Chromium binary (default: $CHROME, else Playwright's chromium)")
+  opts = parser.parse_args()
+  failures = []
+
+  def expect(what, got, want):
+    ok = got == want
+    print(f"{'ok  ' if ok else 'FAIL'} {what}" + ("" if ok else f": got {got!r}, want {want!r}"))
+    if not ok:
+      failures.append(what)
+
+  sync = load_sync()
+  server = serve(FIXTURES)
+  cdp = free_port()
+  with tempfile.TemporaryDirectory() as tmp:
+    vault, profile = Path(tmp, "vault"), Path(tmp, "profile")
+    vault.mkdir()
+    # alpha is in the vault with its first two messages and a reply that has since changed;
+    # beta is already up to date and must not be rewritten
+    (vault / "alpha.json").write_text(json.dumps({"id": "alpha", "data": ALPHA[:2] + ["(draft reply)"]}))
+    (vault / "beta.json").write_text(json.dumps({"id": "beta", "data": BETA}))
+    beta_mtime = (vault / "beta.json").stat().st_mtime_ns
+    chrome = start_chrome(opts.chrome or default_chrome(), cdp, profile)
+    try:
+      base = f"http://127.0.0.1:{server.server_address[1]}/"
+      argv = ["--url-template", base + "{}.html", "--vault", str(vault), "--port", str(cdp), "--timeout", "3000"]
+      first = run_sync(sync, ["--thread-id", "alpha", "beta", "empty", "-j", "3"] + argv)
+      expect("first run: no error", first.get("error"), None)
+      results = {r["id"]: r for r in first.get("results", [])}
+      expect("first run: result order", [r["id"] for r in first.get("results", [])], ["alpha", "beta", "empty"])
+      expect("alpha: updated", results.get("alpha", {}).get("status"), "UPDATED")
+      expect("alpha: messages read, empty one dropped", results.get("alpha", {}).get("messages"), 4)
+      expect("alpha: new past the kept prefix", results.get("alpha", {}).get("new"), 2)
+      expect("alpha: vault data", json.loads((vault / "alpha.json").read_text()), {"id": "alpha", "data": ALPHA})
+      expect("beta: unchanged", results.get("beta", {}).get("status"), "UNCHANGED")
+      expect("beta: file not rewritten", (vault / "beta.json").stat().st_mtime_ns, beta_mtime)
+      expect("empty: failed", results.get("empty", {}).get("status"), "FAILED")
+      expect("empty: nothing written", (vault / "empty.json").exists(), False)
+      expect("first run: stats", first.get("stats"), {"UPDATED": 1, "UNCHANGED": 1, "FAILED": 1})
+      expect("no temporary files left", sorted(p.name for p in vault.iterdir()), ["alpha.json", "beta.json"])
+
+      second = run_sync(sync, ["--thread-id", "alpha", "beta"] + argv)
+      expect("second run: stats", second.get("stats"), {"UPDATED": 0, "UNCHANGED": 2, "FAILED": 0})
+    finally:
+      chrome.kill()
+      chrome.wait()
+      server.shutdown()
+  print(f"{len(failures)} failed" if failures else "all passed")
+  return 1 if failures else 0
+
+
+if __name__ == "__main__":
+  sys.exit(main())